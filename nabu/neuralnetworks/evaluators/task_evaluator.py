@@ -112,20 +112,32 @@ class TaskEvaluator(object):
 				data_queue_elements = data_queue_elements[:number_of_elements]
 
 
-				#create the data queue and queue runners (inputs are allowed to get shuffled. I already did this so set to False)
-				data_queue = tf.train.string_input_producer(
-					string_tensor=data_queue_elements,
-					shuffle=False,
-					seed=None,
-					capacity=self.batch_size*2)
-
-				#create the input pipeline
-				data, seq_length = input_pipeline.input_pipeline(
-					data_queue=data_queue,
-					batch_size=self.batch_size,
-					numbuckets=1,
-					dataconfs=self.input_dataconfs[linkedset] + self.target_dataconfs[linkedset]
-				)
+				if self._get_option('input_pipeline', 'queue') == 'dataset':
+					#create the tf.data input pipeline
+					data, seq_length = input_pipeline.dataset_pipeline(
+						data_queue_elements=data_queue_elements,
+						batch_size=self.batch_size,
+						dataconfs=self.input_dataconfs[linkedset] + self.target_dataconfs[linkedset],
+						num_parallel_calls=int(self._get_option('num_parallel_calls', 4)),
+						prefetch=int(self._get_option('prefetch', 2)),
+						cache_megabytes=float(self._get_option('cache_megabytes', 0)),
+						cache_dir=self._get_option('cache_dir', None)
+					)
+				else:
+					#create the data queue and queue runners (inputs are allowed to get shuffled. I already did this so set to False)
+					data_queue = tf.train.string_input_producer(
+						string_tensor=data_queue_elements,
+						shuffle=False,
+						seed=None,
+						capacity=self.batch_size*2)
+
+					#create the input pipeline
+					data, seq_length = input_pipeline.input_pipeline(
+						data_queue=data_queue,
+						batch_size=self.batch_size,
+						numbuckets=1,
+						dataconfs=self.input_dataconfs[linkedset] + self.target_dataconfs[linkedset]
+					)
 
 				#split data into inputs and targets
 				for ind,input_name in enumerate(self.linkedsets[linkedset]['inputs']):
@@ -144,6 +156,21 @@ class TaskEvaluator(object):
 
 		return loss, norm, numbatches, logits, seq_lengths
 
+	def _get_option(self, option, default):
+		'''get an option from the evaluator section of the configuration
+
+        Args:
+            option: the name of the option
+            default: the value if the option is not set
+
+        Returns:
+            the value of the option'''
+
+		if self.conf.has_option('evaluator', option):
+			return self.conf.get('evaluator', option)
+
+		return default
+
 	@abstractmethod
 	def _get_outputs(self, inputs, seq_length):
 		'''compute the validation outputs for a batch of data
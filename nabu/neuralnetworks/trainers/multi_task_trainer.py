@@ -10,6 +10,7 @@ import tensorflow as tf
 from nabu.neuralnetworks.models import model_factory
 from nabu.neuralnetworks.components import hooks
 from nabu.neuralnetworks.trainers import task_trainer as task_trainer_script
+from nabu.processing import input_pipeline
 import pdb
 
 class MultiTaskTrainer():
@@ -322,6 +323,11 @@ class MultiTaskTrainer():
 				#create the scaffold
 				self.scaffold = tf.train.Scaffold()
 
+			#the statistics of the input pipelines are reported in the step
+			#log and written as summaries
+			self.pipeline_monitor = input_pipeline.PipelineMonitor(
+				os.path.join(expdir, 'logdir'))
+
 
 
 	def train(self):
@@ -358,6 +364,9 @@ class MultiTaskTrainer():
 		#number of times validation performance was worse
 		num_tries = np.zeros(len(self.val_task_trainers))
 
+		#the number of steps between the reports of the input pipelines
+		stats_frequency = int(self.conf.get('pipeline_stats_frequency', 100))
+
 		#determine al parameters
 		all_params=[]
 		for ind,_ in enumerate(self.task_trainers):
@@ -622,6 +631,14 @@ class MultiTaskTrainer():
 								print_str+='} '
 						print_str+=')'
 
+					#report the statistics of the input pipelines, to see if
+					#the training steps are waiting for data
+					if stats_frequency > 0 and global_step % stats_frequency == 0:
+						report = self.pipeline_monitor(sess, global_step)
+						for line in report.split('\n') if report else []:
+							print_str+=('\nWORKER %d: input pipeline %s'
+										%(self.task_index, line))
+
 					#print the complete string
 					print(print_str)
 
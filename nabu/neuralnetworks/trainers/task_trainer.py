@@ -111,6 +111,8 @@ class TaskTrainer():
 
 		#check if running in distributed model
 		self.data_queue=dict()
+		self.data_queue_elements=dict()
+		use_dataset = self.trainerconf.get('input_pipeline', 'queue') == 'dataset'
 		for linkedset in self.linkedsets:
 			data_queue_name='data_queue_%s_%s' %(self.task_name,linkedset)
 			if 'local' in cluster.as_dict():
@@ -125,13 +127,17 @@ class TaskTrainer():
 
 				data_queue_elements = data_queue_elements[:number_of_elements]
 
-				#create the data queue and queue runners
-				self.data_queue[linkedset] = tf.train.string_input_producer(
-					string_tensor=data_queue_elements,
-					shuffle=False,
-					seed=None,
-					capacity=self.batch_size*2,
-					shared_name=data_queue_name)
+				if use_dataset:
+					#the tf.data input pipeline reads the elements itself
+					self.data_queue_elements[linkedset] = data_queue_elements
+				else:
+					#create the data queue and queue runners
+					self.data_queue[linkedset] = tf.train.string_input_producer(
+						string_tensor=data_queue_elements,
+						shuffle=False,
+						seed=None,
+						capacity=self.batch_size*2,
+						shared_name=data_queue_name)
 
 				#compute the number of steps
 				if int(self.trainerconf['numbatches_to_aggregate']) == 0:
@@ -147,6 +153,11 @@ class TaskTrainer():
 				done_ops = [tf.no_op()]
 
 			else:
+				if use_dataset:
+					raise Exception(
+						'the dataset input pipeline can only be used for local '
+						'training')
+
 				#get the data queue
 				self.data_queue[linkedset] = tf.FIFOQueue(
 					capacity=self.batch_size*(num_replicas+1),
@@ -196,12 +207,26 @@ class TaskTrainer():
 
 			for linkedset in self.linkedsets:
 				#create the input pipeline
-				data, seq_length = input_pipeline.input_pipeline(
-					data_queue=self.data_queue[linkedset],
-					batch_size=self.batch_size,
-					numbuckets=int(self.trainerconf['numbuckets']),
-					dataconfs=self.input_dataconfs[linkedset] + self.target_dataconfs[linkedset]
-				)
+				if linkedset in self.data_queue_elements:
+					data, seq_length = input_pipeline.dataset_pipeline(
+						data_queue_elements=self.data_queue_elements[linkedset],
+						batch_size=self.batch_size,
+						dataconfs=self.input_dataconfs[linkedset] + self.target_dataconfs[linkedset],
+						numbuckets=int(self.trainerconf['numbuckets']),
+						random_crop=self.trainerconf.get('random_crop', 'True') == 'True',
+						num_parallel_calls=int(self.trainerconf.get('num_parallel_calls', 4)),
+						prefetch=int(self.trainerconf.get('prefetch', 2)),
+						cache_megabytes=float(self.trainerconf.get('cache_megabytes', 0)),
+						cache_dir=self.trainerconf.get('cache_dir', None)
+					)
+				else:
+					data, seq_length = input_pipeline.input_pipeline(
+						data_queue=self.data_queue[linkedset],
+						batch_size=self.batch_size,
+						numbuckets=int(self.trainerconf['numbuckets']),
+						dataconfs=self.input_dataconfs[linkedset] + self.target_dataconfs[linkedset],
+						random_crop=self.trainerconf.get('random_crop', 'True') == 'True'
+					)
 
 				#split data into inputs and targets
 				for ind,input_name in enumerate(self.linkedsets[linkedset]['inputs']):
@@ -1,8 +1,10 @@
 '''@file data_reader.py
 contains a reader class for data'''
 
+import os
 from six.moves import configparser
 from nabu.processing.processors import processor_factory
+from nabu.processing.tfreaders import numpy_float_array_as_memmap_reader
 import numpy as np
 
 class DataReader(object):
@@ -30,6 +32,7 @@ class DataReader(object):
 		self.segment_lengths = segment_lengths
 
 		self.processors=[]
+		self.stores=[]
 		self.start_index_set=[0]
 		self.datafile_lines=[]
 		for dataconf in dataconfs:
@@ -54,6 +57,36 @@ class DataReader(object):
 			self.start_index_set.append(self.start_index_set[-1]+len(datalines))
 			self.datafile_lines.extend(datalines)
 
+			#if the processed data was written in a contiguous store, read it
+			#from the store instead of processing it again
+			self.stores.append(self._read_store(dataconf))
+
+	def _read_store(self, dataconf):
+		'''read the pointers to the processed data in a contiguous store
+
+        Args:
+            dataconf: the database configuration
+
+        Returns:
+            a dictionary containing a pointer for every segment or None if the
+            data is not available in a store'''
+
+		if dataconf.get('writer_style') != 'numpy_float_array_as_memmap':
+			return None
+
+		scp_file = os.path.join(dataconf['store_dir'], self.segment_lengths[0],
+								'pointers.scp')
+		if not os.path.exists(scp_file):
+			return None
+
+		pointers = dict()
+		with open(scp_file) as fid:
+			for line in fid:
+				seg_utt_name, pointer = line.strip().split('\t')
+				pointers[seg_utt_name] = pointer
+
+		return pointers
+
 	def __call__(self, list_pos):
 		'''read data from the datafile list
 
@@ -67,6 +100,7 @@ class DataReader(object):
 		for ind,start_index in enumerate(self.start_index_set):
 			if start_index>list_pos:
 				processor=self.processors[ind-1]
+				store=self.stores[ind-1]
 				break
 
 		#split the name and the data line
@@ -74,6 +108,18 @@ class DataReader(object):
 		utt_name = splitline[0]
 		dataline = ' '.join(splitline[1:])
 
+		#read the processed data from the store if it is available, the
+		#processor is not used so utt_info only contains the name. If the
+		#processor returns utterance information the data is processed again
+		seg_utt_name = utt_name + '_part 0'
+		if (store is not None and seg_utt_name in store
+				and not processor.returns_utt_info):
+			processed = numpy_float_array_as_memmap_reader.read_memmap_array(
+				store[seg_utt_name])
+			utt_info = dict()
+			utt_info['utt_name'] = utt_name
+			return processed, utt_info
+
 		#process the dataline
 		processed, utt_info = processor(dataline)
 		utt_info['utt_name'] = utt_name
@@ -57,12 +57,11 @@ class MaskReconstructor(reconstructor.Reconstructor):
                 comp_conf=processor.comp.conf
                 break
 
-        reconstructed_signals = list()
-        for spk in range(self.nrS):
-            spec_est = mixture * masks[spk,:,:]
-            reconstructed_signals.append(base.spec2time(spec_est, utt_info['rate'],
-                                                        utt_info['siglen'],
-                                                        comp_conf))
+        #resynthesise the signals of all speakers at once
+        spec_est = mixture * masks[:self.nrS,:,:]
+        reconstructed_signals = base.spec2time(spec_est, utt_info['rate'],
+                                               utt_info['siglen'],
+                                               comp_conf)
 
         return reconstructed_signals, utt_info
 
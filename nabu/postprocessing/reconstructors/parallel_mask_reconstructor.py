@@ -49,12 +49,11 @@ class ParallelMaskReconstructor(parallel_reconstructor.ParallelReconstructor):
 
         # apply the masks to obtain the reconstructed signals. Use the conf for feature
         #settings from the original mixture
-        reconstructed_signals = list()
-        for spk in range(self.nrS):
-            spec_est = mixture * masks[spk,:,:]
-            reconstructed_signals.append(base.spec2time(spec_est, utt_info['rate'],
-                                                        utt_info['siglen'],
-                                                        self.org_mix_reader.processor.comp.conf))
+        #resynthesise the signals of all speakers at once
+        spec_est = mixture * masks[:self.nrS,:,:]
+        reconstructed_signals = base.spec2time(spec_est, utt_info['rate'],
+                                               utt_info['siglen'],
+                                               self.org_mix_reader.processor.comp.conf)
 
         return reconstructed_signals, utt_info
 
@@ -0,0 +1,228 @@
+'''@file audio_reader.py
+contains the functionality to read audio files, shared by all processors'''
+
+import os
+import io
+import subprocess
+import collections
+from multiprocessing.pool import ThreadPool
+import scipy.io.wavfile as wav
+
+#the decoded audio that is kept in memory, so audio that is used in multiple
+#sections is only decoded once
+_decoded = collections.OrderedDict()
+_decoded_bytes = 0
+_MAX_DECODED_BYTES = 256*2**20
+
+#the disk backed cache where the decoded audio is stored, so it is shared by
+#all the processes that prepare the data
+_audio_cache = None
+
+#the threads that run commands in the background and the audio they are
+#decoding
+_decode_pool = None
+_prefetched = collections.OrderedDict()
+_max_prefetched = 0
+
+def read_wav(wavfile):
+    '''
+    read a wav file
+
+    Args:
+        wavfile: either a path to a wav file, a command to read and pipe
+            an audio file or a segment of an audio file of the form
+            "audiofile begin end", with begin and end in seconds
+
+    Returns:
+        - the sampling rate
+        - the utterance as a read only numpy array
+    '''
+
+    if os.path.exists(wavfile):
+        #its a file
+        rate, utterance = _read_file(wavfile)
+    elif wavfile[-1] == '|':
+        #its a command
+        rate, utterance = _read_command(wavfile)
+    else:
+        #its a segment of an utterance, for a wav file only the samples in the
+        #segment are read from the memory map
+        split = wavfile.split(' ')
+        begin = float(split[-2])
+        end = float(split[-1])
+        unsegmented = ' '.join(split[:-2])
+        rate, full_utterance = read_wav(unsegmented)
+        utterance = full_utterance[int(begin*rate):int(end*rate)]
+
+    return rate, utterance
+
+def _read_file(filename):
+    '''
+    read a wav file, PCM wav files are memory mapped so the samples are only
+    read when they are used
+
+    Args:
+        filename: the path to the wav file
+
+    Returns:
+        - the sampling rate
+        - the utterance as a read only numpy array
+    '''
+
+    try:
+        rate, utterance = wav.read(filename, mmap=True)
+    except ValueError:
+        #the format of the wav file can not be memory mapped
+        return _decode(filename, wav.read)
+
+    utterance.setflags(write=False)
+
+    return rate, utterance
+
+def set_cache(cache):
+    '''
+    set the disk backed cache where the decoded audio is stored, the memory
+    cache only holds the audio decoded in the current process
+
+    Args:
+        cache: a FeatureCache or None to only keep decoded audio in memory
+    '''
+
+    global _audio_cache
+
+    _audio_cache = cache
+
+def set_decode_processes(num_processes):
+    '''
+    set the number of commands that can decode audio in the background at the
+    same time
+
+    Args:
+        num_processes: the maximum number of commands that run at the same
+            time, if 0 the commands are only run when their audio is read
+    '''
+
+    global _decode_pool, _max_prefetched
+
+    if _decode_pool is not None:
+        _decode_pool.close()
+        _decode_pool = None
+        _prefetched.clear()
+
+    if num_processes > 0:
+        _decode_pool = ThreadPool(num_processes)
+
+    #audio that is prefetched but never read (e.g. because the features came
+    #from the feature cache) is dropped when newer audio is prefetched
+    _max_prefetched = 2*num_processes
+
+def prefetch(dataline):
+    '''
+    start decoding the audio of a data line in the background, so it is
+    available when the data line is processed. Only audio that is piped by a
+    command is prefetched, wav files are memory mapped anyway.
+
+    Args:
+        dataline: the data line, either a command to read and pipe an audio
+            file or a segment of the piped audio
+    '''
+
+    if _decode_pool is None:
+        return
+
+    if dataline.endswith('|'):
+        command = dataline
+    else:
+        split = dataline.rsplit(' ', 2)
+        if len(split) < 3 or not split[0].endswith('|'):
+            return
+        command = split[0]
+
+    if command not in _decoded and command not in _prefetched:
+        _prefetched[command] = _decode_pool.apply_async(_run_command,
+                                                        (command, ))
+        while len(_prefetched) > _max_prefetched:
+            _prefetched.popitem(last=False)
+
+def _read_command(command):
+    '''
+    read the audio that is piped by a command
+
+    Args:
+        command: the command that pipes the audio, ending with |
+
+    Returns:
+        - the sampling rate
+        - the utterance as a read only numpy array
+    '''
+
+    if command in _prefetched:
+        #wait for the command that was started in the background
+        result = _prefetched.pop(command)
+        return _decode(command, lambda _: result.get())
+
+    return _decode(command, _run_command)
+
+def _run_command(command):
+    '''
+    run a command and read the wav data it pipes
+
+    Args:
+        command: the command that pipes the audio, ending with |
+
+    Returns:
+        - the sampling rate
+        - the utterance as a numpy array
+    '''
+
+    pid = subprocess.Popen(command + ' tee', shell=True,
+                           stdout=subprocess.PIPE)
+    output, _ = pid.communicate()
+
+    return wav.read(io.BytesIO(output))
+
+def _decode(wavfile, decode):
+    '''
+    decode audio, the most recently decoded audio is kept in memory and if a
+    cache is set the decoded audio is stored on disk
+
+    Args:
+        wavfile: the audio file or command
+        decode: the function that decodes the audio, it should return the
+            sampling rate and the utterance
+
+    Returns:
+        - the sampling rate
+        - the utterance as a read only numpy array
+    '''
+
+    global _decoded_bytes
+
+    if wavfile in _decoded:
+        rate, utterance = _decoded.pop(wavfile)
+        _decoded[wavfile] = (rate, utterance)
+        return rate, utterance
+
+    cached = None
+    if _audio_cache is not None:
+        key = _audio_cache.key(wavfile, dict())
+        cached = _audio_cache.load_audio(key)
+
+    if cached is None:
+        rate, utterance = decode(wavfile)
+        if _audio_cache is not None:
+            _audio_cache.store_audio(key, rate, utterance)
+    else:
+        rate, utterance = cached
+    utterance.setflags(write=False)
+
+    if utterance.nbytes <= _MAX_DECODED_BYTES:
+        _decoded[wavfile] = (rate, utterance)
+        _decoded_bytes += utterance.nbytes
+
+        #remove the least recently used audio
+        while _decoded_bytes > _MAX_DECODED_BYTES:
+            _, (_, removed) = _decoded.popitem(last=False)
+            _decoded_bytes -= removed.nbytes
+
+    return rate, utterance
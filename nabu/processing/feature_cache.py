@@ -0,0 +1,236 @@
+'''@file feature_cache.py
+contains the FeatureCache class'''
+
+import os
+import hashlib
+import tempfile
+import numpy as np
+import scipy.io.wavfile as wav
+
+#the fields in the configuration of a feature computer that determine the
+#computed features
+FEATURE_FIELDS = ['feature', 'winlen', 'winstep', 'winfunc', 'nfft', 'preemph',
+                  'include_energy', 'nfilt', 'numcep', 'ceplifter', 'lowfreq',
+                  'highfreq', 'dynamic']
+
+class FeatureCache(object):
+    '''a disk backed cache for computed features. The features are stored with
+    a key based on the audio file and on the feature configuration, so the
+    features of an audio file are only computed once if they are needed in
+    multiple sections of the database. Decoded audio can be stored in the same
+    cache, so it is only decoded once by all processes. If the cache grows larger than its
+    maximum size the least recently used features are removed.'''
+
+    def __init__(self, cache_dir, max_megabytes=0):
+        '''FeatureCache constructor
+
+        Args:
+            cache_dir: the directory where the features are stored, can be
+                shared by multiple caches
+            max_megabytes: the maximum size of the cache in megabytes, 0 means
+                the size is not limited
+        '''
+
+        if not os.path.isdir(cache_dir):
+            try:
+                os.makedirs(cache_dir)
+            except OSError:
+                #the directory was created by an other process
+                pass
+
+        self.cache_dir = cache_dir
+        self.max_bytes = int(float(max_megabytes)*2**20)
+
+        #the size of the cache, only tracked if the size is limited
+        if self.max_bytes > 0:
+            self.size = sum(size for _, size, _ in self._entries())
+        else:
+            self.size = 0
+
+    def __call__(self, wavfile, comp, read_wav):
+        '''get the features of an audio file, the features are computed and
+        stored if they are not in the cache
+
+        Args:
+            wavfile: the audio file as used in the datafiles, either a path to
+                a wav file, a command to read and pipe an audio file or a
+                segment of an audio file
+            comp: the feature computer
+            read_wav: the function used to read the audio file, it should
+                return the sampling rate and the audio signal
+
+        Returns:
+            the features as a [seq_length x feature_dim] numpy array
+        '''
+
+        key = self.key(wavfile, comp.conf)
+
+        features = self.load(key)
+
+        if features is None:
+            rate, utt = read_wav(wavfile)
+            features = comp(utt, rate)
+            self.store(key, features)
+
+        return features
+
+    def key(self, wavfile, conf):
+        '''get the cache key of the features of an audio file
+
+        Args:
+            wavfile: the audio file as used in the datafiles
+            conf: the feature configuration as a dict of strings
+
+        Returns:
+            the key as a string
+        '''
+
+        key = hashlib.sha1(wavfile)
+
+        #the audio files that are used, so the features are recomputed if one
+        #of the files changes
+        for part in wavfile.split(' '):
+            if os.path.isfile(part):
+                stat = os.stat(part)
+                key.update('%s %d %d' % (part, stat.st_size, stat.st_mtime))
+
+        for field in FEATURE_FIELDS:
+            if field in conf:
+                key.update('%s=%s' % (field, conf[field]))
+
+        #the data type the features are computed in, float64 if it is not set
+        key.update('dtype=%s' % conf.get('dtype', 'float64'))
+
+        return key.hexdigest()
+
+    def load(self, key):
+        '''load features from the cache
+
+        Args:
+            key: the cache key
+
+        Returns:
+            the features or None if they are not in the cache
+        '''
+
+        filename = os.path.join(self.cache_dir, key + '.npy')
+
+        try:
+            features = np.load(filename)
+        except (IOError, ValueError):
+            return None
+
+        #mark the features as recently used
+        try:
+            os.utime(filename, None)
+        except OSError:
+            pass
+
+        return features
+
+    def store(self, key, features):
+        '''store features in the cache
+
+        Args:
+            key: the cache key
+            features: the features as a numpy array
+        '''
+
+        #write to a temporary file first so other processes never read
+        #partially written features
+        fid, tmpfile = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fid, 'wb') as tmpfid:
+            np.save(tmpfid, features)
+        os.rename(tmpfile, os.path.join(self.cache_dir, key + '.npy'))
+
+        self._added(os.path.join(self.cache_dir, key + '.npy'))
+
+    def load_audio(self, key):
+        '''load decoded audio from the cache
+
+        Args:
+            key: the cache key
+
+        Returns:
+            the sampling rate and the memory mapped audio or None if the audio
+            is not in the cache
+        '''
+
+        filename = os.path.join(self.cache_dir, key + '.wav')
+
+        try:
+            rate, utterance = wav.read(filename, mmap=True)
+        except (IOError, ValueError):
+            return None
+
+        #mark the audio as recently used
+        try:
+            os.utime(filename, None)
+        except OSError:
+            pass
+
+        return rate, utterance
+
+    def store_audio(self, key, rate, utterance):
+        '''store decoded audio in the cache as a wav file
+
+        Args:
+            key: the cache key
+            rate: the sampling rate
+            utterance: the audio as a numpy array
+        '''
+
+        fid, tmpfile = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fid, 'wb') as tmpfid:
+            wav.write(tmpfid, rate, utterance)
+        os.rename(tmpfile, os.path.join(self.cache_dir, key + '.wav'))
+
+        self._added(os.path.join(self.cache_dir, key + '.wav'))
+
+    def _added(self, filename):
+        '''track the size of the cache after a file was stored
+
+        Args:
+            filename: the stored file
+        '''
+
+        if self.max_bytes > 0:
+            self.size += os.path.getsize(filename)
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        '''remove the least recently used features until the cache is 10%
+        smaller than its maximum size'''
+
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self.size = sum(size for _, size, _ in entries)
+
+        for filename, size, _ in entries:
+            if self.size <= 0.9*self.max_bytes:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                #the file was removed by an other process
+                pass
+            self.size -= size
+
+    def _entries(self):
+        '''list the stored features and audio
+
+        Returns:
+            a list of (filename, size, last use) tuples'''
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(('.npy', '.wav')):
+                continue
+            filename = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+            entries.append((filename, stat.st_size, stat.st_mtime))
+
+        return entries
@@ -2,4 +2,4 @@
 contains all the feature computers that are used in feature computation'''
 
 from . import base, sigproc, feature_computer, fbank, mfcc, logspec, \
-feature_computer_factory, magspec, spec
+feature_computer_factory, magspec, spec, multi
@@ -30,8 +30,15 @@ Author: James Lyons 2012
 
 *UPDATE: def logspec added by Jeroen Zegers on 11th of September 2017*
 
+The functions also accept multiple signals of the same length, stacked in the
+leading dimensions of the signal. The last dimension is always time and the
+features are stacked in the same way.
+
 '''
 
+import collections
+import functools
+import threading
 import numpy
 import sigproc
 from scipy.fftpack import dct
@@ -39,6 +46,50 @@ from scipy.ndimage import convolve1d
 import scipy.signal
 import scipy
 
+def _memoize(maxsize=16):
+    '''
+    memoize a function that computes a constant numpy array with a least
+    recently used cache. The cached arrays are read-only.
+
+    Args:
+        maxsize: the maximum number of cached results
+
+    Returns:
+        the decorator
+    '''
+
+    def decorator(function):
+        '''the decorator'''
+
+        cache = collections.OrderedDict()
+        lock = threading.Lock()
+
+        @functools.wraps(function)
+        def memoized(*args, **kwargs):
+            '''the memoized function'''
+
+            key = args + tuple(sorted(kwargs.items()))
+
+            with lock:
+                if key in cache:
+                    value = cache.pop(key)
+                    cache[key] = value
+                    return value
+
+            value = function(*args, **kwargs)
+            value.flags.writeable = False
+
+            with lock:
+                cache[key] = value
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+
+            return value
+
+        return memoized
+
+    return decorator
+
 def raw(signal):
     '''
     compute the raw audio signal with limited range
@@ -51,9 +102,39 @@ def raw(signal):
         A numpy array of size (N by 1) containing the raw audio limited to a
         range between -1 and 1
     '''
-    feat = signal.astype(numpy.float32)/numpy.max(numpy.abs(signal))
+    feat = (signal.astype(numpy.float32)
+            /numpy.max(numpy.abs(signal), -1, keepdims=True))
 
-    return feat[:, numpy.newaxis]
+    return feat[..., numpy.newaxis]
+
+def stft(signal, samplerate, conf, preemph=True):
+    '''
+    Compute the short time fourier transform of an audio signal. All
+    spectrogram features are derived from it.
+
+    Args:
+        signal: the audio signal from which to compute features. Should be an
+            N*1 array
+        samplerate: the samplerate of the signal we are working with.
+        conf: feature configuration
+        preemph: whether preemphasis is applied to the signal before the
+            transform
+
+    Returns:
+        A numpy array of size (NUMFRAMES by numfreq) containing the complex
+        spectrum of every frame
+    '''
+    if preemph:
+        signal = sigproc.preemphasis(signal, float(conf['preemph']),
+                                     _get_dtype(conf))
+
+    winfunc = _get_winfunc(conf['winfunc'])
+
+    frames = sigproc.framesig(signal, float(conf['winlen'])*samplerate,
+                              float(conf['winstep'])*samplerate,
+                              winfunc, _get_dtype(conf))
+
+    return sigproc.rfft(frames, int(conf['nfft']))
 
 def spec(signal, samplerate, conf):
     '''
@@ -70,14 +151,8 @@ def spec(signal, samplerate, conf):
         row holds 1 feature vector, a numpy vector containing the complex
         spectrum of the corresponding frame 
     '''
-    winfunc = _get_winfunc(conf['winfunc'])
 
-    frames = sigproc.framesig(signal, float(conf['winlen'])*samplerate,
-                              float(conf['winstep'])*samplerate,
-                              winfunc)
-    spec = sigproc.spec(frames, int(conf['nfft']))
-
-    return spec
+    return stft(signal, samplerate, conf, preemph=False)
 
 def spec2time(spec, samplerate, siglen, conf):
     '''
@@ -86,7 +161,8 @@ def spec2time(spec, samplerate, siglen, conf):
     Args:
 	spec: A numpy array of size (NUMFRAMES by numfreq) containing features. Each
         row holds 1 feature vector, a numpy vector containing the complex
-        spectrum of the corresponding frame
+        spectrum of the corresponding frame. Multiple spectrograms can be
+        stacked in the leading dimensions (e.g. one for every speaker)
         samplerate: the samplerate of the signal we are working with.
         siglen the: length of the desired signal, use 0 if unknown. Output will
             be truncated to siglen samples.
@@ -94,7 +170,8 @@ def spec2time(spec, samplerate, siglen, conf):
 
     Returns:
         signal: the audio signal from which to compute features. This is an
-            N*1 array
+            N*1 array. If multiple spectrograms are stacked in spec, the
+            signals are stacked in the same way
     '''
 
     frames = sigproc.spec2frames(spec)
@@ -104,8 +181,8 @@ def spec2time(spec, samplerate, siglen, conf):
     signal = sigproc.deframesig(frames, siglen,float(conf['winlen'])*samplerate,
                                 float(conf['winstep'])*samplerate, winfunc)
 
-    #Limit the range of the signal between -1.0 and 1.0
-    signal = signal/numpy.max(numpy.abs(signal))
+    #Limit the range of each signal between -1.0 and 1.0
+    signal = signal/numpy.max(numpy.abs(signal), -1, keepdims=True)
 
     return signal
 
@@ -125,16 +202,8 @@ def magspec(signal, samplerate, conf):
         row holds 1 feature vector, a numpy vector containing the magnitude
         spectrum of the corresponding frame 
     '''
-    signal = sigproc.preemphasis(signal, float(conf['preemph']))
-
-    winfunc = _get_winfunc(conf['winfunc'])
-
-    frames = sigproc.framesig(signal, float(conf['winlen'])*samplerate,
-                              float(conf['winstep'])*samplerate,
-                              winfunc)
-    magspec = sigproc.magspec(frames, int(conf['nfft']))
 
-    return magspec
+    return numpy.absolute(stft(signal, samplerate, conf))
 
 def logspec(signal, samplerate, conf):
     '''
@@ -151,16 +220,23 @@ def logspec(signal, samplerate, conf):
         row holds 1 feature vector, a numpy vector containing the log magnitude
         spectrum of the corresponding frame 
     '''
-    signal = sigproc.preemphasis(signal, float(conf['preemph']))
 
-    winfunc = _get_winfunc(conf['winfunc'])
+    return mag2log(magspec(signal, samplerate, conf))
 
-    frames = sigproc.framesig(signal, float(conf['winlen'])*samplerate,
-                              float(conf['winstep'])*samplerate,
-                              winfunc)
-    logspec = sigproc.logmagspec(frames, int(conf['nfft']))
+def mag2log(magspec):
+    '''
+    Compute the log magnitude spectrum from the magnitude spectrum.
 
-    return logspec
+    Args:
+        magspec: the magnitude spectrum, it is floored in place
+
+    Returns:
+        the log magnitude spectrum in dB
+    '''
+
+    magspec[magspec <= 1e-30] = 1e-30
+
+    return 10*numpy.log10(magspec)
 
 def _get_winfunc(str_winfunc):
     '''
@@ -170,23 +246,48 @@ def _get_winfunc(str_winfunc):
 	str_winfunc: a string indicating the desired window function
 	
     Returns:
-	winfunc: the desired window function as a python lambda function
+	winfunc: the desired window function as a python function
     '''
 
-    if str_winfunc=='cosine':
-        winfunc=lambda x: scipy.signal.cosine(x)
-    elif str_winfunc=='hanning':
-        winfunc=lambda x: scipy.hanning(x)
-    elif str_winfunc=='hamming':
-        winfunc=lambda x: scipy.signal.hamming(x)
-    elif str_winfunc=='none':
-        winfunc=lambda x: numpy.ones((x, ))
-    else:
-        raise Exception('unknown window function: %s' % conf['winfunc'])
+    if str_winfunc not in _WINFUNCS:
+        raise Exception('unknown window function: %s' % str_winfunc)
+
+    return _WINFUNCS[str_winfunc]
 
-    return winfunc
+def _get_dtype(conf):
+    '''
+    Get the data type the features are computed in.
+
+    Args:
+        conf: feature configuration, the data type is set with the dtype
+            option, float64 by default
 
+    Returns:
+        the data type as a numpy dtype
+    '''
 
+    return numpy.dtype(conf.get('dtype', 'float64'))
+
+#the window functions are module level functions, so the same function is
+#returned for every call and the computed windows can be reused
+def _cosine(x):
+    '''cosine window of length x'''
+    return scipy.signal.cosine(x)
+
+def _hanning(x):
+    '''hanning window of length x'''
+    return scipy.hanning(x)
+
+def _hamming(x):
+    '''hamming window of length x'''
+    return scipy.signal.hamming(x)
+
+def _rectangular(x):
+    '''rectangular window of length x'''
+    return numpy.ones((x, ))
+
+_WINFUNCS = {'cosine': _cosine, 'hanning': _hanning, 'hamming': _hamming,
+             'none': _rectangular}
 
 def mfcc(signal, samplerate, conf):
     '''
@@ -206,8 +307,13 @@ def mfcc(signal, samplerate, conf):
 
     feat, energy = fbank(signal, samplerate, conf)
     feat = numpy.log(feat)
-    feat = dct(feat, type=2, axis=1, norm='ortho')[:, :int(conf['numcep'])]
-    feat = lifter(feat, float(conf['ceplifter']))
+
+    #the dct and the lifter are applied with a single matrix multiplication
+    cepstral_matrix = get_cepstral_matrix(int(conf['nfilt']),
+                                          int(conf['numcep']),
+                                          float(conf['ceplifter']),
+                                          dtype=feat.dtype)
+    feat = numpy.dot(feat, cepstral_matrix)
     return feat, numpy.log(energy)
 
 def fbank(signal, samplerate, conf):
@@ -229,25 +335,28 @@ def fbank(signal, samplerate, conf):
     if highfreq < 0:
         highfreq = samplerate/2
 
-    signal = sigproc.preemphasis(signal, float(conf['preemph']))
+    signal = sigproc.preemphasis(signal, float(conf['preemph']),
+                                 _get_dtype(conf))
     frames = sigproc.framesig(signal, float(conf['winlen'])*samplerate,
-                              float(conf['winstep'])*samplerate)
+                              float(conf['winstep'])*samplerate,
+                              dtype=_get_dtype(conf))
     pspec = sigproc.powspec(frames, int(conf['nfft']))
 
     # this stores the total energy in each frame
-    energy = numpy.sum(pspec, 1)
+    energy = numpy.sum(pspec, -1)
 
     # if energy is zero, we get problems with log
-    energy = numpy.where(energy == 0, numpy.finfo(float).eps, energy)
+    energy = numpy.where(energy == 0, numpy.finfo(energy.dtype).eps, energy)
 
     filterbank = get_filterbanks(int(conf['nfilt']), int(conf['nfft']),
-                                 samplerate, int(conf['lowfreq']), highfreq)
+                                 samplerate, int(conf['lowfreq']), highfreq,
+                                 dtype=pspec.dtype)
 
     # compute the filterbank energies
     feat = numpy.dot(pspec, filterbank.T)
 
     # if feat is zero, we get problems with log
-    feat = numpy.where(feat == 0, numpy.finfo(float).eps, feat)
+    feat = numpy.where(feat == 0, numpy.finfo(feat.dtype).eps, feat)
 
     return feat, energy
 
@@ -286,26 +395,29 @@ def ssc(signal, samplerate, conf):
     highfreq = int(conf['highfreq'])
     if highfreq < 0:
         highfreq = samplerate/2
-    signal = sigproc.preemphasis(signal, float(conf['preemph']))
+    signal = sigproc.preemphasis(signal, float(conf['preemph']),
+                                 _get_dtype(conf))
     frames = sigproc.framesig(signal, float(conf['winlen'])*samplerate,
-                              float(conf['winstep'])*samplerate)
+                              float(conf['winstep'])*samplerate,
+                              dtype=_get_dtype(conf))
     pspec = sigproc.powspec(frames, int(conf['nfft']))
 
     # this stores the total energy in each frame
-    energy = numpy.sum(pspec, 1)
+    energy = numpy.sum(pspec, -1)
 
     # if energy is zero, we get problems with log
-    energy = numpy.where(energy == 0, numpy.finfo(float).eps, energy)
+    energy = numpy.where(energy == 0, numpy.finfo(energy.dtype).eps, energy)
 
     filterbank = get_filterbanks(int(conf['nfilt']), int(conf['nfft']),
-                                 samplerate, int(conf['lowfreq']), highfreq)
+                                 samplerate, int(conf['lowfreq']), highfreq,
+                                 dtype=pspec.dtype)
 
     # compute the filterbank energies
     feat = numpy.dot(pspec, filterbank.T)
-    tiles = numpy.tile(numpy.linspace(1, samplerate/2, numpy.size(pspec, 1)),
-                       (numpy.size(pspec, 0), 1))
+    freqs = numpy.linspace(1, samplerate/2, numpy.shape(pspec)[-1],
+                           dtype=pspec.dtype)
 
-    return numpy.dot(pspec*tiles, filterbank.T) / feat, numpy.log(energy)
+    return numpy.dot(pspec*freqs, filterbank.T) / feat, numpy.log(energy)
 
 def hz2mel(rate):
     '''
@@ -335,13 +447,16 @@ def mel2hz(mel):
     '''
     return 700*(10**(mel/2595.0)-1)
 
+@_memoize()
 def get_filterbanks(nfilt=20, nfft=512, samplerate=16000, lowfreq=0,
-                    highfreq=None):
+                    highfreq=None, dtype=numpy.float64):
     '''
     Compute a Mel-filterbank.
 
     The filters are stored in the rows, the columns correspond to fft bins.
-    The filters are returned as an array of size nfilt * (nfft/2 + 1)
+    The filters are returned as an array of size nfilt * (nfft/2 + 1). The
+    filterbanks are cached, so the filterbank is only computed once for every
+    configuration.
 
     Args:
         nfilt: the number of filters in the filterbank, default 20.
@@ -350,10 +465,11 @@ def get_filterbanks(nfilt=20, nfft=512, samplerate=16000, lowfreq=0,
             mel spacing.
         lowfreq: lowest band edge of mel filters, default 0 Hz
         highfreq: highest band edge of mel filters, default samplerate/2
+        dtype: the data type of the filterbank
 
     Returns:
-        A numpy array of size nfilt * (nfft/2 + 1) containing filterbank. Each
-        row holds 1 filter.
+        A read-only numpy array of size nfilt * (nfft/2 + 1) containing
+        filterbank. Each row holds 1 filter.
     '''
 
     highfreq = highfreq or samplerate/2
@@ -368,13 +484,45 @@ def get_filterbanks(nfilt=20, nfft=512, samplerate=16000, lowfreq=0,
     #  from Hz to fft bin number
     bins = numpy.floor((nfft+1)*mel2hz(melpoints)/samplerate)
 
-    fbanks = numpy.zeros([nfilt, nfft/2+1])
-    for j in xrange(0, nfilt):
-        for i in xrange(int(bins[j]), int(bins[j+1])):
-            fbanks[j, i] = (i - bins[j])/(bins[j+1]-bins[j])
-        for i in xrange(int(bins[j+1]), int(bins[j+2])):
-            fbanks[j, i] = (bins[j+2]-i)/(bins[j+2]-bins[j+1])
-    return fbanks
+    # the left edges, centers and right edges of the filters
+    left = bins[:-2, numpy.newaxis]
+    center = bins[1:-1, numpy.newaxis]
+    right = bins[2:, numpy.newaxis]
+    fftbins = numpy.arange(nfft/2+1)[numpy.newaxis, :]
+
+    # the rising and falling slopes of all filters, empty slopes would
+    # divide by zero but are masked out
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        rising = (fftbins - left)/(center - left)
+        falling = (right - fftbins)/(right - center)
+
+    fbanks = numpy.where((fftbins >= left) & (fftbins < center), rising,
+                         numpy.where((fftbins >= center) & (fftbins < right),
+                                     falling, 0.0))
+
+    return fbanks.astype(dtype)
+
+@_memoize()
+def get_cepstral_matrix(nfilt, numcep, liftering=22, dtype=numpy.float64):
+    '''
+    Compute the matrix that applies the DCT and the lifter to log filterbank
+    features. The matrices are cached, so the matrix is only computed once for
+    every configuration.
+
+    Args:
+        nfilt: the number of filters in the filterbank
+        numcep: the number of cepstral coefficients
+        liftering: the liftering coefficient to use. L <= 0 disables lifter.
+        dtype: the data type of the matrix
+
+    Returns:
+        A read-only numpy array of size nfilt * numcep
+    '''
+
+    #the dct of the unit vectors gives the dct matrix
+    dct_matrix = dct(numpy.eye(nfilt), type=2, axis=1, norm='ortho')[:, :numcep]
+
+    return lifter(dct_matrix, liftering).astype(dtype)
 
 def lifter(cepstra, liftering=22):
     '''
@@ -392,7 +540,7 @@ def lifter(cepstra, liftering=22):
         the lifted cepstra
     '''
     if liftering > 0:
-        _, ncoeff = numpy.shape(cepstra)
+        ncoeff = numpy.shape(cepstra)[-1]
         lift = 1+(liftering/2)*numpy.sin(numpy.pi
                                          *numpy.arange(ncoeff)/liftering)
         return lift*cepstra
@@ -410,7 +558,7 @@ def deriv(features):
     Returns:
         the firs order derivative
     '''
-    return convolve1d(features, [2, 1, 0, -1, -2], 0)
+    return convolve1d(features, [2, 1, 0, -1, -2], -2)
 
 def delta(features):
     '''
@@ -422,7 +570,7 @@ def delta(features):
     Returns:
         the features concatenated with the first order derivative
     '''
-    return numpy.concatenate((features, deriv(features)), 1)
+    return numpy.concatenate((features, deriv(features)), -1)
 
 def ddelta(features):
     '''
@@ -435,4 +583,4 @@ def ddelta(features):
         the features concatenated with the first and second order derivative
     '''
     deltafeat = deriv(features)
-    return numpy.concatenate((features, deltafeat, deriv(deltafeat)), 1)
+    return numpy.concatenate((features, deltafeat, deriv(deltafeat)), -1)
@@ -28,7 +28,7 @@ class Fbank(feature_computer.FeatureComputer):
         feat, energy = base.logfbank(sig, rate, self.conf)
 
         if self.conf['include_energy'] == 'True':
-            feat = np.append(feat, energy[:, np.newaxis], 1)
+            feat = np.concatenate((feat, energy[..., np.newaxis]), -1)
 
         if self.conf['dynamic'] == 'delta':
             feat = base.delta(feat)
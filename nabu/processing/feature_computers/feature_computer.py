@@ -2,6 +2,8 @@
 contains the FeatureComputer class'''
 
 from abc import ABCMeta, abstractmethod
+import numpy
+import sigproc
 
 class FeatureComputer(object):
     '''A featurecomputer is used to compute features'''
@@ -34,17 +36,65 @@ class FeatureComputer(object):
 
         return feat
 
+    def comp_feat_batch(self, sigs, rate):
+        '''
+        compute the features of multiple signals at once. The signals are
+        zero padded to the length of the longest signal and stacked, so the
+        features of all signals are computed in one go
+
+        Args:
+            sigs: the audio signals as a list of 1-D numpy arrays
+            rate: the sampling rate
+
+        Returns:
+            the features as a [num_signals x seq_length x feature_dim] numpy
+            array
+        '''
+
+        siglen = max(len(sig) for sig in sigs)
+
+        stacked = numpy.zeros([len(sigs), siglen],
+                              dtype=numpy.result_type(*sigs))
+        for i, sig in enumerate(sigs):
+            stacked[i, :len(sig)] = sig
+
+        return self.comp_feat(stacked, rate)
+
+    def num_frames(self, siglen, rate):
+        '''
+        compute the number of frames of the features of a signal without
+        computing the features
+
+        Args:
+            siglen: the length of the signal in samples
+            rate: the sampling rate
+
+        Returns:
+            the number of frames
+        '''
+
+        winlen = float(self.conf['winlen'])
+        winstep = float(self.conf['winstep'])
+
+        #the edges of the signal are snipped before it is framed
+        siglen = sigproc.snip_length(siglen, rate, winlen, winstep)
+
+        return sigproc.num_frames(siglen, winlen*rate, winstep*rate)
+
     @abstractmethod
     def comp_feat(self, sig, rate):
         '''
         compute the features
 
         Args:
-            sig: the audio signal as a 1-D numpy array
+            sig: the audio signal as a 1-D numpy array, or multiple signals of
+                the same length as a [num_signals x num_samples] numpy array
             rate: the sampling rate
 
         Returns:
-            the features as a [seq_length x feature_dim] numpy array
+            the features as a [seq_length x feature_dim] numpy array, or as a
+            [num_signals x seq_length x feature_dim] numpy array for multiple
+            signals
         '''
 
     @abstractmethod
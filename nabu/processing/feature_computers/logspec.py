@@ -29,7 +29,7 @@ class Logspec(feature_computer.FeatureComputer):
 
         if self.conf['include_energy'] == 'True':
             _, energy = base.fbank(sig, rate, self.conf)
-            feat = np.append(feat, energy[:, np.newaxis], 1)
+            feat = np.concatenate((feat, energy[..., np.newaxis]), -1)
 
         return feat
 
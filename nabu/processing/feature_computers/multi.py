@@ -0,0 +1,143 @@
+'''@file multi.py
+contains the multi feature computer'''
+
+import numpy as np
+import base
+import feature_computer
+from sigproc import snip
+
+class Multi(feature_computer.FeatureComputer):
+    '''the feature computer class to compute multiple spectrogram features of
+    the same signal (e.g. logspec for the inputs, magspec for the used bins and
+    spec for the reconstruction). The features share the framing parameters,
+    so the short time fourier transform is only computed once for the
+    magnitude features. The spec has no preemphasis, so it needs its own
+    transform unless the preemphasis coefficient is 0'''
+
+    def __init__(self, conf):
+        '''
+        Multi constructor
+
+        Args:
+            conf: the feature configuration, the features option contains the
+                space seperated features that are computed
+        '''
+
+        super(Multi, self).__init__(conf)
+
+        self.features = conf['features'].split(' ')
+
+        for feature in self.features:
+            if feature not in ['magspec', 'logspec', 'spec']:
+                raise Exception(
+                    'feature %s can not be computed by the multi feature '
+                    'computer' % feature)
+
+    def comp_feat(self, sig, rate):
+        '''
+        compute the features, the features are concatenated
+
+        Args:
+            sig: the audio signal as a 1-D numpy array
+            rate: the sampling rate
+
+        Returns:
+            the features as a [seq_length x feature_dim] numpy array
+        '''
+
+        return concatenate(self.comp_feats(sig, rate))
+
+    def comp_feats(self, sig, rate):
+        '''
+        compute all the features seperately
+
+        Args:
+            sig: the audio signal as a 1-D numpy array, or multiple signals of
+                the same length as a [num_signals x num_samples] numpy array
+            rate: the sampling rate
+
+        Returns:
+            a list with the features for every feature in the features option,
+            the spec is complex
+        '''
+
+        #snip the edges
+        sig = snip(sig, rate, float(self.conf['winlen']),
+                   float(self.conf['winstep']))
+
+        spec = None
+        if 'spec' in self.features:
+            spec = base.spec(sig, rate, self.conf)
+
+        magspec = None
+        if set(self.features) - set(['spec']):
+            if spec is not None and float(self.conf['preemph']) == 0:
+                #without preemphasis the spec is the same transform
+                magspec = np.absolute(spec)
+            else:
+                magspec = np.absolute(base.stft(sig, rate, self.conf))
+        energy = None
+
+        feats = []
+        for feature in self.features:
+            if feature == 'spec':
+                #the spec has no energy, like the spec feature computer
+                feats.append(spec)
+                continue
+            elif feature == 'logspec':
+                #mag2log floors the magnitude in place
+                feat = base.mag2log(magspec.copy())
+            else:
+                feat = magspec
+
+            if self.conf['include_energy'] == 'True':
+                if energy is None:
+                    _, energy = base.fbank(sig, rate, self.conf)
+                feat = np.concatenate((feat, energy[..., np.newaxis]), -1)
+
+            feats.append(feat)
+
+        return feats
+
+    def get_dims(self):
+        '''the dimension of every feature in the concatenated features'''
+
+        dims = []
+        for feature in self.features:
+            dim = int(self.conf['nfft'])/2+1
+            if feature == 'spec':
+                #the real and imaginary parts are concatenated
+                dim *= 2
+            elif self.conf['include_energy'] == 'True':
+                dim += 1
+            dims.append(dim)
+
+        return dims
+
+    def get_dim(self):
+        '''the feature dimemsion'''
+
+        return sum(self.get_dims())
+
+def concatenate(feats):
+    '''
+    concatenate the features of the multi feature computer, complex features
+    are split in their real and imaginary part so the concatenated features
+    are real and have the precision of the features
+
+    Args:
+        feats: a list of [seq_length x dim] numpy arrays, as returned by
+            comp_feats
+
+    Returns:
+        the features as a [seq_length x feature_dim] numpy array
+    '''
+
+    parts = []
+    for feat in feats:
+        if np.iscomplexobj(feat):
+            parts += [feat.real, feat.imag]
+        else:
+            parts.append(feat)
+
+    return np.concatenate(parts, -1)
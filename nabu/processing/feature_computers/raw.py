@@ -4,7 +4,7 @@ contains the complex spectrum computer'''
 import numpy as np
 import base
 import feature_computer
-from sigproc import snip
+from sigproc import snip, snip_length
 
 class Raw(feature_computer.FeatureComputer):
     '''the computer class to compute complex spectrum'''
@@ -29,6 +29,22 @@ class Raw(feature_computer.FeatureComputer):
 
         return feat
 
+    def num_frames(self, siglen, rate):
+        '''
+        compute the number of frames of the features of a signal without
+        computing the features
+
+        Args:
+            siglen: the length of the signal in samples
+            rate: the sampling rate
+
+        Returns:
+            the number of frames, every sample is a frame
+        '''
+
+        return snip_length(siglen, rate, float(self.conf['winlen']),
+                           float(self.conf['winstep']))
+
     def get_dim(self):
         '''the feature dimemsion'''
 
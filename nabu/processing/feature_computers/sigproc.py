@@ -32,44 +32,63 @@ Author: James Lyons 2012
 
 import math
 import numpy
+from numpy.lib.stride_tricks import as_strided
+try:
+    #the FFTs of scipy.fft keep single precision input in single precision
+    from scipy.fft import rfft as _rfft
+except ImportError:
+    from numpy.fft import rfft as _rfft
 import pdb
 
-def framesig(sig, frame_len, frame_step, winfunc=lambda x: numpy.ones((x, ))):
+#the windows that have been computed, per window function, frame length and
+#data type
+_windows = dict()
+#the window corrections for the overlap-add, per number of frames, frame
+#length, frame step and window function
+_window_corrections = dict()
+_MAX_WINDOWS = 64
+
+def framesig(sig, frame_len, frame_step, winfunc=lambda x: numpy.ones((x, )),
+             dtype=numpy.float64):
     '''
     Frame a signal into overlapping frames.
 
     Args:
-        sig: the audio signal to frame.
+        sig: the audio signal to frame. Multiple signals of the same length can
+            be framed at once by stacking them in the leading dimensions.
         frame_len: length of each frame measured in samples.
         frame_step: number of samples after the start of the previous frame that
             the next frame should begin.
         winfunc: the analysis window to apply to each frame. By default no
             window function is applied.
+        dtype: the data type of the frames
 
     Returns:
-        an array of frames. Size is NUMFRAMES by frame_len.
+        an array of frames. Size is NUMFRAMES by frame_len, preceded by the
+        leading dimensions of sig.
     '''
 
-    slen = len(sig)
+    sig = numpy.asarray(sig)
+    lead_shape = sig.shape[:-1]
+    slen = sig.shape[-1]
     frame_len = int(round(frame_len))
     frame_step = int(round(frame_step))
-    if slen <= frame_len:
-        numframes = 1
-    else:
-        numframes = 1 + int(math.ceil((1.0*slen - frame_len)/frame_step))
+    numframes = num_frames(slen, frame_len, frame_step)
 
     padlen = int((numframes-1)*frame_step + frame_len)
 
-    zeros = numpy.zeros((padlen - slen,))
-    padsignal = numpy.concatenate((sig, zeros))
+    padsignal = numpy.zeros(lead_shape + (padlen,), dtype=dtype)
+    padsignal[..., :slen] = sig
 
-    indices = (numpy.tile(numpy.arange(0, frame_len), (numframes, 1))
-               + numpy.tile(numpy.arange(0, numframes*frame_step, frame_step),
-                            (frame_len, 1)).T)
-    indices = numpy.array(indices, dtype=numpy.int32)
-    frames = padsignal[indices]
-    win = numpy.tile(winfunc(frame_len), (numframes, 1))
-    return frames*win
+    #the frames are a read-only view on the padded signal, so the only copy is
+    #made when the window is applied
+    itemsize = padsignal.itemsize
+    frames = as_strided(padsignal, shape=lead_shape + (numframes, frame_len),
+                        strides=padsignal.strides[:-1] + (frame_step*itemsize,
+                                                          itemsize),
+                        writeable=False)
+
+    return frames*get_window(winfunc, frame_len, dtype)
 
 def deframesig(frames, siglen, frame_len, frame_step,
                winfunc=lambda x: numpy.ones((x, ))):
@@ -77,7 +96,9 @@ def deframesig(frames, siglen, frame_len, frame_step,
     Does overlap-add procedure to undo the action of framesig.
 
     Args:
-        frames the: array of frames.
+        frames the: array of frames, the last two dimensions are the frames
+            and the samples in a frame. Multiple signals can be reconstructed
+            at once by stacking their frames in the leading dimensions.
         siglen the: length of the desired signal, use 0 if unknown. Output will
             be truncated to siglen samples.
         frame_len: length of each frame measured in samples.
@@ -87,38 +108,71 @@ def deframesig(frames, siglen, frame_len, frame_step,
             window is applied.
 
     Returns:
-        a 1-D signal.
+        the signal, a 1-D signal for a single array of frames or an array of
+        signals for stacked frames.
     '''
 
     frame_len = int(round(frame_len))
     frame_step = int(round(frame_step))
-    numframes = numpy.shape(frames)[0]
-    assert numpy.shape(frames)[1] == frame_len, '''"frames" matrix is wrong
-        size, 2nd dim is not equal to frame_len'''
-
-    indices = (numpy.tile(numpy.arange(0, frame_len), (numframes, 1))
-               + numpy.tile(numpy.arange(0, numframes*frame_step, frame_step),
-                            (frame_len, 1)).T)
+    numframes = numpy.shape(frames)[-2]
+    assert numpy.shape(frames)[-1] == frame_len, '''"frames" matrix is wrong
+        size, last dim is not equal to frame_len'''
 
-    indices = numpy.array(indices, dtype=numpy.int32)
     padlen = (numframes-1)*frame_step + frame_len
 
     if siglen <= 0:
         siglen = padlen
 
-    rec_signal = numpy.zeros((padlen, ))
-    window_correction = numpy.zeros((padlen, ))
-    win = winfunc(frame_len)
+    rec_signal = overlap_add(frames, frame_step)
+    rec_signal /= get_window_correction(numframes, frame_len, frame_step,
+                                        winfunc)
 
-    for i in range(0, numframes):
-        #add a little bit so it is never zero
-        window_correction[indices[i, :]] = (window_correction[indices[i, :]]
-                                            + win + 1e-15)
+    return rec_signal[..., 0:siglen]
+
+def overlap_add(frames, frame_step):
+    '''
+    add overlapping frames. The frames are split in blocks of frame_step
+    samples, so the frames are added block by block instead of frame by
+    frame.
+
+    Args:
+        frames: the array of frames, the last two dimensions are the frames and
+            the samples in a frame.
+        frame_step: number of samples after the start of the previous frame that
+            the next frame should begin.
+
+    Returns:
+        the summed signal, the frame dimensions are replaced by a single
+        dimension of (numframes-1)*frame_step + frame_len samples
+    '''
 
-        rec_signal[indices[i, :]] = rec_signal[indices[i, :]] + frames[i, :]
+    frames = numpy.asarray(frames)
+    lead_shape = frames.shape[:-2]
+    numframes, frame_len = frames.shape[-2:]
+    padlen = (numframes-1)*frame_step + frame_len
 
-    rec_signal = rec_signal/window_correction
-    return rec_signal[0:siglen]
+    #the number of blocks in a frame, the frames are padded with zeros to
+    #contain an integer number of blocks
+    numblocks = -(-frame_len//frame_step)
+    if numblocks*frame_step != frame_len:
+        pad = [(0, 0)]*(len(lead_shape)+1) + [(0, numblocks*frame_step-frame_len)]
+        frames = numpy.pad(frames, pad, 'constant')
+    blocks = frames.reshape(lead_shape + (numframes, numblocks, frame_step))
+
+    if numpy.issubdtype(frames.dtype, numpy.floating):
+        dtype = frames.dtype
+    else:
+        dtype = numpy.float64
+    signal = numpy.zeros(lead_shape + (numframes+numblocks-1, frame_step),
+                         dtype=dtype)
+
+    #block b of frame i is added to block i+b of the signal
+    for block in range(numblocks):
+        signal[..., block:block+numframes, :] += blocks[..., block, :]
+
+    signal = signal.reshape(lead_shape + ((numframes+numblocks-1)*frame_step, ))
+
+    return signal[..., 0:padlen]
 
 def spec(frames, nfft):
     '''
@@ -136,8 +190,7 @@ def spec(frames, nfft):
         complex spectrum of the corresponding frame.
     '''
 
-    complex_spec = numpy.fft.rfft(frames, nfft)
-    return complex_spec
+    return rfft(frames, nfft)
 
 def spec2frames(spec):
     '''
@@ -170,7 +223,7 @@ def magspec(frames, nfft):
         magnitude spectrum of the corresponding frame.
     '''
 
-    complex_spec = numpy.fft.rfft(frames, nfft)
+    complex_spec = rfft(frames, nfft)
     return numpy.absolute(complex_spec)
 
 def logmagspec(frames, nfft, norm=False):
@@ -240,25 +293,145 @@ def logpowspec(frames, nfft, norm=1):
     else:
         return lps
 
-def preemphasis(signal, coeff=0.95):
+def preemphasis(signal, coeff=0.95, dtype=numpy.float64):
     '''
     perform preemphasis on the input signal.
 
     Args:
-        signal: The signal to filter.
+        signal: The signal to filter, the last dimension is time.
         coeff: The preemphasis coefficient. 0 is no filter, default is 0.95.
+        dtype: the data type of the filtered signal
 
     Returns:
         the filtered signal.
     '''
-    return numpy.append(signal[0], signal[1:]-coeff*signal[:-1])
+    signal = numpy.asarray(signal, dtype=dtype)
+    return numpy.concatenate(
+        (signal[..., :1], signal[..., 1:]-coeff*signal[..., :-1]), -1)
+
+def rfft(frames, nfft):
+    '''
+    compute the FFT of real frames. The precision of the frames is kept, so
+    the FFT of single precision frames is computed in single precision if
+    scipy.fft is available. Otherwise the FFT is computed in double precision
+    and the result is converted back.
+
+    Args:
+        frames: the array of frames. Each row is a frame.
+        nfft: the FFT length to use. If NFFT > frame_len, the frames are
+            zero-padded.
+
+    Returns:
+        the complex spectrum of every frame, with nfft/2+1 bins
+    '''
+
+    complex_spec = _rfft(frames, nfft)
+    dtype = numpy.result_type(frames, numpy.complex64)
+
+    return complex_spec.astype(dtype, copy=False)
+
+def get_window(winfunc, frame_len, dtype=numpy.float64):
+    '''
+    get a window, the window is only computed the first time it is requested.
+
+    Args:
+        winfunc: the window function
+        frame_len: the length of the window in samples
+        dtype: the data type of the window
+
+    Returns:
+        the window as a read-only numpy array
+    '''
+
+    key = (winfunc, frame_len, numpy.dtype(dtype))
+
+    if key not in _windows:
+        if len(_windows) >= _MAX_WINDOWS:
+            _windows.clear()
+        win = numpy.asarray(winfunc(frame_len), dtype=dtype)
+        win.flags.writeable = False
+        _windows[key] = win
+
+    return _windows[key]
+
+def get_window_correction(numframes, frame_len, frame_step, winfunc):
+    '''
+    get the sum of the overlapping windows that is used to normalise the
+    signal in deframesig. The correction is only computed the first time it is
+    requested.
+
+    Args:
+        numframes: the number of frames
+        frame_len: length of each frame measured in samples.
+        frame_step: number of samples after the start of the previous frame that
+            the next frame should begin.
+        winfunc: the window function
+
+    Returns:
+        the window correction as a read-only numpy array
+    '''
+
+    key = (numframes, frame_len, frame_step, winfunc)
+
+    if key not in _window_corrections:
+        if len(_window_corrections) >= _MAX_WINDOWS:
+            _window_corrections.clear()
+
+        #add a little bit so it is never zero
+        win = get_window(winfunc, frame_len, numpy.float64) + 1e-15
+        correction = overlap_add(
+            numpy.broadcast_to(win, (numframes, frame_len)), frame_step)
+        correction.flags.writeable = False
+        _window_corrections[key] = correction
+
+    return _window_corrections[key]
+
+def num_frames(slen, frame_len, frame_step):
+    '''
+    compute the number of frames that framesig creates for a signal
+
+    Args:
+        slen: the length of the signal in samples
+        frame_len: length of each frame measured in samples.
+        frame_step: number of samples after the start of the previous frame that
+            the next frame should begin.
+
+    Returns:
+        the number of frames
+    '''
+
+    frame_len = int(round(frame_len))
+    frame_step = int(round(frame_step))
+    if slen <= frame_len:
+        return 1
+    else:
+        return 1 + int(math.ceil((1.0*slen - frame_len)/frame_step))
+
+def snip_length(slen, rate, winlen, winstep):
+    '''
+    compute the length of a signal after snipping its edges
+
+    Args:
+        slen: the length of the signal in samples
+        rate: sampling rate
+        winlen: length of the sliding window [s]
+        winstep: stepsize of the sliding window [s]
+
+    Returns:
+        the length of the snipped signal in samples
+    '''
+    # calculate the number of frames in the utterance as number of samples in
+    #the utterance / number of samples in the frame
+    numframes = int((slen-winlen*rate)/(winstep*rate))
+
+    return min(slen, int(numframes*winstep*rate + winlen*rate))
 
 def snip(sig, rate, winlen, winstep):
     '''
     snip the edges of the utterance to fit the sliding window
 
     Args:
-        sig: audio signal
+        sig: audio signal, the last dimension is time
         rate: sampling rate
         winlen: length of the sliding window [s]
         winstep: stepsize of the sliding window [s]
@@ -266,10 +439,7 @@ def snip(sig, rate, winlen, winstep):
     Returns:
         the snipped signal
     '''
-    # calculate the number of frames in the utterance as number of samples in
-    #the utterance / number of samples in the frame
-    num_frames = int((len(sig)-winlen*rate)/(winstep*rate))
     # cut of the edges to fit the number of frames
-    sig = sig[0:int(num_frames*winstep*rate + winlen*rate)]
+    sig = sig[..., 0:snip_length(numpy.shape(sig)[-1], rate, winlen, winstep)]
 
     return sig
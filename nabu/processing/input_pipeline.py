@@ -2,13 +2,26 @@
 contains the methotology for creating the input pipeline'''
 
 import os
+import time
+import weakref
+import numpy as np
 import tensorflow as tf
 from tfreaders import tfreader_factory
-import collections
+import pointer_index
 import pdb
 
+#the statistics of the input pipelines per graph, they are not kept in a
+#collection of the graph because they can not be exported with it
+_stats = weakref.WeakKeyDictionary()
+
+#the joined pointers per combination of store directories, so they are only
+#joined once per process
+_joined = dict()
+
 def get_filenames(dataconfs):
-    '''create a list of filenames to put into the queue
+    '''create a list of filenames to put into the queue. The pointers of all
+    data elements are joined with the sorted pointer indexes of the store
+    directories, which are memory mapped.
 
     Args:
         dataconfs: the database configurations as a list of lists
@@ -18,45 +31,51 @@ def get_filenames(dataconfs):
         - a list containing the names
     '''
 
+    key = tuple(tuple(dataconf['store_dir'] for dataconf in dataconfset)
+                for dataconfset in dataconfs)
+    if key in _joined:
+        return _joined[key]
+
     #create the list of strings that will be put into the shared data queue
-    #one queue element is a space seperated list of all data elements for
+    #one queue element is a tab seperated list of all data elements for
     #one example
-
-    #read all the names and files
-    files = []
-    for dataconfset in dataconfs:
-        #use an orderdict so the order in os.path.join(dataconf['dir'], 'pointers.scp') is kept
-        setfiles = collections.OrderedDict()
-        for i, dataconf in enumerate(dataconfset):
-            with open(os.path.join(dataconf['store_dir'], 'pointers.scp')) as fid:
-                for line in fid:
-                    (n, f) = line.strip().split('\t')
-                    setfiles['%s-%d' % (n, i)] = f
-        files.append(setfiles)
-
-    #loop over the first names and look for them in the other names. If not
-    #all sets contain the name, ignore it
     data_queue_elements = []
     names = []
-    for name in files[0]:
-        allfound = True
-        for setfile in files:
-            if name not in setfile:
-                print('%s was not found in all sets of data, ignoring this'
-                      ' example' % name)
-                allfound = False
+
+    #loop over the names of the first set in the order of the pointers.scp
+    #files and look for them in the other sets. If not all sets contain the
+    #name, ignore it
+    for i, dataconf in enumerate(dataconfs[0]):
+        sorted_names, sorted_pointers, lines = pointer_index.load(
+            dataconf['store_dir'])
+        order = np.argsort(lines)
+        set_names = np.asarray(sorted_names)[order]
+        elements = np.asarray(sorted_pointers)[order]
+
+        found = np.ones(len(set_names), dtype=bool)
+        for dataconfset in dataconfs[1:]:
+            if i >= len(dataconfset):
+                found[:] = False
                 break
-        if allfound:
-            data_queue_element = files[0][name]
-            for setfile in files[1:]:
-                data_queue_element += '\t' + setfile[name]
-            data_queue_elements.append(data_queue_element)
-            names.append(name)
+            set_found, pointers = pointer_index.lookup(
+                pointer_index.load(dataconfset[i]['store_dir']), set_names)
+            found &= set_found
+            elements = np.char.add(np.char.add(elements, b'\t'), pointers)
+
+        for name in set_names[~found]:
+            print('%s-%d was not found in all sets of data, ignoring this'
+                  ' example' % (name, i))
+
+        data_queue_elements += elements[found].tolist()
+        names += np.char.add(set_names[found], b'-%d' % i).tolist()
+
+    _joined[key] = (data_queue_elements, names)
 
     return data_queue_elements, names
 
 def input_pipeline(data_queue, batch_size, numbuckets, dataconfs,
-                   allow_smaller_final_batch=False, name=None):
+                   allow_smaller_final_batch=False, random_crop=False,
+                   name=None):
     '''create the input pipeline
 
     Args:
@@ -64,9 +83,12 @@ def input_pipeline(data_queue, batch_size, numbuckets, dataconfs,
         batch_size: the desired batch size
         numbuckets: the number of data buckets
         dataconfs: the databes configuration sections that should be read
-            as a list of lists
+            as a list of lists. If the sections contain a crop_length, the
+            data is cropped to segments of this length
         allow_smaller_final_batch: if set to True a smaller final batch is
             allowed
+        random_crop: if True the segments are cropped at a random position,
+            otherwise they are cropped at the start of the utterance
         name: name of the pipeline
 
     Returns:
@@ -84,11 +106,16 @@ def input_pipeline(data_queue, batch_size, numbuckets, dataconfs,
             filenames.set_shape([1, len(dataconfs)])
             filenames = tf.unstack(tf.reshape(filenames, [-1]))
 
+        readers = _create_readers(dataconfs)
+
         data = []
+        time_dimensions = []
+        queues = [('data', data_queue)]
+        reader_stats = []
 
         with tf.variable_scope('read_data'):
             #create a seperate queue for each data element
-            for i, dataconfset in enumerate(dataconfs):
+            for i, reader in enumerate(readers):
                 with tf.variable_scope('reader'):
 
                     queue = tf.FIFOQueue(
@@ -97,49 +124,67 @@ def input_pipeline(data_queue, batch_size, numbuckets, dataconfs,
                         shapes=[[]],
                         name='split_queue'
                     )
+                    queues.append(('split%d' % i, queue))
 
                     enqueue_op = queue.enqueue(filenames[i])
 
-                    #create a reader to read from the queue
-                    writer_styles = [dataconf['writer_style'] for dataconf in dataconfset]
-                    if len(set(writer_styles)) > 1:
-                        raise Exception(
-                            'all data types in a set must be the same')
-                    dirs = [dataconf['store_dir'] for dataconf in dataconfset]
-                    reader = tfreader_factory.factory(writer_styles[0])(dirs)
-
-                    #if i == 0:
-                    #sequence_length_histogram = \
-                    #reader.metadata['sequence_length_histogram']
-
                     #read the data from the data element queue and make sure
                     #they happen in the correct order
                     with tf.control_dependencies([enqueue_op]):
+                        start = tf.timestamp()
+                    with tf.control_dependencies([start]):
                         read_data = reader(queue)
-                        data += read_data
+                    read_data, stats = _count_reads(read_data, start,
+                                                    'reader%d' % i)
+                    data += read_data
+                    reader_stats.append(stats)
+                    time_dimensions.append(reader.time_dimension)
 
             data = tf.tuple(data)
 
-        #create batches of the data
-        if False and numbuckets > 1:
-            #bucketing is not allowed due to possibility of multi input
-            boundaries = bucket_boundaries(sequence_length_histogram,
-                                           numbuckets)
-            _, batches = tf.contrib.training.bucket_by_sequence_length(
-                input_length=data[1],
-                tensors=data,
-                batch_size=int(batch_size),
-                bucket_boundaries=boundaries,
-                allow_smaller_final_batch=allow_smaller_final_batch,
-                dynamic_pad=True
-            )
+        #cut the data into segments
+        if 'crop_length' in dataconfs[0][0]:
+            data = crop_segments(data, time_dimensions,
+                                 int(dataconfs[0][0]['crop_length']),
+                                 random_crop)
+
+        #create batches of the data, the examples are put in buckets based on
+        #the sequence length of the first data element
+        num_runners = len(tf.get_collection(tf.GraphKeys.QUEUE_RUNNERS))
+        boundaries = _get_boundaries(readers, dataconfs, numbuckets)
+
+        #the batches are only dequeued after the time at which the step
+        #starts waiting for them is taken
+        start = tf.timestamp()
+        with tf.control_dependencies([start]):
+            if boundaries:
+                _, batches = tf.contrib.training.bucket_by_sequence_length(
+                    input_length=data[1],
+                    tensors=data,
+                    batch_size=int(batch_size),
+                    bucket_boundaries=boundaries,
+                    allow_smaller_final_batch=allow_smaller_final_batch,
+                    dynamic_pad=True
+                )
+            else:
+                batches = tf.train.batch(
+                    tensors=data,
+                    batch_size=int(batch_size),
+                    capacity=int(batch_size),
+                    allow_smaller_final_batch=allow_smaller_final_batch,
+                    dynamic_pad=True)
+
+        #the queues that were created for batching
+        batch_queues = [
+            runner.queue for runner in
+            tf.get_collection(tf.GraphKeys.QUEUE_RUNNERS)[num_runners:]]
+        if len(batch_queues) == 1:
+            queues.append(('batch', batch_queues[0]))
         else:
-            batches = tf.train.batch(
-                tensors=data,
-                batch_size=int(batch_size),
-                capacity=int(batch_size),
-                allow_smaller_final_batch=allow_smaller_final_batch,
-                dynamic_pad=True)
+            queues += [('batch%d' % i, queue)
+                       for i, queue in enumerate(batch_queues)]
+
+        batches = _add_stats(batches, start, queues, reader_stats)
 
         #seperate the data and the sequence lengths
         data = batches[0::2]
@@ -147,30 +192,557 @@ def input_pipeline(data_queue, batch_size, numbuckets, dataconfs,
 
         return data, seq_length
 
-def bucket_boundaries(histogram, numbuckets):
-    '''detemine the bucket boundaries to uniformally devide the number of
-    elements in the buckets
+def dataset_pipeline(data_queue_elements, batch_size, dataconfs,
+                     numbuckets=1, allow_smaller_final_batch=False,
+                     random_crop=False, num_parallel_calls=4, prefetch=2,
+                     cache_megabytes=0, cache_dir=None, name=None):
+    '''create the input pipeline with tf.data instead of queue runners. The
+    examples are read and parsed in parallel and the batches are prefetched.
+    The data is read in the same order and batched in the same way as by
+    input_pipeline. The decoded examples can be cached after the first epoch,
+    if they do not all fit in the cache only the first examples are cached
+    and the remaining examples are read every epoch.
+
+    Args:
+        data_queue_elements: the tab seperated pointers of the examples, as
+            returned by get_filenames
+        batch_size: the desired batch size
+        dataconfs: the databes configuration sections that should be read
+            as a list of lists. If the sections contain a crop_length, the
+            data is cropped to segments of this length
+        numbuckets: the number of data buckets
+        allow_smaller_final_batch: if set to True a smaller final batch is
+            allowed
+        random_crop: if True the segments are cropped at a random position,
+            otherwise they are cropped at the start of the utterance
+        num_parallel_calls: the number of examples that are read and parsed
+            in parallel
+        prefetch: the number of batches that are prepared in advance
+        cache_megabytes: the maximal estimated size of the cached examples in
+            megabytes, if 0 the examples are not cached
+        cache_dir: the directory where the cache files are written, if None
+            the examples are cached in memory
+        name: name of the pipeline
+
+    Returns:
+        - the data elements as a list of [batch_size x ...] tensor
+        - the sequence lengths as a list of [batch_size] tensor'''
+
+    with tf.variable_scope(name or 'input_pipeline'):
+
+        readers = _create_readers(dataconfs)
+        time_dimensions = [reader.time_dimension for reader in readers]
+
+        def parse_example(*records):
+            '''parse all the data of an example'''
+
+            data = []
+            for reader, record in zip(readers, records):
+                data += reader.parse(record)
 
+            return tuple(data)
 
-    this is a greedy algorithm and does not guarantee an optimal solution'''
+        def read_examples(elements):
+            '''read the examples of a list of elements, every reader reads
+            num_parallel_calls records in parallel and the examples stay in
+            the order of the elements'''
 
-    boundaries = [0]*(numbuckets)
-    for i in range(numbuckets-1):
-        numelements = int(histogram[boundaries[i]:].sum()/(numbuckets-i))
-        if numelements == 0:
-            print '%d buckets could not be reached, using %d buckets' % (
-                numbuckets, i)
+            pointers = [element.split('\t') for element in elements]
+            records = tf.data.Dataset.zip(tuple(
+                [reader.records(
+                    tf.data.Dataset.from_tensor_slices(
+                        [pointer[i] for pointer in pointers]),
+                    int(num_parallel_calls))
+                 for i, reader in enumerate(readers)]))
 
-        #add elements to the bucket to get as close as possible to the desired
-        #number of elements
-        j = boundaries[i] + 1
+            return records.map(parse_example,
+                               num_parallel_calls=int(num_parallel_calls))
 
-        while (j+1 < len(histogram) and
-               abs(histogram[boundaries[i]:j].sum() - numelements) >=
-               abs(histogram[boundaries[i]:j+1].sum() - numelements)):
+        def crop_example(*data):
+            '''cut the data of an example into a segment'''
+
+            return tuple(crop_segments(data, time_dimensions,
+                                       int(dataconfs[0][0]['crop_length']),
+                                       random_crop))
+
+        numcached = _num_cached(readers, data_queue_elements, cache_megabytes)
+
+        if numcached:
+            #the cache is filled in the first epoch, the segments are cut
+            #after the cache so they are cut at a new position every epoch
+            dataset = read_examples(data_queue_elements[:numcached])
+            dataset = dataset.cache(_cache_file(cache_dir))
+
+            if numcached < len(data_queue_elements):
+                print ('%d of the %d examples fit in the cache of %s megabytes'
+                       % (numcached, len(data_queue_elements),
+                          cache_megabytes))
+                uncached = read_examples(data_queue_elements[numcached:])
+                dataset = dataset.concatenate(uncached)
+
+            dataset = dataset.repeat()
+        else:
+            dataset = read_examples(data_queue_elements).repeat()
+
+        if 'crop_length' in dataconfs[0][0]:
+            dataset = dataset.map(crop_example,
+                                  num_parallel_calls=int(num_parallel_calls))
+
+        #create batches of the data, the examples are put in buckets based on
+        #the sequence length of the first data element
+        boundaries = _get_boundaries(readers, dataconfs, numbuckets)
+        if boundaries:
+            dataset = dataset.apply(
+                tf.data.experimental.bucket_by_sequence_length(
+                    element_length_func=lambda *example: example[1],
+                    bucket_boundaries=boundaries,
+                    bucket_batch_sizes=[int(batch_size)]*(len(boundaries)+1),
+                    padded_shapes=dataset.output_shapes))
+        else:
+            dataset = dataset.padded_batch(int(batch_size),
+                                           padded_shapes=dataset.output_shapes)
+        if not allow_smaller_final_batch:
+            dataset = dataset.filter(
+                lambda *batch: tf.equal(tf.shape(batch[1])[0],
+                                             int(batch_size)))
+        dataset = dataset.prefetch(int(prefetch))
+
+        iterator = dataset.make_one_shot_iterator()
+
+        #the batches are only requested after the time at which the step
+        #starts waiting for them is taken
+        start = tf.timestamp()
+        with tf.control_dependencies([start]):
+            batches = list(iterator.get_next())
+
+        if not allow_smaller_final_batch:
+            #the batch size is known, like in tf.train.batch
+            for batch in batches:
+                batch.set_shape(
+                    [int(batch_size)] + batch.get_shape().as_list()[1:])
+
+        #the buffers of the dataset can not be inspected, only the time
+        #waiting for the batches is measured
+        batches = _add_stats(batches, start, [], [])
+
+        #seperate the data and the sequence lengths
+        data = batches[0::2]
+        seq_length = batches[1::2]
+
+        return data, seq_length
+
+def _create_readers(dataconfs):
+    '''create a reader for every data element of the examples
+
+    Args:
+        dataconfs: the databes configuration sections that should be read
+            as a list of lists
+
+    Returns:
+        a list of readers'''
+
+    readers = []
+    for dataconfset in dataconfs:
+        writer_styles = [dataconf['writer_style'] for dataconf in dataconfset]
+        if len(set(writer_styles)) > 1:
+            raise Exception(
+                'all data types in a set must be the same')
+        dirs = [dataconf['store_dir'] for dataconf in dataconfset]
+        readers.append(tfreader_factory.factory(writer_styles[0])(dirs))
+
+    return readers
+
+def _stats_variable(name, dtype):
+    '''create a local variable that accumulates a statistic of an input
+    pipeline. The variable is always placed on the local device, so the
+    statistics of the workers in distributed training are not combined
+
+    Args:
+        name: the name of the variable
+        dtype: the type of the variable
+
+    Returns:
+        the variable, initialized to zero'''
+
+    with tf.device(None):
+        return tf.Variable(tf.zeros([], dtype), trainable=False, name=name,
+                           collections=[tf.GraphKeys.LOCAL_VARIABLES])
+
+def _count_reads(read_data, start, name):
+    '''count the examples that a reader has read and the time it spent
+    reading them
+
+    Args:
+        read_data: the tensors read by the reader
+        start: the time at which the reader started reading
+        name: the name of the reader in the statistics
+
+    Returns:
+        - the read data, which is only available after the statistics are
+            updated
+        - the name of the reader, the number of read examples and the time
+            spent reading as a tuple'''
+
+    examples = _stats_variable('examples', tf.int64)
+    read_time = _stats_variable('read_time', tf.float64)
+
+    with tf.control_dependencies(read_data):
+        update = tf.group(examples.assign_add(1),
+                          read_time.assign_add(tf.timestamp() - start))
+
+    with tf.control_dependencies([update]):
+        read_data = [tf.identity(tensor) for tensor in read_data]
+
+    return read_data, (name, examples, read_time)
+
+def _add_stats(batches, start, queues, reader_stats):
+    '''measure the time that the steps that use the batches wait for them and
+    register the statistics of the pipeline for the graph. The sizes of
+    the queues are also added as summaries
+
+    Args:
+        batches: the batch tensors of the pipeline
+        start: the time at which the step starts waiting for the batches, the
+            batches should be created under a control dependency on it
+        queues: the queues of the pipeline as a list of (name, queue) tuples
+        reader_stats: the statistics of the readers as returned by
+            _count_reads
+
+    Returns:
+        the batches, which are only available after the waiting time is
+        measured'''
+
+    steps = _stats_variable('steps', tf.int64)
+    wait_time = _stats_variable('wait_time', tf.float64)
+
+    with tf.control_dependencies(batches):
+        update = tf.group(steps.assign_add(1),
+                          wait_time.assign_add(tf.timestamp() - start))
+
+    with tf.control_dependencies([update]):
+        batches = [tf.identity(batch) for batch in batches]
+
+    queue_sizes = []
+    for name, queue in queues:
+        size = queue.size()
+        tf.summary.scalar('%s_queue_size' % name, size)
+        queue_sizes.append((name, size))
+
+    _stats.setdefault(tf.get_default_graph(), []).append({
+        'name': tf.get_default_graph().get_name_scope(),
+        'steps': steps,
+        'wait_time': wait_time,
+        'queue_sizes': queue_sizes,
+        'readers': reader_stats})
+
+    return batches
+
+class PipelineMonitor(object):
+    '''reports the statistics of the input pipelines in the default graph:
+    the time the steps wait for the batches, the sizes of the queues and the
+    examples per second and busy time of every reader. The rates are computed
+    over the interval since the previous report'''
+
+    def __init__(self, logdir=None):
+        '''PipelineMonitor constructor, should be created after the input
+        pipelines
+
+        Args:
+            logdir: the directory where the statistics are written as
+                summaries, if None no summaries are written
+        '''
+
+        self.pipelines = list(_stats.get(tf.get_default_graph(), []))
+        self.logdir = logdir
+
+        #the time and the statistics at the previous report
+        self.previous_time = time.time()
+        self.previous = [None]*len(self.pipelines)
+
+    def __call__(self, sess, step):
+        '''report the statistics of the pipelines that were used since the
+        previous report
+
+        Args:
+            sess: the session
+            step: the global step, used for the summaries
+
+        Returns:
+            the report with a line per pipeline
+        '''
+
+        fetches = [
+            {'steps': pipeline['steps'],
+             'wait_time': pipeline['wait_time'],
+             'queue_sizes': [size for _, size in pipeline['queue_sizes']],
+             'examples': [examples for _, examples, _ in pipeline['readers']],
+             'read_time': [read_time for _, _, read_time in pipeline['readers']]}
+            for pipeline in self.pipelines]
+        values = sess.run(fetches)
+
+        now = time.time()
+        interval = max(now - self.previous_time, 1e-9)
+        self.previous_time = now
+
+        lines = []
+        summary = tf.Summary()
+        for i, pipeline in enumerate(self.pipelines):
+            current = values[i]
+            previous = self.previous[i]
+            self.previous[i] = current
+            if previous is None:
+                previous = {
+                    'steps': 0, 'wait_time': 0,
+                    'examples': [0]*len(current['examples']),
+                    'read_time': [0]*len(current['read_time'])}
+
+            steps = current['steps'] - previous['steps']
+            if not steps:
+                #the pipeline was not used since the previous report
+                continue
+
+            wait_time = current['wait_time'] - previous['wait_time']
+            line = ('%s: waited %.3f sec/batch for data (%.0f%% of the time)'
+                    % (pipeline['name'], wait_time/steps,
+                       100*wait_time/interval))
+            summary.value.add(tag='%s/wait_time_per_batch' % pipeline['name'],
+                              simple_value=wait_time/steps)
+
+            if pipeline['queue_sizes']:
+                line += ', queue sizes: ' + ', '.join(
+                    '%s %d' % (name, size) for (name, _), size in
+                    zip(pipeline['queue_sizes'], current['queue_sizes']))
+
+            for j, (name, _, _) in enumerate(pipeline['readers']):
+                examples = current['examples'][j] - previous['examples'][j]
+                read_time = current['read_time'][j] - previous['read_time'][j]
+                line += (', %s: %.1f examples/sec (%.0f%% busy)'
+                         % (name, examples/interval, 100*read_time/interval))
+                summary.value.add(
+                    tag='%s/%s_examples_per_sec' % (pipeline['name'], name),
+                    simple_value=examples/interval)
+                summary.value.add(
+                    tag='%s/%s_busy' % (pipeline['name'], name),
+                    simple_value=read_time/interval)
+
+            lines.append(line)
+
+        if self.logdir is not None and summary.value:
+            tf.summary.FileWriterCache.get(self.logdir).add_summary(summary,
+                                                                    step)
+
+        return '\n'.join(lines)
+
+def _num_cached(readers, data_queue_elements, cache_megabytes):
+    '''compute the number of examples that fit in the example cache, the
+    examples are cached in the order they are read
+
+    Args:
+        readers: the readers of the data elements
+        data_queue_elements: the tab seperated pointers of the examples
+        cache_megabytes: the maximal size of the cached examples in megabytes
+
+    Returns:
+        the number of examples at the start of data_queue_elements that are
+        cached'''
+
+    if not float(cache_megabytes):
+        return 0
+
+    budget = float(cache_megabytes)*2**20
+    size = 0
+
+    for numcached, element in enumerate(data_queue_elements):
+        pointers = element.split(b'\t')
+        size += sum(reader.example_size(pointer)
+                    for reader, pointer in zip(readers, pointers))
+        if size > budget:
+            return numcached
+
+    return len(data_queue_elements)
+
+def _cache_file(cache_dir):
+    '''get the file of the example cache of the current pipeline. The cache
+    files of an earlier run are removed, otherwise tf.data would read them
+    instead of the current data
+
+    Args:
+        cache_dir: the directory of the cache files, if None the examples are
+            cached in memory
+
+    Returns:
+        the cache file, an empty string to cache in memory'''
+
+    if cache_dir is None:
+        return ''
+
+    if not tf.gfile.IsDirectory(cache_dir):
+        tf.gfile.MakeDirs(cache_dir)
+
+    #the name scope is unique for every pipeline in the graph
+    cache_file = os.path.join(
+        cache_dir, tf.get_default_graph().get_name_scope().replace('/', '_'))
+    for filename in tf.gfile.Glob(cache_file + '*'):
+        tf.gfile.Remove(filename)
+
+    return cache_file
+
+def _get_boundaries(readers, dataconfs, numbuckets):
+    '''get the bucket boundaries for the sequence length of the first data
+    element. The data is not bucketed if the first reader has no sequence
+    length histogram or if the data is cropped to segments of the same length
+
+    Args:
+        readers: the readers of the data elements
+        dataconfs: the databes configuration sections that are read
+        numbuckets: the number of data buckets
+
+    Returns:
+        the bucket boundaries, an empty list if the data is not bucketed'''
+
+    if (numbuckets < 2 or 'crop_length' in dataconfs[0][0] or
+            'sequence_length_histogram' not in readers[0].metadata):
+        return []
+
+    histogram = readers[0].metadata['sequence_length_histogram']
+    boundaries = bucket_boundaries(histogram, numbuckets)
+
+    print ('bucketing the data in %d buckets, the padding ratio is %.3f '
+           'without and %.3f with bucketing') % (
+               len(boundaries) + 1, padding_ratio(histogram, []),
+               padding_ratio(histogram, boundaries))
+
+    return boundaries
+
+def crop_segments(data, time_dimensions, crop_length, random_crop):
+    '''cut a segment out of all the data of an example, all the data is cut at
+    the same position. Data that is shorter than the segment is padded with
+    zeros, like in the segmentation of the data preparation.
+
+    Args:
+        data: the read data as a list of alternating data and sequence length
+            tensors
+        time_dimensions: for every data tensor, whether its first dimension is
+            time, data without time dimension is not cropped
+        crop_length: the length of the segment
+        random_crop: if True the segment is cut at a random position,
+            otherwise it is cut at the start
+
+    Returns:
+        the cropped data in the same format as data'''
+
+    with tf.name_scope('crop_segments'):
+
+        cropped = list(data)
+        aligned = [i for i, time_dim in enumerate(time_dimensions) if time_dim]
+        if not aligned:
+            return cropped
+
+        #all data with a time dimension has the same length
+        length = data[2*aligned[0] + 1]
+
+        if random_crop:
+            start = tf.random_uniform(
+                [], maxval=tf.maximum(length - crop_length, 0) + 1,
+                dtype=tf.int32)
+        else:
+            start = 0
+
+        for i in aligned:
+            tensor = data[2*i]
+            shape = tensor.get_shape().as_list()
+
+            #pad the data if it is shorter than the segment
+            padding = [[0, tf.maximum(crop_length - tf.shape(tensor)[0], 0)]]
+            padding += [[0, 0]]*(len(shape) - 1)
+            tensor = tf.pad(tensor, padding)
+
+            segment = tensor[start:start + crop_length]
+            segment.set_shape([crop_length] + shape[1:])
+
+            cropped[2*i] = segment
+            cropped[2*i + 1] = tf.constant(crop_length, dtype=tf.int32)
+
+        return cropped
+
+def bucket_boundaries(histogram, numbuckets):
+    '''detemine the bucket boundaries that minimize the padding. The examples
+    in a bucket are padded to the longest sequence length in the bucket. The
+    optimal boundaries are found with dynamic programming over the sequence
+    lengths that occur in the histogram.
+
+    Args:
+        histogram: the number of examples for every sequence length
+        numbuckets: the number of buckets
+
+    Returns:
+        the bucket boundaries as an increasing list of at most numbuckets-1
+        sequence lengths, a bucket contains the sequence lengths from its
+        boundary up to the next boundary'''
+
+    histogram = np.asarray(histogram)
+    lengths = np.nonzero(histogram)[0]
+    counts = histogram[lengths].astype(np.float64)
+
+    #the cumulative number of examples and frames, the padding of a bucket
+    #with lengths[i:j+1] is
+    #lengths[j]*(cum_counts[j+1]-cum_counts[i]) - (cum_frames[j+1]-cum_frames[i])
+    cum_counts = np.concatenate([[0], np.cumsum(counts)])
+    cum_frames = np.concatenate([[0], np.cumsum(counts*lengths)])
+
+    #the minimal padding of the examples with lengths[:j+1] in a single bucket
+    cost = lengths*cum_counts[1:] - cum_frames[1:]
+
+    #for every extra bucket and every j, the first length of the last bucket
+    #in the best solution or -1 if the extra bucket does not reduce the padding
+    starts = []
+    for _ in range(numbuckets-1):
+        new_cost = cost.copy()
+        start = -np.ones(len(lengths), dtype=np.int64)
+        for j in range(1, len(lengths)):
+            first = np.arange(1, j+1)
+            padding = (cost[first-1]
+                       + lengths[j]*(cum_counts[j+1] - cum_counts[first])
+                       - (cum_frames[j+1] - cum_frames[first]))
+            best = np.argmin(padding)
+            if padding[best] < cost[j]:
+                new_cost[j] = padding[best]
+                start[j] = first[best]
+        cost = new_cost
+        starts.append(start)
+
+    #trace back the first lengths of the buckets
+    boundaries = []
+    j = len(lengths) - 1
+    for start in reversed(starts):
+        if start[j] >= 0:
+            boundaries.append(int(lengths[start[j]]))
+            j = start[j] - 1
+
+    return sorted(boundaries)
+
+def padding_ratio(histogram, boundaries):
+    '''compute the ratio of padded frames to actual frames if every example
+    is padded to the longest sequence length in its bucket. This is an upper
+    bound for the padding in the batches.
+
+    Args:
+        histogram: the number of examples for every sequence length
+        boundaries: the bucket boundaries
+
+    Returns:
+        the padding ratio'''
 
-            j += 1
+    histogram = np.asarray(histogram)
+    lengths = np.arange(len(histogram))
+    frames = float(np.sum(histogram*lengths))
 
-        boundaries[i+1] = j
+    padding = 0
+    edges = [0] + list(boundaries) + [len(histogram)]
+    for low, high in zip(edges[:-1], edges[1:]):
+        bucket = histogram[low:high]
+        if bucket.any():
+            longest = low + np.nonzero(bucket)[0][-1]
+            padding += np.sum(bucket*(longest - lengths[low:high]))
 
-    return boundaries[1:]
+    return padding/frames
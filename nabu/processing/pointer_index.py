@@ -0,0 +1,108 @@
+'''@file pointer_index.py
+contains the functionality to read the pointers of a data directory through a
+sorted index, so the pointers of very large stores can be joined without
+reading the pointers.scp files line by line'''
+
+import os
+import tempfile
+import numpy as np
+
+#the files of the index, the names are sorted and the pointers and the line
+#numbers in pointers.scp are in the same order as the names
+INDEX_FILES = ['pointer_names.npy', 'pointer_values.npy', 'pointer_lines.npy']
+
+def write(datadir):
+    '''create the index of the pointers.scp file of a data directory, this is
+    done by the data preparation when all the data is written
+
+    Args:
+        datadir: the directory containing the pointers.scp file
+
+    Returns:
+        the index as a list of the sorted names, the pointers in the order of
+        the names and the line numbers of the names in pointers.scp'''
+
+    index = _create(datadir)
+
+    #write to temporary files first so readers never see a partial index
+    for filename, array in zip(INDEX_FILES, index):
+        fid, tmpfile = tempfile.mkstemp(dir=datadir, suffix='.tmp')
+        with os.fdopen(fid, 'wb') as tmpfid:
+            np.save(tmpfid, array)
+        os.rename(tmpfile, os.path.join(datadir, filename))
+
+    return index
+
+def load(datadir):
+    '''load the index of the pointers of a data directory, the index is
+    memory mapped. If there is no index or it is older than the pointers.scp
+    file, it is created
+
+    Args:
+        datadir: the directory containing the pointers.scp file
+
+    Returns:
+        the index as a list of the sorted names, the pointers in the order of
+        the names and the line numbers of the names in pointers.scp'''
+
+    filenames = [os.path.join(datadir, filename) for filename in INDEX_FILES]
+    scp_time = os.path.getmtime(os.path.join(datadir, 'pointers.scp'))
+
+    if all(os.path.exists(filename) and os.path.getmtime(filename) >= scp_time
+           for filename in filenames):
+        return [np.load(filename, mmap_mode='r') for filename in filenames]
+
+    try:
+        return write(datadir)
+    except (IOError, OSError):
+        #the data directory is read only, the index is only kept in memory
+        return _create(datadir)
+
+def lookup(index, names):
+    '''find names in an index
+
+    Args:
+        index: the index as returned by load
+        names: the names as a numpy array of bytes
+
+    Returns:
+        - for every name, whether it was found
+        - the pointers of the names, the pointers of names that were not
+            found are empty'''
+
+    sorted_names, sorted_pointers, _ = index
+
+    if not len(sorted_names):
+        return (np.zeros(len(names), dtype=bool),
+                np.zeros(len(names), dtype=np.bytes_))
+
+    positions = np.searchsorted(sorted_names, names)
+    positions = np.minimum(positions, len(sorted_names) - 1)
+    found = sorted_names[positions] == names
+    pointers = np.where(found, sorted_pointers[positions], b'')
+
+    return found, pointers
+
+def _create(datadir):
+    '''read the pointers.scp file of a data directory and sort it by name
+
+    Args:
+        datadir: the directory containing the pointers.scp file
+
+    Returns:
+        the index as a list of the sorted names, the pointers in the order of
+        the names and the line numbers of the names in pointers.scp'''
+
+    names = []
+    pointers = []
+    with open(os.path.join(datadir, 'pointers.scp')) as fid:
+        for line in fid:
+            name, pointer = line.strip().split('\t')
+            names.append(name)
+            pointers.append(pointer)
+
+    names = np.array(names, dtype=np.bytes_)
+    pointers = np.array(pointers, dtype=np.bytes_)
+    lines = np.argsort(names, kind='mergesort')
+
+    return [names[lines], pointers[lines], lines]
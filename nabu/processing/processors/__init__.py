@@ -6,4 +6,5 @@ onehotperfeature_target_processor, scorelabelperfeature_processor, \
 audio_multi_signal_processor, audio_signal_processor, multi_target_processor, \
 strlabel2index_processor, matrix2vector_processor, fracscorelabelperfeature_processor,\
 onehotperfeature_target_dummy_processor, multi_target_dummy_processor,\
-scorelabelperfeatureinmixture_processor, audio_feat_conc_processor
+scorelabelperfeatureinmixture_processor, audio_feat_conc_processor,\
+mean_var_accumulator
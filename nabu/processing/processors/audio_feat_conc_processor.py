@@ -3,12 +3,11 @@ contains the AudioFeatConcProcessor class'''
 
 
 import os
-import subprocess
-import StringIO
-import scipy.io.wavfile as wav
 import numpy as np
 import processor
+from mean_var_accumulator import MeanVarAccumulator
 from nabu.processing.feature_computers import feature_computer_factory
+from nabu.processing import audio_reader
 from random import shuffle
 import pdb
 
@@ -33,12 +32,13 @@ class AudioFeatConcProcessor(processor.Processor):
 		self.nrS = int(conf['nrs'])
 		self.dim = self.comp.get_dim() * self.nrS
 		self.max_length = np.zeros(len(self.segment_lengths))
+		self.sequence_length_histogram = [np.zeros(0, dtype=np.int32)
+		                                  for _ in self.segment_lengths]
 		self.nontime_dims=[self.dim]
 
 		#set the type of mean and variance normalisation
 		self.mvn_type = conf['mvn_type']
 		if conf['mvn_type'] == 'global':
-			self.obs_cnt = 0
 			self.glob_mean = np.zeros([1,self.comp.get_dim()])
 			self.glob_std = np.zeros([1,self.comp.get_dim()])
 		elif conf['mvn_type'] in ['local','None']:
@@ -62,25 +62,18 @@ class AudioFeatConcProcessor(processor.Processor):
 
 		splitdatalines = dataline.strip().split(' ')
 
-		clean_features = None
-		for splitdataline in splitdatalines:
-			#read the wav file
-			rate, utt = _read_wav(splitdataline)
+		#compute the features of all signals at once
+		utt_features = self.compute_features_batch(splitdatalines, audio_reader.read_wav)
 
-			#compute the features
-			utt_features = self.comp(utt, rate)
-
-			#mean and variance normalize the features
-			if self.mvn_type == 'global':
-				utt_features = (utt_features-self.glob_mean)/self.glob_std
-			elif self.mvn_type == 'local':
-				utt_features = (utt_features-np.mean(utt_features, 0))/np.std(utt_features, 0)
+		#mean and variance normalize the features
+		if self.mvn_type == 'global':
+			utt_features = (utt_features-self.glob_mean)/self.glob_std
+		elif self.mvn_type == 'local':
+			utt_features = ((utt_features-np.mean(utt_features, 1, keepdims=True))
+			                /np.std(utt_features, 1, keepdims=True))
 
-			utt_features = np.expand_dims(utt_features, 2)
-			if clean_features is None:
-				clean_features = utt_features
-			else:
-				clean_features = np.append(clean_features,utt_features,2)
+		#put the signals in the last dimension
+		clean_features = np.transpose(utt_features, (1, 2, 0))
 
 		ind_shuffle=np.random.permutation(self.nrS)
 		features=clean_features[:,:,np.array(ind_shuffle)]
@@ -92,6 +85,7 @@ class AudioFeatConcProcessor(processor.Processor):
 		#update the metadata
 		for i,seg_length in enumerate(self.segment_lengths):
 			self.max_length[i] = max(self.max_length[i], np.shape(segmented_data[seg_length][0])[0])
+		self.update_length_histogram(segmented_data)
 
 		return segmented_data, utt_info
 
@@ -104,104 +98,28 @@ class AudioFeatConcProcessor(processor.Processor):
         Args:
             dataconf: config file on the part of the database being processed'''
 		if self.mvn_type == 'global':
-			loop_types=['mean','std']
-
-			#calculate the mean and variance
-			for loop_type in loop_types:
-
-				#if the directory of mean and variance are pointing to the store directory,
-				#this means that the mean and variance should be calculated here.
-				if dataconf['meanandvar_dir'] == dataconf['store_dir']:
-
-					for datafile in dataconf['datafiles'].split(' '):
-						if datafile[-3:] == '.gz':
-							open_fn = gzip.open
-						else:
-							open_fn = open
-
-						#loop over the lines in the datafile
-						for line in open_fn(datafile):
-
-							#split the name and the data line
-							splitline = line.strip().split(' ')
-							utt_name = splitline[0]
-							dataline = ' '.join(splitline[1:])
+			glob_mean, glob_std = self.load_stats(dataconf)
+			self.glob_mean = np.reshape(glob_mean, [1, self.comp.get_dim()])
+			self.glob_std = np.reshape(glob_std, [1, self.comp.get_dim()])
 
-							#process the dataline
-							if loop_type == 'mean':
-								self.acc_mean(dataline)
-							elif loop_type == 'std':
-								self.acc_std(dataline)
-
-					if loop_type == 'mean':
-						self.glob_mean = self.glob_mean/float(self.obs_cnt)
-					elif loop_type == 'std':
-						self.glob_std = np.sqrt(self.glob_std/float(self.obs_cnt))
-				else:
-					#get mean and variance calculated on training set
-					if loop_type == 'mean':
-						with open(os.path.join(dataconf['meanandvar_dir'], 'glob_mean.npy')) as fid:
-							self.glob_mean = np.load(fid)
-					elif loop_type == 'std':
-						with open(os.path.join(dataconf['meanandvar_dir'], 'glob_std.npy')) as fid:
-							self.glob_std = np.load(fid)
-
-
-
-
-	def acc_mean(self, dataline):
-		'''accumulate the features to get the mean
+	def line_stats(self, dataline):
+		'''compute the statistics of the features of all signals for the global
+        mean and variance
         Args:
                 dataline: either a path to a wav file or a command to read and pipe
-                    an audio file'''
-		splitdatalines = dataline.strip().split(' ')
+                    an audio file
 
-		clean_features = None
-		for splitdataline in splitdatalines:
-			#read the wav file
-			rate, utt = _read_wav(splitdataline)
-
-			#compute the features
-			utt_features = self.comp(utt, rate)
-
-			utt_features = np.expand_dims(utt_features, 2)
-			if clean_features is None:
-				clean_features = utt_features
-			else:
-				clean_features = np.append(clean_features,utt_features,2)
-
-		acc_feat=np.sum(clean_features,axis=(0,2))
-
-		#update the mean and observation count
-		self.glob_mean += acc_feat
-		self.obs_cnt += np.shape(clean_features)[0]*self.nrS
-
-	def acc_std(self, dataline):
-		'''accumulate the features to get the standard deviation
-        Args:
-                dataline: either a path to a wav file or a command to read and pipe
-                    an audio file'''
+        Returns:
+            the statistics as a MeanVarAccumulator'''
 		splitdatalines = dataline.strip().split(' ')
 
-		clean_features = None
-		for splitdataline in splitdatalines:
-			#read the wav file
-			rate, utt = _read_wav(splitdataline)
-
-			#compute the features
-			utt_features = self.comp(utt, rate)
+		#compute the features of all signals at once
+		utt_features = self.compute_features_batch(splitdatalines, audio_reader.read_wav)
 
-			utt_features = np.expand_dims(utt_features, 2)
-			if clean_features is None:
-				clean_features = utt_features
-			else:
-				clean_features = np.append(clean_features,utt_features,2)
+		stats = MeanVarAccumulator(self.comp.get_dim())
+		stats.update(np.reshape(utt_features, [-1, self.comp.get_dim()]))
 
-		#accumulate the features
-		acc_feat=np.sum(np.square(clean_features-np.expand_dims(self.glob_mean,-1)),axis=(0,2))
-
-		#update the standard deviation
-		self.glob_std += acc_feat
+		return stats
 
 	def write_metadata(self, datadir):
 		'''write the processor metadata to disk
@@ -215,51 +133,13 @@ class AudioFeatConcProcessor(processor.Processor):
 			with open(os.path.join(datadir, 'glob_std.npy'), 'w') as fid:
 				np.save(fid, self.glob_std)
 
+		self.write_length_histogram(datadir)
+
 		for i,seg_length in enumerate(self.segment_lengths):
 			seg_dir = os.path.join(datadir,seg_length)
-			#with open(os.path.join(seg_dir, 'sequence_length_histogram.npy'),
-			#'w') as fid:
-			#np.save(fid, self.sequence_length_histogram[i])
 			with open(os.path.join(seg_dir, 'max_length'), 'w') as fid:
 				fid.write(str(self.max_length[i]))
 			with open(os.path.join(seg_dir, 'dim'), 'w') as fid:
 				fid.write(str(self.dim))
 			with open(os.path.join(seg_dir, 'nontime_dims'), 'w') as fid:
 				fid.write(str(self.nontime_dims)[1:-1])
-
-def _read_wav(wavfile):
-	'''
-    read a wav file
-
-    Args:
-        wavfile: either a path to a wav file or a command to read and pipe
-            an audio file
-
-    Returns:
-        - the sampling rate
-        - the utterance as a numpy array
-    '''
-
-	if os.path.exists(wavfile):
-		#its a file
-		(rate, utterance) = wav.read(wavfile)
-	elif wavfile[-1] == '|':
-		#its a command
-
-		#read the audio file
-		pid = subprocess.Popen(wavfile + ' tee', shell=True,
-							   stdout=subprocess.PIPE)
-		output, _ = pid.communicate()
-		output_buffer = StringIO.StringIO(output)
-		(rate, utterance) = wav.read(output_buffer)
-	else:
-		#its a segment of an utterance
-		split = wavfile.split(' ')
-		begin = float(split[-2])
-		end = float(split[-1])
-		unsegmented = ' '.join(split[:-2])
-		rate, full_utterance = _read_wav(unsegmented)
-		utterance = full_utterance[int(begin*rate):int(end*rate)]
-
-
-	return rate, utterance
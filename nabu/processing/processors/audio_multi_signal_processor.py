@@ -3,16 +3,17 @@ contains the AudioMultiSignalProcessor class'''
 
 
 import os
-import subprocess
-import StringIO
-import scipy.io.wavfile as wav
 import numpy as np
 import processor
 from nabu.processing.feature_computers import feature_computer_factory
+from nabu.processing import audio_reader
 
 class AudioMultiSignalProcessor(processor.Processor):
     '''a processor for multiple audio signals'''
 
+    #the utterance information is used in the postprocessing
+    returns_utt_info = True
+
     def __init__(self, conf, segment_lengths):
         '''AudioMultiSignalProcessor constructor
 
@@ -50,15 +51,17 @@ class AudioMultiSignalProcessor(processor.Processor):
 
         splitdatalines = dataline.strip().split(' ')
 
-        multi_signal = list()
-        for splitdataline in splitdatalines:
-            #read the wav file
-            rate, utt = _read_wav(splitdataline)
-
-            #compute the features
-            features = self.comp(utt, rate)
+        #read the wav files
+        rates, utts = zip(*[audio_reader.read_wav(splitdataline)
+                            for splitdataline in splitdatalines])
+        rate = rates[0]
 
-            multi_signal.append(features)
+        #compute the features, the features of signals with the same length
+        #are computed at once
+        if len(set(len(utt) for utt in utts)) == 1:
+            multi_signal = list(self.comp.comp_feat_batch(utts, rate))
+        else:
+            multi_signal = [self.comp(utt, rate) for utt in utts]
 
         # split the data for all desired segment lengths
         segmented_data = self.segment_data(multi_signal)
@@ -80,40 +83,3 @@ class AudioMultiSignalProcessor(processor.Processor):
 
             with open(os.path.join(seg_dir, 'dim'), 'w') as fid:
                 fid.write(str(self.dim))
-
-def _read_wav(wavfile):
-    '''
-    read a wav file
-
-    Args:
-        wavfile: either a path to a wav file or a command to read and pipe
-            an audio file
-
-    Returns:
-        - the sampling rate
-        - the utterance as a numpy array
-    '''
-
-    if os.path.exists(wavfile):
-        #its a file
-        (rate, utterance) = wav.read(wavfile)
-    elif wavfile[-1] == '|':
-        #its a command
-
-        #read the audio file
-        pid = subprocess.Popen(wavfile + ' tee', shell=True,
-                               stdout=subprocess.PIPE)
-        output, _ = pid.communicate()
-        output_buffer = StringIO.StringIO(output)
-        (rate, utterance) = wav.read(output_buffer)
-    else:
-        #its a segment of an utterance
-        split = wavfile.split(' ')
-        begin = float(split[-2])
-        end = float(split[-1])
-        unsegmented = ' '.join(split[:-2])
-        rate, full_utterance = _read_wav(unsegmented)
-        utterance = full_utterance[int(begin*rate):int(end*rate)]
-
-
-    return rate, utterance
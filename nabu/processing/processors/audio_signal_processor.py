@@ -3,16 +3,17 @@ contains the AudioSignalProcessor class'''
 
 
 import os
-import subprocess
-import StringIO
-import scipy.io.wavfile as wav
 import numpy as np
 import processor
 from nabu.processing.feature_computers import feature_computer_factory
+from nabu.processing import audio_reader
 
 class AudioSignalProcessor(processor.Processor):
     '''a processor for audio signals'''
 
+    #the utterance information is used in the postprocessing
+    returns_utt_info = True
+
     def __init__(self, conf, segment_lengths):
         '''AudioSignalProcessor constructor
 
@@ -46,12 +47,14 @@ class AudioSignalProcessor(processor.Processor):
         utt_info= dict()
 
         #read the wav file
-        rate, utt = _read_wav(dataline)
+        rate, utt = audio_reader.read_wav(dataline)
         utt_info['rate'] = rate
         utt_info['siglen'] = len(utt)
 
-        #compute the features
-        features = self.comp(utt, rate)
+        #compute the features, the spec of the mixture can come from the
+        #feature cache (e.g. computed together with the input features by the
+        #multi feature computer)
+        features = self.compute_features(dataline, audio_reader.read_wav)
 
         # split the data for all desired segment lengths
         segmented_data = self.segment_data(features)
@@ -72,40 +75,3 @@ class AudioSignalProcessor(processor.Processor):
                 fid.write(str(self.dim))
             with open(os.path.join(seg_dir, 'nontime_dims'), 'w') as fid:
                 fid.write(str(self.nontime_dims)[1:-1])
-
-def _read_wav(wavfile):
-    '''
-    read a wav file
-
-    Args:
-        wavfile: either a path to a wav file or a command to read and pipe
-            an audio file
-
-    Returns:
-        - the sampling rate
-        - the utterance as a numpy array
-    '''
-
-    if os.path.exists(wavfile):
-        #its a file
-        (rate, utterance) = wav.read(wavfile)
-    elif wavfile[-1] == '|':
-        #its a command
-
-        #read the audio file
-        pid = subprocess.Popen(wavfile + ' tee', shell=True,
-                               stdout=subprocess.PIPE)
-        output, _ = pid.communicate()
-        output_buffer = StringIO.StringIO(output)
-        (rate, utterance) = wav.read(output_buffer)
-    else:
-        #its a segment of an utterance
-        split = wavfile.split(' ')
-        begin = float(split[-2])
-        end = float(split[-1])
-        unsegmented = ' '.join(split[:-2])
-        rate, full_utterance = _read_wav(unsegmented)
-        utterance = full_utterance[int(begin*rate):int(end*rate)]
-
-
-    return rate, utterance
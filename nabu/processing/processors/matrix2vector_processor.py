@@ -3,18 +3,20 @@ contains the Matrix2VectorProcessor class'''
 
 
 import os
-import subprocess
-import StringIO
-import scipy.io.wavfile as wav
 import numpy as np
 import processor
+from mean_var_accumulator import MeanVarAccumulator
 from nabu.processing.feature_computers import feature_computer_factory
+from nabu.processing import audio_reader
 import json
 import pdb
 
 class Matrix2VectorProcessor(processor.Processor):
 	'''a processor for converting matrices to vectors.'''
 
+	#the utterance information is used in the postprocessing
+	returns_utt_info = True
+
 	def __init__(self, conf, segment_lengths):
 		'''Matrix2VectorProcessor constructor
 
@@ -37,7 +39,6 @@ class Matrix2VectorProcessor(processor.Processor):
 		#set the type of mean and variance normalisation
 		self.mvn_type = conf['mvn_type']
 		if conf['mvn_type'] == 'global':
-			self.obs_cnt = 0
 			self.glob_mean = np.zeros([self.dim])
 			self.glob_std = np.zeros([self.dim])
 		elif conf['mvn_type'] == 'None':
@@ -62,20 +63,15 @@ class Matrix2VectorProcessor(processor.Processor):
 		audiofile = split_dataline[0]
 		matrixfile = split_dataline[-1]
 
-		matrix = open(matrixfile).read().strip().split(',')
 		utt_info['nrS']=self.nrS
-		vector=np.zeros(self.dim)
-		for ind,matrix_row in enumerate(matrix):
-			vector[ind*self.nrCol:(ind+1)*self.nrCol]=map(float, matrix_row.strip().split(' '))
+		vector = self.read_vector(matrixfile)
 
 		#mean and variance normalize the features
 		if self.mvn_type == 'global':
 			vector = (vector-self.glob_mean)/self.glob_std
 
 		#get the number of frames from the mixture audiofile
-		rate, utt = _read_wav(audiofile)
-		features = self.comp(utt, rate)
-		Nfram = np.shape(features)[0]
+		Nfram = self.num_frames(audiofile, audio_reader.read_wav)
 
 		# split the data for all desired segment lengths
 		segmented_data = self.segment_data(vector,Nfram)
@@ -89,51 +85,42 @@ class Matrix2VectorProcessor(processor.Processor):
         Args:
             dataconf: config file on the part of the database being processed'''
 		if self.mvn_type == 'global':
-			loop_types=['mean','std']
-
-			#calculate the mean and variance
-			for loop_type in loop_types:
-
-				#if the directory of mean and variance are pointing to the store directory,
-				#this means that the mean and variance should be calculated here.
-				if dataconf['meanandvar_dir'] == dataconf['store_dir']:
-
-					for datafile in dataconf['datafiles'].split(' '):
-						if datafile[-3:] == '.gz':
-							open_fn = gzip.open
-						else:
-							open_fn = open
-
-						#loop over the lines in the datafile
-						for line in open_fn(datafile):
-							#split the name and the data line
-							split_dataline = line.strip().split(' ')
-							matrixfile = split_dataline[-1]
-
-							matrix = open(matrixfile).read().strip().split(',')
-							vector=np.zeros(self.dim)
-							for ind,matrix_row in enumerate(matrix):
-								vector[ind*self.nrCol:(ind+1)*self.nrCol]=map(float, matrix_row.strip().split(' '))
-
-							#process the dataline
-							if loop_type == 'mean':
-								self.glob_mean += vector
-								self.obs_cnt += 1
-							elif loop_type == 'std':
-								self.glob_std += np.square(vector-self.glob_mean)
-
-					if loop_type == 'mean':
-						self.glob_mean = self.glob_mean/float(self.obs_cnt)
-					elif loop_type == 'std':
-						self.glob_std = np.sqrt(self.glob_std/float(self.obs_cnt))
-				else:
-					#get mean and variance calculated on training set
-					if loop_type == 'mean':
-						with open(os.path.join(dataconf['meanandvar_dir'], 'glob_mean.npy')) as fid:
-							self.glob_mean = np.load(fid)
-					elif loop_type == 'std':
-						with open(os.path.join(dataconf['meanandvar_dir'], 'glob_std.npy')) as fid:
-							self.glob_std = np.load(fid)
+			self.glob_mean, self.glob_std = self.load_stats(dataconf)
+
+	def line_stats(self, dataline):
+		'''compute the statistics of the vector for the global mean and
+        variance
+
+        Args:
+            dataline: contains the audio mixture, and the matrix file
+
+        Returns:
+            the statistics as a MeanVarAccumulator'''
+
+		matrixfile = dataline.strip().split(' ')[-1]
+
+		stats = MeanVarAccumulator(self.dim)
+		stats.update(self.read_vector(matrixfile)[np.newaxis, :])
+
+		return stats
+
+	def read_vector(self, matrixfile):
+		'''read the matrix in a matrix file as a vector
+
+        Args:
+            matrixfile: the file containing the matrix, the rows are comma
+                seperated and the elements in a row space seperated
+
+        Returns:
+            the matrix as a vector'''
+
+		#parse all elements at once, the rows are concatenated
+		with open(matrixfile) as fid:
+			values = np.fromstring(fid.read().replace(',', ' '), sep=' ')
+		vector=np.zeros(self.dim)
+		vector[:len(values)]=values
+
+		return vector
 
 	def write_metadata(self, datadir):
 		'''write the processor metadata to disk
@@ -187,41 +174,3 @@ class Matrix2VectorProcessor(processor.Processor):
 			segmented_data[seg_length] = seg_data
 
 		return segmented_data
-
-def _read_wav(wavfile):
-	'''
-    read a wav file
-
-    Args:
-        wavfile: either a path to a wav file or a command to read and pipe
-            an audio file
-
-    Returns:
-        - the sampling rate
-        - the utterance as a numpy array
-    '''
-
-	if os.path.exists(wavfile):
-		#its a file
-		(rate, utterance) = wav.read(wavfile)
-	elif wavfile[-1] == '|':
-		#its a command
-
-		#read the audio file
-		pid = subprocess.Popen(wavfile + ' tee', shell=True,
-							   stdout=subprocess.PIPE)
-		output, _ = pid.communicate()
-		output_buffer = StringIO.StringIO(output)
-		(rate, utterance) = wav.read(output_buffer)
-	else:
-		#its a segment of an utterance
-		split = wavfile.split(' ')
-		begin = float(split[-2])
-		end = float(split[-1])
-		unsegmented = ' '.join(split[:-2])
-		rate, full_utterance = _read_wav(unsegmented)
-		utterance = full_utterance[int(begin*rate):int(end*rate)]
-
-
-	return rate, utterance
- 
\ No newline at end of file
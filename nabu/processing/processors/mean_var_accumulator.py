@@ -0,0 +1,75 @@
+'''@file mean_var_accumulator.py
+contains the MeanVarAccumulator class'''
+
+import numpy as np
+
+class MeanVarAccumulator(object):
+    '''accumulates the mean and variance of data in a single pass. The
+    statistics of different parts of the data can be merged (Chan et al.), so
+    the data can be processed by multiple processes.'''
+
+    def __init__(self, dim):
+        '''MeanVarAccumulator constructor
+
+        Args:
+            dim: the dimension of the data
+        '''
+
+        self.count = 0
+        self.mean = np.zeros([dim])
+        self.m2 = np.zeros([dim])
+
+    def update(self, data):
+        '''accumulate the statistics of new data
+
+        Args:
+            data: the data as a [N x dim] numpy array
+        '''
+
+        data = np.asarray(data, dtype=np.float64)
+        count = data.shape[0]
+        if count == 0:
+            return
+
+        #the statistics of the new data
+        mean = np.mean(data, 0)
+        m2 = np.sum(np.square(data-mean), 0)
+
+        self._merge(count, mean, m2)
+
+    def merge(self, other):
+        '''merge the statistics accumulated by an other accumulator
+
+        Args:
+            other: the other MeanVarAccumulator
+        '''
+
+        if other.count > 0:
+            self._merge(other.count, other.mean, other.m2)
+
+    def _merge(self, count, mean, m2):
+        '''merge statistics into the accumulated statistics
+
+        Args:
+            count: the number of observations
+            mean: the mean of the observations
+            m2: the sum of the squared differences with the mean
+        '''
+
+        total = self.count + count
+        delta = mean - self.mean
+
+        self.mean = self.mean + delta*(float(count)/total)
+        self.m2 = self.m2 + m2 + np.square(delta)*(float(self.count)*count/total)
+        self.count = total
+
+    def std(self):
+        '''the standard deviation of the accumulated data
+
+        Returns:
+            the standard deviation as a numpy array'''
+
+        if self.count == 0:
+            raise Exception('no data was accumulated')
+
+        return np.sqrt(self.m2/self.count)
@@ -3,12 +3,10 @@ contains the MultiTargetProcessor class'''
 
 
 import os
-import subprocess
-import StringIO
-import scipy.io.wavfile as wav
 import numpy as np
 import processor
 from nabu.processing.feature_computers import feature_computer_factory
+from nabu.processing import audio_reader
 import pdb
 
 class MultiTargetProcessor(processor.Processor):
@@ -49,19 +47,10 @@ class MultiTargetProcessor(processor.Processor):
 
         splitdatalines = dataline.strip().split(' ')
 
-        targets = None
-        for splitdataline in splitdatalines:
-            #read the wav file
-            rate, utt = _read_wav(splitdataline)
-
-            #compute the features
-            features = self.comp(utt, rate)
-            features = np.expand_dims(features, 2)
-
-            if targets is None:
-                targets = features
-            else:
-                targets = np.append(targets,features,2)
+        #compute the features of all sources at once, the sources are put in
+        #the last dimension
+        features = self.compute_features_batch(splitdatalines, audio_reader.read_wav)
+        targets = np.transpose(features, (1, 2, 0))
 
         # split the data for all desired segment lengths
         segmented_data = self.segment_data(targets)
@@ -83,40 +72,3 @@ class MultiTargetProcessor(processor.Processor):
                 fid.write(str(self.target_dim))
             with open(os.path.join(seg_dir, 'nontime_dims'), 'w') as fid:
                 fid.write(str(self.nontime_dims)[1:-1])
-
-def _read_wav(wavfile):
-    '''
-    read a wav file
-
-    Args:
-        wavfile: either a path to a wav file or a command to read and pipe
-            an audio file
-
-    Returns:
-        - the sampling rate
-        - the utterance as a numpy array
-    '''
-
-    if os.path.exists(wavfile):
-        #its a file
-        (rate, utterance) = wav.read(wavfile)
-    elif wavfile[-1] == '|':
-        #its a command
-
-        #read the audio file
-        pid = subprocess.Popen(wavfile + ' tee', shell=True,
-                               stdout=subprocess.PIPE)
-        output, _ = pid.communicate()
-        output_buffer = StringIO.StringIO(output)
-        (rate, utterance) = wav.read(output_buffer)
-    else:
-        #its a segment of an utterance
-        split = wavfile.split(' ')
-        begin = float(split[-2])
-        end = float(split[-1])
-        unsegmented = ' '.join(split[:-2])
-        rate, full_utterance = _read_wav(unsegmented)
-        utterance = full_utterance[int(begin*rate):int(end*rate)]
-
-
-    return rate, utterance
@@ -3,12 +3,11 @@ contains the onehotperfeatureTargetDummyProcessor class'''
 
 
 import os
-import subprocess
-import StringIO
-import scipy.io.wavfile as wav
 import numpy as np
 import processor
+import onehotperfeature_target_processor
 from nabu.processing.feature_computers import feature_computer_factory
+from nabu.processing import audio_reader
 import pdb
 
 class onehotperfeatureTargetDummyProcessor(processor.Processor):
@@ -47,20 +46,18 @@ class onehotperfeatureTargetDummyProcessor(processor.Processor):
 
         utt_info= dict()
 
-        rate, utt = _read_wav(dataline)
+        rate, utt = audio_reader.read_wav(dataline)
         #compute the features
         features = self.comp(utt, rate)
-        features = np.expand_dims(features, 2)
-        clean_features = features
-        for spk_ind in range(1,self.nrS):
-            features_spk=features+np.random.randn(np.shape(features)[0],np.shape(features)[1],np.shape(features)[2])
-            clean_features = np.append(clean_features,features_spk,2)
 
+        #the dummy sources are noisy versions of the features
+        clean_features = np.empty([self.nrS] + list(features.shape))
+        clean_features[0] = features
+        clean_features[1:] = features + np.random.randn(
+            self.nrS-1, features.shape[0], features.shape[1])
 
-        winner=np.argmax(clean_features,axis=2)
-        targets=np.empty([features.shape[0],self.dim],dtype=bool)
-        for s_ind in range(self.nrS):
-            targets[:,s_ind::self.nrS]=winner==s_ind
+        targets = onehotperfeature_target_processor.onehot_targets(
+            clean_features)
 
         # split the data for all desired segment lengths
         segmented_data = self.segment_data(targets)
@@ -82,40 +79,3 @@ class onehotperfeatureTargetDummyProcessor(processor.Processor):
                 fid.write(str(self.dim))
             with open(os.path.join(seg_dir, 'nontime_dims'), 'w') as fid:
                 fid.write(str(self.nontime_dims)[1:-1])
-
-def _read_wav(wavfile):
-    '''
-    read a wav file
-
-    Args:
-        wavfile: either a path to a wav file or a command to read and pipe
-            an audio file
-
-    Returns:
-        - the sampling rate
-        - the utterance as a numpy array
-    '''
-
-    if os.path.exists(wavfile):
-        #its a file
-        (rate, utterance) = wav.read(wavfile)
-    elif wavfile[-1] == '|':
-        #its a command
-
-        #read the audio file
-        pid = subprocess.Popen(wavfile + ' tee', shell=True,
-                               stdout=subprocess.PIPE)
-        output, _ = pid.communicate()
-        output_buffer = StringIO.StringIO(output)
-        (rate, utterance) = wav.read(output_buffer)
-    else:
-        #its a segment of an utterance
-        split = wavfile.split(' ')
-        begin = float(split[-2])
-        end = float(split[-1])
-        unsegmented = ' '.join(split[:-2])
-        rate, full_utterance = _read_wav(unsegmented)
-        utterance = full_utterance[int(begin*rate):int(end*rate)]
-
-
-    return rate, utterance
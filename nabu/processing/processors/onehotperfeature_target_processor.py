@@ -3,12 +3,10 @@ contains the onehotperfeatureTargetProcessor class'''
 
 
 import os
-import subprocess
-import StringIO
-import scipy.io.wavfile as wav
 import numpy as np
 import processor
 from nabu.processing.feature_computers import feature_computer_factory
+from nabu.processing import audio_reader
 import pdb
 
 class onehotperfeatureTargetProcessor(processor.Processor):
@@ -49,24 +47,10 @@ class onehotperfeatureTargetProcessor(processor.Processor):
 
         splitdatalines = dataline.strip().split(' ')
 
-        clean_features = None
-        for splitdataline in splitdatalines:
-            #read the wav file
-            rate, utt = _read_wav(splitdataline)
+        #compute the features of all sources at once
+        clean_features = self.compute_features_batch(splitdatalines, audio_reader.read_wav)
 
-            #compute the features
-            features = self.comp(utt, rate)
-            features = np.expand_dims(features, 2)
-
-            if clean_features is None:
-                clean_features = features
-            else:
-                clean_features = np.append(clean_features,features,2)
-
-        winner=np.argmax(clean_features,axis=2)
-        targets=np.empty([features.shape[0],self.dim],dtype=bool)
-        for s_ind in range(self.nrS):
-            targets[:,s_ind::self.nrS]=winner==s_ind
+        targets = onehot_targets(clean_features)
 
         # split the data for all desired segment lengths
         segmented_data = self.segment_data(targets)
@@ -89,39 +73,29 @@ class onehotperfeatureTargetProcessor(processor.Processor):
             with open(os.path.join(seg_dir, 'nontime_dims'), 'w') as fid:
                 fid.write(str(self.nontime_dims)[1:-1])
 
-def _read_wav(wavfile):
-    '''
-    read a wav file
+def onehot_targets(clean_features):
+    '''get the one hot targets that indicate which source is the loudest in
+    every time-frequency bin. Comparing with the maximum over the sources is a
+    lot faster than an argmax over the (small) source axis.
 
     Args:
-        wavfile: either a path to a wav file or a command to read and pipe
-            an audio file
+        clean_features: the features of the sources as a
+            [nrS x seq_length x feature_dim] numpy array
 
     Returns:
-        - the sampling rate
-        - the utterance as a numpy array
-    '''
-
-    if os.path.exists(wavfile):
-        #its a file
-        (rate, utterance) = wav.read(wavfile)
-    elif wavfile[-1] == '|':
-        #its a command
-
-        #read the audio file
-        pid = subprocess.Popen(wavfile + ' tee', shell=True,
-                               stdout=subprocess.PIPE)
-        output, _ = pid.communicate()
-        output_buffer = StringIO.StringIO(output)
-        (rate, utterance) = wav.read(output_buffer)
-    else:
-        #its a segment of an utterance
-        split = wavfile.split(' ')
-        begin = float(split[-2])
-        end = float(split[-1])
-        unsegmented = ' '.join(split[:-2])
-        rate, full_utterance = _read_wav(unsegmented)
-        utterance = full_utterance[int(begin*rate):int(end*rate)]
-
-
-    return rate, utterance
+        the targets as a [seq_length x feature_dim*nrS] boolean numpy array,
+        with the sources interleaved per feature'''
+
+    nrS, seq_length, feature_dim = clean_features.shape
+
+    loudest = np.max(clean_features, axis=0)
+    targets = np.empty([seq_length, feature_dim, nrS], dtype=bool)
+    np.equal(clean_features, loudest, out=targets.transpose(2, 0, 1))
+
+    #if multiple sources are the loudest, the first one wins (like argmax)
+    assigned = targets[:, :, 0].copy()
+    for s_ind in range(1, nrS):
+        targets[:, :, s_ind] &= ~assigned
+        assigned |= targets[:, :, s_ind]
+
+    return targets.reshape(seq_length, feature_dim*nrS)
@@ -1,14 +1,28 @@
 '''@file processor.py
 contains the Processor class'''
 
+import os
+import gzip
+import itertools
+import multiprocessing
+from six.moves import cPickle as pickle
 from abc import ABCMeta, abstractmethod
 import numpy as np
+from nabu.processing.feature_computers import multi
 
 class Processor(object):
 	'''general Processor class for data processing'''
 
 	__metaclass__ = ABCMeta
 
+	#whether the data can be processed by multiple processors in parallel,
+	#this requires that the metadata of the processors can be merged
+	parallel = True
+
+	#whether the processor returns information about the utterances (e.g. the
+	#sampling rate) that is needed in the postprocessing
+	returns_utt_info = False
+
 	def __init__(self, conf):
 		'''Processor constructor
 
@@ -18,6 +32,10 @@ class Processor(object):
 
 		self.conf = conf
 
+		#the cache that is consulted before computing features, set by the data
+		#preparation if features should be cached
+		self.feature_cache = None
+
 	@abstractmethod
 	def __call__(self, dataline):
 		'''process the data in dataline
@@ -27,6 +45,96 @@ class Processor(object):
         Returns:
             The processed data'''
 
+	def compute_features(self, wavfile, read_wav):
+		'''compute the features of an audio file with the feature computer of
+        the processor. If a feature cache is used, the features are only
+        computed if they are not in the cache
+
+        Args:
+            wavfile: either a path to a wav file, a command to read and pipe
+                an audio file or a segment of an audio file
+            read_wav: the function used to read the audio file
+
+        Returns:
+            the features as a [seq_length x feature_dim] numpy array'''
+
+		if self.feature_cache is None:
+			rate, utt = read_wav(wavfile)
+			return self.comp(utt, rate)
+
+		if isinstance(self.comp, multi.Multi):
+			return multi.concatenate(
+				self._cached_multi_features(wavfile, read_wav))
+
+		return self.feature_cache(wavfile, self.comp, read_wav)
+
+	def _cached_multi_features(self, wavfile, read_wav):
+		'''get the features of the multi feature computer of the processor
+        from the feature cache. Every feature is cached with the key of the
+        single feature, so processors in other sections that compute one of
+        these features with the same configuration reuse it
+
+        Args:
+            wavfile: either a path to a wav file, a command to read and pipe
+                an audio file or a segment of an audio file
+            read_wav: the function used to read the audio file
+
+        Returns:
+            a list with the features for every feature of the feature computer'''
+
+		keys = [self.feature_cache.key(wavfile,
+		                               dict(self.comp.conf, feature=feature))
+		        for feature in self.comp.features]
+		feats = [self.feature_cache.load(key) for key in keys]
+
+		if any(feat is None for feat in feats):
+			rate, utt = read_wav(wavfile)
+			feats = self.comp.comp_feats(utt, rate)
+			for key, feat in zip(keys, feats):
+				self.feature_cache.store(key, feat)
+
+		return feats
+
+	def num_frames(self, wavfile, read_wav):
+		'''get the number of frames of the features of an audio file without
+        computing the features. Wav files are memory mapped by the audio
+        reader, so only the header is read.
+
+        Args:
+            wavfile: either a path to a wav file, a command to read and pipe
+                an audio file or a segment of an audio file
+            read_wav: the function used to read the audio file
+
+        Returns:
+            the number of frames'''
+
+		rate, utt = read_wav(wavfile)
+
+		return self.comp.num_frames(len(utt), rate)
+
+	def compute_features_batch(self, wavfiles, read_wav):
+		'''compute the features of multiple audio files with the same sampling
+        rate (e.g. the sources of a mixture) at once
+
+        Args:
+            wavfiles: a list of audio files
+            read_wav: the function used to read the audio files
+
+        Returns:
+            the features as a [num_files x seq_length x feature_dim] numpy array'''
+
+		if self.feature_cache is not None:
+			#the features are cached per audio file
+			return np.array([self.compute_features(wavfile, read_wav)
+			                 for wavfile in wavfiles])
+
+		rates, utts = zip(*[read_wav(wavfile) for wavfile in wavfiles])
+		if len(set(rates)) > 1:
+			raise Exception('the audio files %s have different sampling rates'
+			                % ' '.join(wavfiles))
+
+		return self.comp.comp_feat_batch(utts, rates[0])
+
 	def segment_data(self, data):
 		'''split the data into segments for all desired segment lengths
 
@@ -70,6 +178,166 @@ class Processor(object):
         Args:
             dir: the directory where the metadata should be written'''
 
+	def merge_metadata(self, other):
+		'''merge the metadata gathered by an other instance of this processor,
+        e.g. by a worker process that processed part of the data
+
+        Args:
+            other: the other processor'''
+
+		if hasattr(self, 'max_length'):
+			self.max_length = np.maximum(self.max_length, other.max_length)
+
+		if hasattr(self, 'sequence_length_histogram'):
+			self.sequence_length_histogram = [
+				add_histograms(histogram, other_histogram)
+				for histogram, other_histogram in zip(
+					self.sequence_length_histogram,
+					other.sequence_length_histogram)]
+
+	@property
+	def global_stats(self):
+		'''whether the data is normalized with the global mean and variance'''
+
+		return getattr(self, 'mvn_type', None) == 'global'
+
+	def reset_length_metadata(self, lengths):
+		'''compute the metadata that depends on the sequence lengths (the
+        maximal length and the histogram of the lengths) again from the
+        lengths of the written segments, e.g. to remove the utterances that
+        were processed before the data preparation was resumed and that have
+        changed since
+
+        Args:
+            lengths: the lengths of all the segments as a list per segment
+                length'''
+
+		if hasattr(self, 'max_length'):
+			self.max_length = np.array(
+				[max(seg_lengths) if seg_lengths else 0
+				 for seg_lengths in lengths], dtype=np.float64)
+
+		if hasattr(self, 'sequence_length_histogram'):
+			self.sequence_length_histogram = [
+				np.bincount(np.array(seg_lengths, dtype=np.int64)).astype(np.int32)
+				for seg_lengths in lengths]
+
+	def update_length_histogram(self, segmented_data):
+		'''count the sequence lengths of the segments in the histograms of the
+        segment lengths, the histograms are used for bucketing in the input
+        pipeline
+
+        Args:
+            segmented_data: the segmented data as a list of numpy arrays per
+                segment length'''
+
+		for i, seg_length in enumerate(self.segment_lengths):
+			lengths = [np.shape(segment)[0]
+			           for segment in segmented_data[seg_length]]
+			self.sequence_length_histogram[i] = add_histograms(
+				self.sequence_length_histogram[i],
+				np.bincount(lengths).astype(np.int32))
+
+	def write_length_histogram(self, datadir):
+		'''write the sequence length histograms of the segment lengths
+
+        Args:
+            datadir: the directory where the metadata should be written'''
+
+		for i, seg_length in enumerate(self.segment_lengths):
+			with open(os.path.join(datadir, seg_length,
+			                       'sequence_length_histogram.npy'), 'wb') as fid:
+				np.save(fid, self.sequence_length_histogram[i])
+
+	def line_stats(self, dataline):
+		'''compute the statistics of the data in dataline that are needed for
+        normalization, e.g. for global mean and variance normalization
+
+        Args:
+            dataline: a string, can be a line of text a pointer to a file etc.
+
+        Returns:
+            the statistics as a MeanVarAccumulator'''
+
+		raise Exception('the %s does not compute statistics' %
+		                type(self).__name__)
+
+	def accumulate_stats(self, dataconf):
+		'''accumulate the statistics of all the data in a single pass. If
+        num_processes is set in the data config, the data is processed by
+        multiple processes
+
+        Args:
+            dataconf: config file on the part of the database being processed
+
+        Returns:
+            the statistics as a MeanVarAccumulator'''
+
+		num_processes = int(dataconf.get('num_processes', 1))
+
+		lines = (dataline for _, dataline in datalines(dataconf))
+
+		if num_processes > 1:
+			pool = multiprocessing.Pool(num_processes, _init_stats_worker,
+			                            (self,))
+			all_stats = pool.imap_unordered(_stats_worker, lines, 16)
+		else:
+			pool = None
+			all_stats = itertools.imap(self.line_stats, lines)
+
+		stats = None
+		for line_stats in all_stats:
+			if stats is None:
+				stats = line_stats
+			else:
+				stats.merge(line_stats)
+
+		if pool is not None:
+			pool.close()
+			pool.join()
+
+		if stats is None:
+			raise Exception('no data found in %s' % dataconf['datafiles'])
+
+		return stats
+
+	def load_stats(self, dataconf):
+		'''get the global mean and standard deviation. They are computed on
+        the data if the meanandvar_dir is the store_dir, otherwise they are
+        loaded from the meanandvar_dir (e.g. computed on the training set). If
+        the data is prepared in shards, the statistics of the shards in
+        stats_shards are merged
+
+        Args:
+            dataconf: config file on the part of the database being processed
+
+        Returns:
+            the global mean and standard deviation as numpy arrays'''
+
+		if 'stats_shards' in dataconf:
+			#the data is prepared in shards by seperate jobs, the statistics
+			#of all shards have been computed and are merged
+			stats = None
+			for stats_file in dataconf['stats_shards'].split(' '):
+				with open(stats_file, 'rb') as fid:
+					shard_stats = pickle.load(fid)
+				if stats is None:
+					stats = shard_stats
+				else:
+					stats.merge(shard_stats)
+			return stats.mean, stats.std()
+
+		if dataconf['meanandvar_dir'] == dataconf['store_dir']:
+			stats = self.accumulate_stats(dataconf)
+			return stats.mean, stats.std()
+
+		with open(os.path.join(dataconf['meanandvar_dir'], 'glob_mean.npy')) as fid:
+			glob_mean = np.load(fid)
+		with open(os.path.join(dataconf['meanandvar_dir'], 'glob_std.npy')) as fid:
+			glob_std = np.load(fid)
+
+		return glob_mean, glob_std
+
 	def pre_loop(self, dataconf):
 		'''allow the processor to access data before looping over all the data
 
@@ -80,4 +348,67 @@ class Processor(object):
 		'''allow the processor to access data after looping over all the data
 
         Args:
-            dataconf: config file on the part of the database being processed'''
\ No newline at end of file
+            dataconf: config file on the part of the database being processed'''
+
+def add_histograms(histogram, other):
+	'''add two histograms of different lengths
+
+	Args:
+		histogram: a histogram as a numpy array
+		other: the other histogram as a numpy array
+
+	Returns:
+		the sum of the histograms'''
+
+	if len(histogram) < len(other):
+		histogram, other = other, histogram
+
+	histogram = histogram.copy()
+	histogram[:len(other)] += other
+
+	return histogram
+
+def datalines(dataconf):
+	'''iterate over the lines of all the datafiles of a database section
+
+	Args:
+		dataconf: the database section as a dictionary of strings
+
+	Yields:
+		the utterance name and the data line'''
+
+	#loop over the data files
+	for datafile in dataconf['datafiles'].split(' '):
+		if datafile[-3:] == '.gz':
+			open_fn = gzip.open
+		else:
+			open_fn = open
+
+		#loop over the lines in the datafile
+		for line in open_fn(datafile):
+			#split the name and the data line
+			splitline = line.strip().split(' ')
+			utt_name = splitline[0]
+			dataline = ' '.join(splitline[1:])
+
+			yield utt_name, dataline
+
+def _init_stats_worker(processor):
+	'''initialize a process that computes statistics
+
+	Args:
+		processor: the processor used by the process'''
+
+	global _stats_processor
+	_stats_processor = processor
+
+def _stats_worker(dataline):
+	'''compute the statistics of a dataline in a worker process
+
+	Args:
+		dataline: the data line
+
+	Returns:
+		the statistics as a MeanVarAccumulator'''
+
+	return _stats_processor.line_stats(dataline)
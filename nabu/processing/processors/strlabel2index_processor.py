@@ -3,12 +3,10 @@ contains the Strlabel2indexProcessor class'''
 
 
 import os
-import subprocess
-import StringIO
-import scipy.io.wavfile as wav
 import numpy as np
 import processor
 from nabu.processing.feature_computers import feature_computer_factory
+from nabu.processing import audio_reader
 import json
 import pdb
 
@@ -16,6 +14,13 @@ class Strlabel2indexProcessor(processor.Processor):
     '''a processor for converting string labels to index labels. Can be used
     for example to convert speaker labels to index format.'''
 
+    #the utterance information is used in the postprocessing
+    returns_utt_info = True
+
+    #the label indices depend on the order in which the labels are
+    #encountered, so the data can not be processed in parallel
+    parallel = False
+
     def __init__(self, conf, segment_lengths):
         '''Strlabel2indexProcessor constructor
 
@@ -63,9 +68,7 @@ class Strlabel2indexProcessor(processor.Processor):
             index_labels.append(self.label2index[str_label])
 
         #get the number of frames from the mixture audiofile
-        rate, utt = _read_wav(audiofile)
-        features = self.comp(utt, rate)
-        Nfram = np.shape(features)[0]
+        Nfram = self.num_frames(audiofile, audio_reader.read_wav)
 
         # split the data for all desired segment lengths
         segmented_data = self.segment_data(index_labels,Nfram)
@@ -86,6 +89,16 @@ class Strlabel2indexProcessor(processor.Processor):
                 self.label2index = json.load(fid)
             self.next_index = len(self.label2index)
 
+    def merge_metadata(self, other):
+        '''the label indices depend on the order in which the labels are
+        encountered, so the metadata of different processors can not be merged
+
+        Args:
+            other: the other processor'''
+
+        raise Exception('the strlabel2index processor can not be used with '
+                        'multiple processes')
+
     def write_metadata(self, datadir):
         '''write the processor metadata to disk
 
@@ -139,41 +152,3 @@ class Strlabel2indexProcessor(processor.Processor):
             segmented_data[seg_length] = seg_data
 
         return segmented_data
-
-def _read_wav(wavfile):
-    '''
-    read a wav file
-
-    Args:
-        wavfile: either a path to a wav file or a command to read and pipe
-            an audio file
-
-    Returns:
-        - the sampling rate
-        - the utterance as a numpy array
-    '''
-
-    if os.path.exists(wavfile):
-        #its a file
-        (rate, utterance) = wav.read(wavfile)
-    elif wavfile[-1] == '|':
-        #its a command
-
-        #read the audio file
-        pid = subprocess.Popen(wavfile + ' tee', shell=True,
-                               stdout=subprocess.PIPE)
-        output, _ = pid.communicate()
-        output_buffer = StringIO.StringIO(output)
-        (rate, utterance) = wav.read(output_buffer)
-    else:
-        #its a segment of an utterance
-        split = wavfile.split(' ')
-        begin = float(split[-2])
-        end = float(split[-1])
-        unsegmented = ' '.join(split[:-2])
-        rate, full_utterance = _read_wav(unsegmented)
-        utterance = full_utterance[int(begin*rate):int(end*rate)]
-
-
-    return rate, utterance
- 
\ No newline at end of file
@@ -3,4 +3,6 @@ contains readers that are used for reading and processing tfRecord files'''
 
 from . import tfreader, tfreader_factory, numpy_float_array_as_tfrecord_reader, \
 numpy_bool_array_as_tfrecord_reader, index_list_as_tfrecord_reader, \
-float_list_as_tfrecord_reader
+float_list_as_tfrecord_reader, numpy_packed_bool_array_as_tfrecord_reader, \
+numpy_float16_array_as_tfrecord_reader, numpy_quantized_array_as_tfrecord_reader, \
+numpy_float_array_as_memmap_reader
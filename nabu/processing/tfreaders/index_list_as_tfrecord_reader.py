@@ -10,6 +10,9 @@ import pdb
 class IndexListAsTfrecordReader(tfreader.TfReader):
     '''reader for list of indices'''
 
+    #the data is a single vector per utterance
+    time_dimension = False
+
     def _read_metadata(self, datadirs):
         '''read the input dimension
 
@@ -9,6 +9,9 @@ import tfreader
 class NumpyBoolArrayAsTfrecordReader(tfreader.TfReader):
     '''reader for numpy bool arrays'''
 
+    #the booleans are decoded to 32 bit integers
+    decoded_ratio = 4
+
     def _read_metadata(self, datadirs):
         '''read the input dimension
 
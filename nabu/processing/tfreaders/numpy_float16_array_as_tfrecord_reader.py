@@ -0,0 +1,31 @@
+'''@file numpy_float16_array_as_tfrecord_reader.py
+contains the NumpyFloat16ArrayAsTfrecordReader class'''
+
+import tensorflow as tf
+import numpy_float_array_as_tfrecord_reader
+
+class NumpyFloat16ArrayAsTfrecordReader(
+        numpy_float_array_as_tfrecord_reader.NumpyFloatArrayAsTfrecordReader):
+    '''reader for numpy float arrays that were written in half precision'''
+
+    #the data is decoded to single precision
+    decoded_ratio = 2
+
+    def _process_features(self, features):
+        '''process the read features, the data is converted to single
+        precision
+
+        features:
+            A dict mapping feature keys to Tensor and SparseTensor values
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+
+        data = tf.decode_raw(features['data'], tf.float16)
+        data = tf.cast(data, tf.float32)
+        resh_dims = [-1] + self.metadata['nontime_dims']
+        data = tf.reshape(data, resh_dims)
+        sequence_length = tf.shape(data)[0]
+
+        return data, sequence_length
@@ -0,0 +1,149 @@
+'''@file numpy_float_array_as_memmap_reader.py
+contains the NumpyFloatArrayAsMemmapReader class'''
+
+import threading
+import collections
+import numpy as np
+import tensorflow as tf
+import numpy_float_array_as_tfrecord_reader
+
+class NumpyFloatArrayAsMemmapReader(
+        numpy_float_array_as_tfrecord_reader.NumpyFloatArrayAsTfrecordReader):
+    '''reader for numpy float arrays that were written in a contiguous store,
+    the examples are read from a memory map of the store'''
+
+    def __call__(self, queue, name=None):
+        '''read all data from the queue
+
+        Args:
+            queue: a queue containing pointers to examples in a store
+            name: the name of the operation
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+
+        return self.read(queue.dequeue(), name)
+
+    def read(self, pointer, name=None):
+        '''read a single example from a store
+
+        Args:
+            pointer: a string tensor with a pointer to the example in a store
+            name: the name of the operation
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+        with tf.name_scope(name or type(self).__name__):
+
+            data = tf.py_func(read_memmap_array, [pointer], tf.float32,
+                              stateful=False)
+
+            processed = self._process_features({'data': data})
+
+        return processed
+
+    def records(self, pointers, num_parallel_reads=1):
+        '''the examples are read from the memory map when they are parsed, so
+        the records are the pointers themselves
+
+        Args:
+            pointers: a dataset of pointers to examples in a store
+            num_parallel_reads: unused
+
+        Returns:
+            the dataset of pointers
+        '''
+
+        return pointers
+
+    def parse(self, record, name=None):
+        '''read the example that a record points to
+
+        Args:
+            record: a pointer to the example in a store
+            name: the name of the operation
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+
+        return self.read(record, name)
+
+    def example_size(self, pointer):
+        '''compute the memory that a read example takes, the size follows
+        from the shape in the pointer
+
+        Args:
+            pointer: a pointer to the example in a store
+
+        Returns:
+            the size in bytes
+        '''
+
+        shape = pointer.rsplit(b':', 1)[1]
+
+        return 4*int(np.prod([int(dim) for dim in shape.split(b',')]))
+
+    def _create_features(self):
+        '''
+            the examples are not parsed, so there are no features
+
+            Returns:
+                an empty dict
+        '''
+
+        return dict()
+
+    def _process_features(self, features):
+        '''process the read features
+
+        features:
+            A dict containing the data read from the store
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+
+        data = features['data']
+        data.set_shape([None] + self.metadata['nontime_dims'])
+        sequence_length = tf.shape(data)[0]
+
+        return data, sequence_length
+
+#the stores that are currently mapped in memory
+_open_stores = collections.OrderedDict()
+_open_stores_lock = threading.Lock()
+_MAX_OPEN_STORES = 64
+
+def read_memmap_array(pointer):
+    '''read a single example from a store
+
+    Args:
+        pointer: a pointer to the example of the form store@offset:shape, with
+            offset the position of the example in the store in elements and
+            shape the comma seperated dimensions of the example
+
+    Returns:
+        the example as a numpy array, this is a read only view on the store
+    '''
+
+    store, location = pointer.rsplit(b'@', 1)
+    offset, shape = location.split(b':')
+    offset = int(offset)
+    shape = [int(dim) for dim in shape.split(b',')]
+
+    with _open_stores_lock:
+        #keep the most recently used stores mapped
+        if store in _open_stores:
+            memmap = _open_stores.pop(store)
+        else:
+            memmap = np.memmap(store, dtype=np.float32, mode='r')
+            if len(_open_stores) >= _MAX_OPEN_STORES:
+                _open_stores.popitem(last=False)
+        _open_stores[store] = memmap
+
+    data = memmap[offset:offset + int(np.prod(shape))]
+
+    return np.asarray(data).reshape(shape)
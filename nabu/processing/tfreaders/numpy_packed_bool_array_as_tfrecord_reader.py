@@ -0,0 +1,54 @@
+'''@file numpy_packed_bool_array_as_tfrecord_reader.py
+contains the NumpyPackedBoolArrayAsTfrecordReader class'''
+
+import tensorflow as tf
+import numpy_bool_array_as_tfrecord_reader
+
+class NumpyPackedBoolArrayAsTfrecordReader(
+        numpy_bool_array_as_tfrecord_reader.NumpyBoolArrayAsTfrecordReader):
+    '''reader for numpy bool arrays that were written with 8 booleans per
+    byte'''
+
+    #every bit is decoded to a 32 bit integer
+    decoded_ratio = 32
+
+    def _create_features(self):
+        '''
+            creates the information about the features
+
+            Returns:
+                A dict mapping feature keys to FixedLenFeature, VarLenFeature,
+                and SparseFeature values
+        '''
+
+        return {'shape': tf.FixedLenFeature([], dtype=tf.string),
+                'data': tf.FixedLenFeature([], dtype=tf.string)}
+
+    def _process_features(self, features):
+        '''process the read features. The bits are unpacked and mapped to
+        integers
+
+        features:
+            A dict mapping feature keys to Tensor and SparseTensor values
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+
+        packed = tf.decode_raw(features['data'], tf.uint8)
+
+        #unpack the bits, the first bit is the most significant bit of a byte
+        masks = tf.constant([128, 64, 32, 16, 8, 4, 2, 1], dtype=tf.uint8)
+        data = tf.bitwise.bitwise_and(tf.expand_dims(packed, 1), masks)
+        data = tf.cast(tf.greater(data, 0), tf.int32)
+        data = tf.reshape(data, [-1])
+
+        #remove the padding bits of the last byte
+        shape = tf.cast(tf.decode_raw(features['shape'], tf.int64), tf.int32)
+        data = data[:tf.reduce_prod(shape)]
+
+        resh_dims = [-1] + self.metadata['nontime_dims']
+        data = tf.reshape(data, resh_dims)
+        sequence_length = tf.shape(data)[0]
+
+        return data, sequence_length
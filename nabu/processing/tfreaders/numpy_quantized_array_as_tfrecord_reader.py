@@ -0,0 +1,58 @@
+'''@file numpy_quantized_array_as_tfrecord_reader.py
+contains the NumpyQuantizedArrayAsTfrecordReader classes'''
+
+import tensorflow as tf
+import numpy_float_array_as_tfrecord_reader
+
+class NumpyQuantizedArrayAsTfrecordReader(
+        numpy_float_array_as_tfrecord_reader.NumpyFloatArrayAsTfrecordReader):
+    '''reader for numpy float arrays that were quantized to unsigned integers,
+    the data is dequantized with the scale and offset in the example'''
+
+    #the integer type used to store the data
+    dtype = None
+
+    def _create_features(self):
+        '''
+            creates the information about the features
+
+            Returns:
+                A dict mapping feature keys to FixedLenFeature, VarLenFeature,
+                and SparseFeature values
+        '''
+
+        return {'data': tf.FixedLenFeature([], dtype=tf.string),
+                'scale': tf.FixedLenFeature([], dtype=tf.float32),
+                'offset': tf.FixedLenFeature([], dtype=tf.float32)}
+
+    def _process_features(self, features):
+        '''process the read features
+
+        features:
+            A dict mapping feature keys to Tensor and SparseTensor values
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+
+        data = tf.decode_raw(features['data'], self.dtype)
+        data = tf.cast(data, tf.float32)*features['scale'] + features['offset']
+        resh_dims = [-1] + self.metadata['nontime_dims']
+        data = tf.reshape(data, resh_dims)
+        sequence_length = tf.shape(data)[0]
+
+        return data, sequence_length
+
+class NumpyUint8QuantizedArrayAsTfrecordReader(
+        NumpyQuantizedArrayAsTfrecordReader):
+    '''reader for numpy float arrays that were quantized to 8 bits'''
+
+    dtype = tf.uint8
+    decoded_ratio = 4
+
+class NumpyUint16QuantizedArrayAsTfrecordReader(
+        NumpyQuantizedArrayAsTfrecordReader):
+    '''reader for numpy float arrays that were quantized to 16 bits'''
+
+    dtype = tf.uint16
+    decoded_ratio = 2
@@ -1,6 +1,11 @@
 '''@file tfreader.py
 contains the TfReader class'''
 
+import os
+import struct
+import threading
+import collections
+import numpy as np
 from abc import ABCMeta, abstractmethod, abstractproperty
 import tensorflow as tf
 
@@ -9,6 +14,14 @@ class TfReader(object):
 
     __metaclass__ = ABCMeta
 
+    #whether the first dimension of the read data is time, only data with a
+    #time dimension is cropped to segments in the input pipeline
+    time_dimension = True
+
+    #the size of the decoded data relative to the size of the stored data,
+    #used to estimate the memory that cached examples take
+    decoded_ratio = 1
+
     def __init__(self, datadirs):
         '''TfReader constructor
 
@@ -20,6 +33,27 @@ class TfReader(object):
         #read the metadata
         self.metadata = self._read_metadata(datadirs)
 
+        #the histogram of the sequence lengths is used for bucketing, it is
+        #only written by some processors
+        histogram_files = [
+            os.path.join(datadir, 'sequence_length_histogram.npy')
+            for datadir in datadirs]
+        if all(os.path.exists(filename) for filename in histogram_files):
+            histograms = [np.load(filename) for filename in histogram_files]
+            histogram = np.zeros(max(len(h) for h in histograms),
+                                 dtype=np.int64)
+            for h in histograms:
+                histogram[:len(h)] += h
+            self.metadata['sequence_length_histogram'] = histogram
+
+        #check if the data was packed in shards
+        sharded = [os.path.exists(os.path.join(datadir, 'shards'))
+                   for datadir in datadirs]
+        if len(set(sharded)) > 1:
+            raise Exception(
+                'all data in a reader must be stored in the same way')
+        self.sharded = sharded[0]
+
         #create the features object
         self.features = self._create_features()
 
@@ -40,7 +74,14 @@ class TfReader(object):
         with tf.name_scope(name or type(self).__name__):
 
             #read all the elements in the queue
-            _, serialized = self.reader.read(queue)
+            if self.sharded:
+                #the queue contains pointers to records in a shard
+                serialized = tf.py_func(
+                    read_sharded_record, [queue.dequeue()], tf.string,
+                    stateful=False)
+                serialized.set_shape([])
+            else:
+                _, serialized = self.reader.read(queue)
 
             #parse the serialized strings into features
             features = tf.parse_single_example(serialized, self.features)
@@ -53,6 +94,74 @@ class TfReader(object):
 
         return processed
 
+    def records(self, pointers, num_parallel_reads=1):
+        '''create a dataset with the serialized records of examples, used by
+        the tf.data input pipeline. Tf record files are read natively,
+        records in shards are only read when they are parsed
+
+        Args:
+            pointers: a dataset of tf record files or of pointers to records
+                in shards
+            num_parallel_reads: the number of records that are read in
+                parallel
+
+        Returns:
+            a dataset with the serialized records or the pointers to the
+            records in shards, in the order of the pointers
+        '''
+
+        if self.sharded:
+            return pointers
+
+        #every file contains a single record, so the files that are read in
+        #parallel keep their order
+        return tf.data.TFRecordDataset(pointers,
+                                       num_parallel_reads=num_parallel_reads)
+
+    def parse(self, record, name=None):
+        '''parse and process a record, used by the tf.data input pipeline
+
+        Args:
+            record: an element of the dataset created by records
+            name: the name of the operation
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+        with tf.name_scope(name or type(self).__name__):
+
+            if self.sharded:
+                #the records in shards are read in the same parallel call
+                record = tf.py_func(read_sharded_record, [record], tf.string,
+                                    stateful=False)
+                record.set_shape([])
+
+            #parse the serialized string into features
+            features = tf.parse_single_example(record, self.features)
+
+            #process the parsed features
+            processed = self._process_features(features)
+
+        return processed
+
+    def example_size(self, pointer):
+        '''estimate the memory that a decoded example takes, used to decide
+        which examples fit in the example cache of the tf.data input pipeline
+
+        Args:
+            pointer: a tf record file or a pointer to a record in a shard
+
+        Returns:
+            the estimated size in bytes
+        '''
+
+        if self.sharded:
+            size = sharded_record_length(pointer)
+        else:
+            size = os.path.getsize(pointer)
+
+        return size*self.decoded_ratio
+
     @abstractmethod
     def _read_metadata(self, datadirs):
         '''read the metadata for the reader (writen by the processor)
@@ -85,3 +194,73 @@ class TfReader(object):
         Returns:
             a pair of tensor and sequence length
         '''
+
+#the shards that are currently opened for reading, every thread opens its own
+#shards so the records are read in parallel without a lock
+_open_shards = threading.local()
+_MAX_OPEN_SHARDS = 16
+
+def read_sharded_record(pointer):
+    '''read a single serialized record from a shard
+
+    Args:
+        pointer: a pointer to the record of the form shard@offset, with offset
+            the position of the record in the shard in bytes
+
+    Returns:
+        the serialized record
+    '''
+
+    shard, offset = pointer.rsplit(b'@', 1)
+
+    fid = _open_shard(shard)
+
+    #skip the masked crc of the length and read the data
+    fid.seek(int(offset))
+    length = struct.unpack('<Q', fid.read(8))[0]
+    fid.seek(4, 1)
+
+    return fid.read(length)
+
+def sharded_record_length(pointer):
+    '''read the length of a serialized record in a shard without reading the
+    record
+
+    Args:
+        pointer: a pointer to the record of the form shard@offset
+
+    Returns:
+        the length of the serialized record in bytes
+    '''
+
+    shard, offset = pointer.rsplit(b'@', 1)
+
+    fid = _open_shard(shard)
+    fid.seek(int(offset))
+
+    return struct.unpack('<Q', fid.read(8))[0]
+
+def _open_shard(shard):
+    '''get a shard that is opened by the calling thread, the most recently
+    used shards of every thread are kept open
+
+    Args:
+        shard: the path to the shard
+
+    Returns:
+        the file object of the shard
+    '''
+
+    if not hasattr(_open_shards, 'shards'):
+        _open_shards.shards = collections.OrderedDict()
+    shards = _open_shards.shards
+
+    if shard in shards:
+        fid = shards.pop(shard)
+    else:
+        fid = open(shard, 'rb')
+        if len(shards) >= _MAX_OPEN_SHARDS:
+            shards.popitem(last=False)[1].close()
+    shards[shard] = fid
+
+    return fid
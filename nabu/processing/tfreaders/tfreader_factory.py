@@ -2,7 +2,9 @@
 contains the tfreader factory'''
 
 from . import numpy_float_array_as_tfrecord_reader, numpy_bool_array_as_tfrecord_reader, \
-    index_list_as_tfrecord_reader, float_list_as_tfrecord_reader
+    index_list_as_tfrecord_reader, float_list_as_tfrecord_reader, \
+    numpy_packed_bool_array_as_tfrecord_reader, numpy_float16_array_as_tfrecord_reader, \
+    numpy_quantized_array_as_tfrecord_reader, numpy_float_array_as_memmap_reader
 
 def factory(writer_style):
     '''factory for tfreaders
@@ -18,6 +20,16 @@ def factory(writer_style):
         return numpy_float_array_as_tfrecord_reader.NumpyFloatArrayAsTfrecordReader
     elif writer_style == 'numpy_bool_array_as_tfrecord':
         return numpy_bool_array_as_tfrecord_reader.NumpyBoolArrayAsTfrecordReader
+    elif writer_style == 'numpy_packed_bool_array_as_tfrecord':
+        return numpy_packed_bool_array_as_tfrecord_reader.NumpyPackedBoolArrayAsTfrecordReader
+    elif writer_style == 'numpy_float16_array_as_tfrecord':
+        return numpy_float16_array_as_tfrecord_reader.NumpyFloat16ArrayAsTfrecordReader
+    elif writer_style == 'numpy_uint8_quantized_array_as_tfrecord':
+        return numpy_quantized_array_as_tfrecord_reader.NumpyUint8QuantizedArrayAsTfrecordReader
+    elif writer_style == 'numpy_uint16_quantized_array_as_tfrecord':
+        return numpy_quantized_array_as_tfrecord_reader.NumpyUint16QuantizedArrayAsTfrecordReader
+    elif writer_style == 'numpy_float_array_as_memmap':
+        return numpy_float_array_as_memmap_reader.NumpyFloatArrayAsMemmapReader
     elif writer_style == 'index_list_as_tfrecord':
         return index_list_as_tfrecord_reader.IndexListAsTfrecordReader
     elif writer_style == 'float_list_as_tfrecord':
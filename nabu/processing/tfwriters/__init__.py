@@ -2,4 +2,7 @@
 contains the objects for writing tensorflow record files'''
 
 from . import tfwriter, numpy_float_array_as_tfrecord_writer, numpy_bool_array_as_tfrecord_writer, \
-  index_list_as_tfrecord_writer, float_list_as_tfrecord_writer
\ No newline at end of file
+  index_list_as_tfrecord_writer, float_list_as_tfrecord_writer, \
+  numpy_packed_bool_array_as_tfrecord_writer, numpy_float16_array_as_tfrecord_writer, \
+  numpy_quantized_array_as_tfrecord_writer, \
+  numpy_float_array_as_memmap_writer
\ No newline at end of file
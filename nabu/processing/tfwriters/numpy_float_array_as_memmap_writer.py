@@ -0,0 +1,75 @@
+'''@file numpy_float_array_as_memmap_writer.py
+contains the NumpyFloatArrayAsMemmapWriter class'''
+
+import os
+import numpy as np
+import tfwriter
+
+class NumpyFloatArrayAsMemmapWriter(tfwriter.TfWriter):
+    '''a writer to write numpy float arrays in a contiguous store. All examples
+    are appended to a single raw float32 file, so they can be read with a
+    memory map without parsing. The pointers have the form
+    store@offset:shape, with offset the position of the example in the store in
+    elements and shape the comma seperated dimensions of the example'''
+
+    def __init__(self, datadir, examples_per_shard=0, megabytes_per_shard=0):
+        '''NumpyFloatArrayAsMemmapWriter constructor
+
+        Args:
+            datadir: the directory where the data will be written
+            examples_per_shard: not used, all examples are written to the same
+                store
+            megabytes_per_shard: not used, all examples are written to the
+                same store
+        '''
+
+        super(NumpyFloatArrayAsMemmapWriter, self).__init__(datadir)
+
+        #a resumed data preparation writes to a new store
+        self.store_file = os.path.join(self.write_dir, 'store%d' % self.filenum)
+        self.filenum += 1
+        self.store_fid = open(self.store_file, 'ab')
+        self.store_offset = 0
+
+    def write(self, data, name):
+        '''write data to the store
+
+        Args:
+            data: the data to be written
+            name: the name of the data'''
+
+        if np.iscomplexobj(data):
+            raise Exception('the memmap writer can not write complex data')
+
+        data = np.ascontiguousarray(data, dtype=np.float32)
+        self.store_fid.write(data.tostring())
+
+        pointer = '%s@%d:%s' % (self.store_file, self.store_offset,
+                                ','.join(map(str, data.shape)))
+        self.store_offset += data.size
+
+        #put a pointer in the scp file
+        self.scp_fid.write('%s\t%s\n' % (name, pointer))
+
+    def flush(self):
+        '''make sure all the written examples are on disk'''
+
+        self.store_fid.flush()
+        os.fsync(self.store_fid.fileno())
+
+        super(NumpyFloatArrayAsMemmapWriter, self).flush()
+
+    def close(self):
+        '''close all open files, should be called when all data is written'''
+
+        self.store_fid.close()
+
+        super(NumpyFloatArrayAsMemmapWriter, self).close()
+
+    def _get_example(self, data):
+        '''the examples are not written as TF records
+
+        Args:
+            data: the data to be written'''
+
+        raise Exception('a memmap writer does not create examples')
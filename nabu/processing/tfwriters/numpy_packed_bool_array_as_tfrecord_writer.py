@@ -0,0 +1,28 @@
+'''@file numpy_packed_bool_array_as_tfrecord_writer.py
+contains the NumpyPackedBoolArrayAsTfrecordWriter class'''
+
+import numpy as np
+import tensorflow as tf
+import tfwriter
+
+class NumpyPackedBoolArrayAsTfrecordWriter(tfwriter.TfWriter):
+    '''a TfWriter to write numpy boolean arrays with 8 booleans per byte'''
+
+    def _get_example(self, data):
+        '''write data to a file
+
+        Args:
+            data: the data to be written'''
+
+        shape_feature = tf.train.Feature(bytes_list=tf.train.BytesList(
+            value=[np.array(data.shape, dtype=np.int64).tostring()]))
+        data_feature = tf.train.Feature(bytes_list=tf.train.BytesList(
+            value=[np.packbits(data.reshape([-1]).astype(np.bool)).tostring()]))
+
+
+        #create the example proto
+        example = tf.train.Example(features=tf.train.Features(feature={
+            'shape': shape_feature,
+            'data': data_feature}))
+
+        return example
@@ -0,0 +1,63 @@
+'''@file numpy_quantized_array_as_tfrecord_writer.py
+contains the NumpyQuantizedArrayAsTfrecordWriter classes'''
+
+import numpy as np
+import tensorflow as tf
+import tfwriter
+
+class NumpyQuantizedArrayAsTfrecordWriter(tfwriter.TfWriter):
+    '''a TfWriter to write numpy float arrays as unsigned integers. Every
+    example is quantized linearly between its minimum and maximum value, the
+    scale and offset are stored in the example'''
+
+    #the integer type used to store the data
+    dtype = None
+
+    def _get_example(self, data):
+        '''write data to a file
+
+        Args:
+            data: the data to be written'''
+
+        data = data.astype(np.float64)
+        levels = np.iinfo(self.dtype).max
+
+        #map the data linearly on the integer range, the scale and offset are
+        #stored in single precision
+        offset = np.float32(np.min(data))
+        scale = np.float32((np.max(data) - offset)/levels)
+        if scale == 0:
+            scale = np.float32(1)
+        quantized = np.clip(np.round((data - offset)/scale), 0, levels)
+        quantized = quantized.astype(self.dtype)
+
+        shape_feature = tf.train.Feature(bytes_list=tf.train.BytesList(
+            value=[np.array(data.astype(np.int32).shape).tostring()]))
+        data_feature = tf.train.Feature(bytes_list=tf.train.BytesList(
+            value=[quantized.reshape([-1]).tostring()]))
+        scale_feature = tf.train.Feature(float_list=tf.train.FloatList(
+            value=[scale]))
+        offset_feature = tf.train.Feature(float_list=tf.train.FloatList(
+            value=[offset]))
+
+
+        #create the example proto
+        example = tf.train.Example(features=tf.train.Features(feature={
+            'shape': shape_feature,
+            'data': data_feature,
+            'scale': scale_feature,
+            'offset': offset_feature}))
+
+        return example
+
+class NumpyUint8QuantizedArrayAsTfrecordWriter(
+        NumpyQuantizedArrayAsTfrecordWriter):
+    '''a TfWriter to write numpy float arrays quantized to 8 bits'''
+
+    dtype = np.uint8
+
+class NumpyUint16QuantizedArrayAsTfrecordWriter(
+        NumpyQuantizedArrayAsTfrecordWriter):
+    '''a TfWriter to write numpy float arrays quantized to 16 bits'''
+
+    dtype = np.uint16
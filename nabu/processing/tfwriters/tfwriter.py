@@ -2,6 +2,7 @@
 contains the TfWriter class'''
 
 import os
+import string
 from abc import ABCMeta, abstractmethod
 import tensorflow as tf
 
@@ -10,11 +11,15 @@ class TfWriter(object):
 
     __metaclass__ = ABCMeta
 
-    def __init__(self, datadir):
+    def __init__(self, datadir, examples_per_shard=0, megabytes_per_shard=0):
         '''TfWriter constructor
 
         Args:
             datadir: the directory where the data will be written
+            examples_per_shard: if larger than 0, the examples are packed in
+                shards that contain this many examples
+            megabytes_per_shard: if larger than 0, the examples are packed in
+                shards that are (approximately) this large
         '''
 
         if not os.path.exists(datadir):
@@ -23,13 +28,27 @@ class TfWriter(object):
 
         #store the path to the scp file
         self.scp_file = os.path.join(datadir, 'pointers.scp')
+        self.scp_fid = open(self.scp_file, 'a')
 
         #store te path to the write directory
         self.write_dir = os.path.join(datadir, 'data')
-        os.makedirs(self.write_dir)
-
-        #set the current file number to 0
-        self.filenum = 0
+        if os.path.isdir(self.write_dir):
+            #the data preparation is resumed, continue the file numbering
+            numbers = [int(filename.lstrip(string.ascii_letters))
+                       for filename in os.listdir(self.write_dir)]
+            self.filenum = max(numbers + [-1]) + 1
+        else:
+            os.makedirs(self.write_dir)
+
+            #set the current file number to 0
+            self.filenum = 0
+
+        #set the sharding parameters
+        self.datadir = datadir
+        self.examples_per_shard = int(examples_per_shard)
+        self.bytes_per_shard = int(float(megabytes_per_shard)*2**20)
+        self.sharded = self.examples_per_shard > 0 or self.bytes_per_shard > 0
+        self.shard_writer = None
 
     def write(self, data, name):
         '''write data to a file
@@ -40,19 +59,86 @@ class TfWriter(object):
 
         #creater the example
         example = self._get_example(data)
+        serialized = example.SerializeToString()
+
+        if self.sharded:
+            pointer = self._write_to_shard(serialized)
+        else:
+            #the filename for this example
+            filename = os.path.join(self.write_dir, 'file%d' % self.filenum)
+            self.filenum += 1
 
-        #the filename for this example
-        filename = os.path.join(self.write_dir, 'file%d' % self.filenum)
-        self.filenum += 1
+            #write the example to file
+            writer = tf.python_io.TFRecordWriter(filename)
+            writer.write(serialized)
+            writer.close()
 
-        #write the example to file
-        writer = tf.python_io.TFRecordWriter(filename)
-        writer.write(example.SerializeToString())
-        writer.close()
+            pointer = filename
 
         #put a pointer in the scp file
-        with open(self.scp_file, 'a') as fid:
-            fid.write('%s\t%s\n' % (name, filename))
+        self.scp_fid.write('%s\t%s\n' % (name, pointer))
+
+    def _write_to_shard(self, serialized):
+        '''write a serialized example to the current shard, a new shard is
+        started if the current one is full
+
+        Args:
+            serialized: the serialized example
+
+        Returns:
+            a pointer to the example of the form shard@offset, with offset the
+            position of the record in the shard in bytes'''
+
+        if self.shard_writer is not None and (
+                (self.examples_per_shard > 0
+                 and self.shard_examples >= self.examples_per_shard) or
+                (self.bytes_per_shard > 0
+                 and self.shard_offset >= self.bytes_per_shard)):
+            self.shard_writer.close()
+            self.shard_writer = None
+
+        if self.shard_writer is None:
+            self.shard_file = os.path.join(self.write_dir,
+                                           'shard%d' % self.filenum)
+            self.filenum += 1
+            self.shard_writer = tf.python_io.TFRecordWriter(self.shard_file)
+            self.shard_examples = 0
+            self.shard_offset = 0
+
+        pointer = '%s@%d' % (self.shard_file, self.shard_offset)
+        self.shard_writer.write(serialized)
+
+        #a record consists of the length (8 bytes), the masked crc of the
+        #length (4 bytes), the data and the masked crc of the data (4 bytes)
+        self.shard_offset += len(serialized) + 16
+        self.shard_examples += 1
+
+        return pointer
+
+    def flush(self):
+        '''make sure all the written examples are on disk. The current shard is
+        closed so the next example is written to a new shard'''
+
+        if self.shard_writer is not None:
+            self.shard_writer.close()
+            self.shard_writer = None
+
+        self.scp_fid.flush()
+        os.fsync(self.scp_fid.fileno())
+
+    def close(self):
+        '''close all open files, should be called when all data is written'''
+
+        if self.shard_writer is not None:
+            self.shard_writer.close()
+            self.shard_writer = None
+
+        if self.sharded:
+            #let the readers know the data is stored in shards
+            with open(os.path.join(self.datadir, 'shards'), 'w') as fid:
+                fid.write(str(self.filenum))
+
+        self.scp_fid.close()
 
     @abstractmethod
     def _get_example(self, data):
@@ -2,7 +2,9 @@
 contains the tfwriter factory'''
 
 from . import numpy_float_array_as_tfrecord_writer, numpy_bool_array_as_tfrecord_writer, \
-    index_list_as_tfrecord_writer, float_list_as_tfrecord_writer
+    index_list_as_tfrecord_writer, float_list_as_tfrecord_writer, \
+    numpy_packed_bool_array_as_tfrecord_writer, numpy_float16_array_as_tfrecord_writer, \
+    numpy_quantized_array_as_tfrecord_writer, numpy_float_array_as_memmap_writer
 
 def factory(writer_style):
     '''
@@ -17,6 +19,16 @@ def factory(writer_style):
         return numpy_float_array_as_tfrecord_writer.NumpyFloatArrayAsTfrecordWriter
     elif writer_style == 'numpy_bool_array_as_tfrecord':
         return numpy_bool_array_as_tfrecord_writer.NumpyBoolArrayAsTfrecordWriter
+    elif writer_style == 'numpy_packed_bool_array_as_tfrecord':
+        return numpy_packed_bool_array_as_tfrecord_writer.NumpyPackedBoolArrayAsTfrecordWriter
+    elif writer_style == 'numpy_float16_array_as_tfrecord':
+        return numpy_float16_array_as_tfrecord_writer.NumpyFloat16ArrayAsTfrecordWriter
+    elif writer_style == 'numpy_uint8_quantized_array_as_tfrecord':
+        return numpy_quantized_array_as_tfrecord_writer.NumpyUint8QuantizedArrayAsTfrecordWriter
+    elif writer_style == 'numpy_uint16_quantized_array_as_tfrecord':
+        return numpy_quantized_array_as_tfrecord_writer.NumpyUint16QuantizedArrayAsTfrecordWriter
+    elif writer_style == 'numpy_float_array_as_memmap':
+        return numpy_float_array_as_memmap_writer.NumpyFloatArrayAsMemmapWriter
     elif writer_style == 'index_list_as_tfrecord':
         return index_list_as_tfrecord_writer.IndexListAsTfrecordWriter
     elif writer_style == 'float_list_as_tfrecord':
@@ -0,0 +1,121 @@
+'''@file check_packed_bool_roundtrip.py
+checks that boolean arrays that are written with 8 booleans per byte are read
+back unchanged and compares the size and the reading time with the writer
+that uses a byte per boolean'''
+
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import tensorflow as tf
+from nabu.processing.tfwriters import tfwriter_factory
+from nabu.processing.tfreaders import tfreader_factory
+
+#the non time dimensions of the checked arrays, the sizes of the arrays are
+#not all multiples of 8, so the padding bits of the last byte are checked
+NONTIME_DIMS = [[129], [129, 2], [7]]
+
+def main(num_examples=20, max_length=750, seed=0):
+    '''write random boolean arrays with the packed and the byte per boolean
+    writers, in files and in shards, read them back and compare them with the
+    written arrays, an exception is raised if they differ
+
+    Args:
+        num_examples: the number of examples per store
+        max_length: the maximal number of frames of an example
+        seed: the seed of the random arrays
+    '''
+
+    rng = np.random.RandomState(seed)
+    tmpdir = tempfile.mkdtemp()
+
+    try:
+        for nontime_dims in NONTIME_DIMS:
+            arrays = [rng.rand(*([rng.randint(1, max_length)] + nontime_dims))
+                      > 0.5 for _ in range(num_examples)]
+
+            for writer_style in ['numpy_bool_array_as_tfrecord',
+                                 'numpy_packed_bool_array_as_tfrecord']:
+                for examples_per_shard in [0, 8]:
+                    datadir = os.path.join(tmpdir, '%s_%s_%d' % (
+                        writer_style, '_'.join(map(str, nontime_dims)),
+                        examples_per_shard))
+                    _write(writer_style, datadir, arrays, nontime_dims,
+                           examples_per_shard)
+                    read, seconds = _read(writer_style, datadir)
+
+                    for i, (array, data) in enumerate(zip(arrays, read)):
+                        if not np.array_equal(array.astype(np.int32), data):
+                            raise Exception(
+                                'example %d of %s differs from the written '
+                                'array' % (i, datadir))
+
+                    size = sum(os.path.getsize(os.path.join(
+                        datadir, 'data', filename))
+                               for filename in os.listdir(
+                                   os.path.join(datadir, 'data')))
+                    print '%s, dims %s, %d examples per shard: %d bytes, ' \
+                        'read in %.2f ms per example' % (
+                            writer_style, nontime_dims, examples_per_shard,
+                            size, 1000*seconds/num_examples)
+
+        print 'the packed boolean arrays are read back unchanged'
+
+    finally:
+        shutil.rmtree(tmpdir)
+
+def _write(writer_style, datadir, arrays, nontime_dims, examples_per_shard):
+    '''write the arrays and the metadata the reader needs
+
+    Args:
+        writer_style: the writer style
+        datadir: the directory where the arrays are written
+        arrays: the boolean arrays
+        nontime_dims: the non time dimensions of the arrays
+        examples_per_shard: the number of examples per shard, 0 to write
+            every example to its own file
+    '''
+
+    writer = tfwriter_factory.factory(writer_style)(
+        datadir, examples_per_shard=examples_per_shard)
+    for i, array in enumerate(arrays):
+        writer.write(array, 'utt%d' % i)
+    writer.close()
+
+    with open(os.path.join(datadir, 'nontime_dims'), 'w') as fid:
+        fid.write(str(nontime_dims)[1:-1])
+
+def _read(writer_style, datadir):
+    '''read all the arrays in a directory with the tf.data reading functions
+    of the reader
+
+    Args:
+        writer_style: the writer style the arrays were written with
+        datadir: the directory where the arrays were written
+
+    Returns:
+        - the read arrays in the order they were written
+        - the time it took to read and decode them in seconds
+    '''
+
+    with open(os.path.join(datadir, 'pointers.scp')) as fid:
+        pointers = [line.strip().split('\t')[1] for line in fid]
+
+    graph = tf.Graph()
+    with graph.as_default():
+        reader = tfreader_factory.factory(writer_style)([datadir])
+        dataset = reader.records(
+            tf.data.Dataset.from_tensor_slices(pointers))
+        dataset = dataset.map(lambda record: reader.parse(record)[0])
+        data = dataset.make_one_shot_iterator().get_next()
+
+        with tf.Session(graph=graph) as sess:
+            start = time.time()
+            read = [sess.run(data) for _ in pointers]
+            seconds = time.time() - start
+
+    return read, seconds
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+'''@file check_parallel_histogram.py
+checks that a section that is prepared with multiple processes and resumed
+gets the same sequence length histogram and maximal length as a section that
+is prepared with a single process in one run'''
+
+import os
+import shutil
+import tempfile
+from six.moves import configparser
+import numpy as np
+import scipy.io.wavfile as wav
+from nabu.scripts import data
+
+#the configuration of the processor of the checked sections
+PROCESSOR_CONF = {
+    'processor': 'audio_feat_processor',
+    'feature': 'logspec',
+    'winlen': '0.032',
+    'winstep': '0.016',
+    'winfunc': 'hanning',
+    'nfft': '256',
+    'preemph': '0.97',
+    'include_energy': 'False',
+    'mvn_type': 'None'}
+
+def main(num_utts=40, num_processes=2, checkpoint_interval=7):
+    '''prepare the same utterances with a single process in one run and with
+    multiple processes in two runs, the first run only prepares the first
+    half of the utterances
+
+    Args:
+        num_utts: the number of utterances
+        num_processes: the number of processes of the parallel sections
+        checkpoint_interval: the number of utterances between two checkpoints
+    '''
+
+    tmpdir = tempfile.mkdtemp()
+
+    try:
+        #write utterances with random lengths
+        rng = np.random.RandomState(0)
+        lines = []
+        for i in range(num_utts):
+            wavfile = os.path.join(tmpdir, 'utt%d.wav' % i)
+            utt = rng.randn(rng.randint(2400, 16000))*1000
+            wav.write(wavfile, 8000, utt.astype(np.int16))
+            lines.append('utt%d %s\n' % (i, wavfile))
+
+        full_datafile = os.path.join(tmpdir, 'full.scp')
+        with open(full_datafile, 'w') as fid:
+            fid.writelines(lines)
+        half_datafile = os.path.join(tmpdir, 'half.scp')
+        with open(half_datafile, 'w') as fid:
+            fid.writelines(lines[:num_utts//2])
+
+        #prepare all utterances with a single process
+        single_dir = os.path.join(tmpdir, 'single')
+        _prepare(single_dir, full_datafile, 1, checkpoint_interval)
+
+        #prepare half the utterances with multiple processes and resume to
+        #prepare the other half
+        parallel_dir = os.path.join(tmpdir, 'parallel')
+        _prepare(parallel_dir, half_datafile, num_processes,
+                 checkpoint_interval)
+        _prepare(parallel_dir, full_datafile, num_processes,
+                 checkpoint_interval)
+
+        for name in ['sequence_length_histogram.npy', 'max_length']:
+            single = _read(os.path.join(single_dir, 'store', 'full', name))
+            parallel = _read(os.path.join(parallel_dir, 'store', 'full', name))
+            if not np.array_equal(single, parallel):
+                raise Exception(
+                    '%s differs between the single process and the resumed '
+                    'parallel data preparation:\n%s\n%s'
+                    % (name, single, parallel))
+
+        print 'the resumed parallel data preparation has the same metadata'
+
+    finally:
+        shutil.rmtree(tmpdir)
+
+def _prepare(expdir, datafile, num_processes, checkpoint_interval):
+    '''prepare a section
+
+    Args:
+        expdir: the directory of the section, the data is stored in the store
+            directory in expdir
+        datafile: the datafile of the section
+        num_processes: the number of processes
+        checkpoint_interval: the number of utterances between two checkpoints
+    '''
+
+    if not os.path.isdir(expdir):
+        os.makedirs(expdir)
+
+    database_cfg = configparser.ConfigParser()
+    database_cfg.add_section('section')
+    database_cfg.set('section', 'datafiles', datafile)
+    database_cfg.set('section', 'store_dir', os.path.join(expdir, 'store'))
+    database_cfg.set('section', 'writer_style', 'numpy_float_array_as_tfrecord')
+    database_cfg.set('section', 'num_processes', str(num_processes))
+    database_cfg.set('section', 'checkpoint_interval', str(checkpoint_interval))
+    with open(os.path.join(expdir, 'database.cfg'), 'w') as fid:
+        database_cfg.write(fid)
+
+    processor_cfg = configparser.ConfigParser()
+    processor_cfg.add_section('processor')
+    for option, value in PROCESSOR_CONF.items():
+        processor_cfg.set('processor', option, value)
+    with open(os.path.join(expdir, 'processor.cfg'), 'w') as fid:
+        processor_cfg.write(fid)
+
+    data.main(expdir)
+
+def _read(filename):
+    '''read a metadata file
+
+    Args:
+        filename: the metadata file, a numpy file or a text file with a number
+
+    Returns:
+        the metadata as a numpy array, a histogram without trailing zeros'''
+
+    if filename.endswith('.npy'):
+        return np.trim_zeros(np.load(filename), 'b')
+
+    with open(filename) as fid:
+        return np.array(float(fid.read()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+'''@file compare_feature_precision.py
+compares the features that are computed in single precision with the features
+that are computed in double precision'''
+
+import numpy as np
+from nabu.processing.feature_computers import feature_computer_factory
+
+#the feature configuration that is shared by the compared features
+FEATURE_CONF = {
+    'winlen': '0.025',
+    'winstep': '0.01',
+    'winfunc': 'hamming',
+    'nfft': '512',
+    'preemph': '0.97',
+    'nfilt': '40',
+    'numcep': '13',
+    'ceplifter': '22',
+    'lowfreq': '0',
+    'highfreq': '-1',
+    'include_energy': 'False',
+    'dynamic': 'nodelta'}
+
+#the log spectrum error is reported for the bins in these ranges of dB below
+#the strongest bin of their frame
+DB_RANGES = [0, 20, 40, 60, 80, 100, 120]
+
+def main(rate=16000, duration=5, seed=0):
+    '''compute the features of a test signal in single and double precision and
+    print the errors of the single precision features
+
+    Args:
+        rate: the sampling rate of the test signal
+        duration: the duration of the test signal in seconds
+        seed: the seed of the random noise in the test signal
+    '''
+
+    sig = _test_signal(rate, duration, seed)
+
+    for feature in ['magspec', 'logspec', 'fbank', 'mfcc']:
+        single = _compute(feature, sig, rate, 'float32')
+        double = _compute(feature, sig, rate, 'float64')
+
+        if single.dtype != np.float32:
+            raise Exception('the single precision %s features are %s'
+                            % (feature, single.dtype))
+
+        error = np.abs(single.astype(np.float64) - double)
+
+        if feature == 'logspec':
+            #the log spectrum is in dB, the error is reported in dB
+            below = double.max(-1, keepdims=True) - double
+            for low, high in zip(DB_RANGES[:-1], DB_RANGES[1:]):
+                selected = (below >= low) & (below < high)
+                if selected.any():
+                    print '%s: max error %.4f dB for bins %d to %d dB below ' \
+                        'the strongest bin of their frame' % (
+                            feature, error[selected].max(), low, high)
+        else:
+            #the error is relative to the largest feature of every frame
+            scale = np.abs(double).max(-1, keepdims=True)
+            print '%s: max relative error %.2e' % (
+                feature, (error/np.maximum(scale, 1e-30)).max())
+
+def _compute(feature, sig, rate, dtype):
+    '''compute features in a data type
+
+    Args:
+        feature: the feature type
+        sig: the audio signal
+        rate: the sampling rate
+        dtype: the data type of the features
+
+    Returns:
+        the features as a [seq_length x feature_dim] numpy array
+    '''
+
+    conf = dict(FEATURE_CONF)
+    conf['dtype'] = dtype
+
+    return feature_computer_factory.factory(feature)(conf)(sig, rate)
+
+def _test_signal(rate, duration, seed):
+    '''create a test signal with a large dynamic range: harmonics with a
+    changing fundamental frequency and very weak noise, the signal is not
+    quantised, so the weak bins are not hidden by quantisation noise
+
+    Args:
+        rate: the sampling rate
+        duration: the duration in seconds
+        seed: the seed of the noise
+
+    Returns:
+        the signal as a float64 numpy array in the range of 16 bit audio
+    '''
+
+    rng = np.random.RandomState(seed)
+    time = np.arange(int(rate*duration))/float(rate)
+    phase = 2*np.pi*np.cumsum(150 + 50*np.sin(2*np.pi*0.5*time))/rate
+    sig = sum(np.sin(harmonic*phase)/harmonic**2 for harmonic in range(1, 40))
+    sig += 1e-6*rng.randn(len(time))
+
+    return sig/np.abs(sig).max()*30000
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+'''@file compare_framing.py
+compares the strided framing and the block overlap-add of sigproc with a
+straightforward frame by frame implementation, in single and double
+precision'''
+
+import timeit
+import numpy as np
+from nabu.processing.feature_computers import sigproc
+
+#the (frame length, frame step) pairs that are compared, including steps that
+#do not divide the frame length and steps that are as long as the frame
+FRAMINGS = [(256, 64), (400, 160), (512, 200), (200, 200)]
+
+#the signal lengths that are compared, including a signal that is shorter
+#than a frame
+SIGNAL_LENGTHS = [100, 8000, 48123]
+
+#the largest allowed error relative to the largest sample per data type
+TOLERANCES = {np.float32: 1e-6, np.float64: 1e-12}
+
+def main(seed=0, repeat=20):
+    '''compare the framing and the overlap-add with the reference
+    implementations, an exception is raised if they differ more than the
+    tolerance of the data type
+
+    Args:
+        seed: the seed of the random test signals
+        repeat: the number of times every implementation is timed
+    '''
+
+    rng = np.random.RandomState(seed)
+
+    for frame_len, frame_step in FRAMINGS:
+        for siglen in SIGNAL_LENGTHS:
+            #two signals are stacked to check the leading dimensions
+            sigs = rng.randn(2, siglen)*1000
+
+            for dtype in [np.float32, np.float64]:
+                frames = sigproc.framesig(sigs, frame_len, frame_step,
+                                          np.hanning, dtype)
+                ref_frames = np.array([_framesig(sig, frame_len, frame_step)
+                                       for sig in sigs])
+                _check('framesig', frames, ref_frames, dtype)
+
+                #deframesig divides by the sum of the windows, which hides
+                #frames that are not added, so the sums are compared as well
+                sums = sigproc.overlap_add(frames, frame_step)
+                ref_sums = np.array([
+                    _overlap_add(sig_frames.astype(np.float64), frame_step)
+                    for sig_frames in frames])
+                _check('overlap_add', sums, ref_sums, dtype)
+
+                signals = sigproc.deframesig(frames, siglen, frame_len,
+                                             frame_step, np.hanning)
+                ref_signals = np.array([
+                    _deframesig(sig_frames.astype(np.float64), siglen,
+                                frame_len, frame_step)
+                    for sig_frames in frames])
+                _check('deframesig', signals, ref_signals, dtype)
+
+        #time the implementations on the longest signal
+        sig = sigs[0]
+        frames = sigproc.framesig(sig, frame_len, frame_step, np.hanning,
+                                  np.float64)
+        timings = [
+            ('framesig', lambda: sigproc.framesig(
+                sig, frame_len, frame_step, np.hanning, np.float64)),
+            ('reference framesig', lambda: _framesig(
+                sig, frame_len, frame_step)),
+            ('deframesig', lambda: sigproc.deframesig(
+                frames, len(sig), frame_len, frame_step, np.hanning)),
+            ('reference deframesig', lambda: _deframesig(
+                frames, len(sig), frame_len, frame_step))]
+        for name, function in timings:
+            print 'frame length %d, step %d: %s %.3f ms' % (
+                frame_len, frame_step, name,
+                1000*min(timeit.repeat(function, number=1, repeat=repeat)))
+
+    print 'the framing and the overlap-add match the reference implementations'
+
+def _check(name, result, reference, dtype):
+    '''check that a result matches the reference
+
+    Args:
+        name: the name of the compared function
+        result: the result of sigproc
+        reference: the result of the reference implementation
+        dtype: the data type the result was computed in
+    '''
+
+    error = (np.abs(result.astype(np.float64) - reference).max()
+             /np.abs(reference).max())
+
+    if error > TOLERANCES[dtype]:
+        raise Exception('%s in %s differs from the reference: relative '
+                        'error %.2e' % (name, np.dtype(dtype).name, error))
+
+def _framesig(sig, frame_len, frame_step):
+    '''frame a signal frame by frame in double precision with a hanning
+    window
+
+    Args:
+        sig: the signal as a 1-D numpy array
+        frame_len: the length of a frame in samples
+        frame_step: the number of samples between the starts of two frames
+
+    Returns:
+        the frames as a [numframes x frame_len] numpy array
+    '''
+
+    numframes = sigproc.num_frames(len(sig), frame_len, frame_step)
+    padsignal = np.zeros((numframes-1)*frame_step + frame_len)
+    padsignal[:len(sig)] = sig
+    win = np.hanning(frame_len)
+
+    return np.array([padsignal[i*frame_step:i*frame_step+frame_len]*win
+                     for i in range(numframes)])
+
+def _overlap_add(frames, frame_step):
+    '''add the frames of a signal frame by frame
+
+    Args:
+        frames: the frames as a [numframes x frame_len] numpy array
+        frame_step: the number of samples between the starts of two frames
+
+    Returns:
+        the summed signal as a 1-D numpy array
+    '''
+
+    numframes, frame_len = frames.shape
+    signal = np.zeros((numframes-1)*frame_step + frame_len)
+
+    for i in range(numframes):
+        signal[i*frame_step:i*frame_step+frame_len] += frames[i]
+
+    return signal
+
+def _deframesig(frames, siglen, frame_len, frame_step):
+    '''add the frames of a signal frame by frame and divide by the sum of the
+    hanning windows
+
+    Args:
+        frames: the frames as a [numframes x frame_len] numpy array
+        siglen: the length of the signal
+        frame_len: the length of a frame in samples
+        frame_step: the number of samples between the starts of two frames
+
+    Returns:
+        the signal as a 1-D numpy array
+    '''
+
+    #add a little bit so the correction is never zero
+    windows = np.tile(np.hanning(frame_len) + 1e-15, (len(frames), 1))
+    correction = _overlap_add(windows, frame_step)
+
+    return (_overlap_add(frames, frame_step)/correction)[:siglen]
+
+if __name__ == '__main__':
+    main()
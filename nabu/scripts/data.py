@@ -3,14 +3,40 @@ does the data preperation'''
 
 import os
 from six.moves import configparser
-import gzip
+from six.moves import cPickle as pickle
+from six.moves import queue
+import hashlib
+import multiprocessing
+import threading
+import traceback
+import collections
+import numpy as np
 import tensorflow as tf
 from nabu.processing.processors import processor_factory
+from nabu.processing.processors.processor import datalines
 from nabu.processing.tfwriters import tfwriter_factory
+from nabu.processing import feature_cache
+from nabu.processing import audio_reader
+from nabu.processing import pointer_index
 import pdb
 
-def main(expdir):
-    '''main function'''
+#the number of seconds the data preparation waits for processed data before
+#it checks if the workers are still running
+_WORKER_CHECK_INTERVAL = 10
+
+def main(expdir, stage='all'):
+    '''main function
+
+    Args:
+        expdir: the directory containing the database and processor
+            configuration of the section
+        stage: the part of the data preparation that is done. If the section
+            is prepared in shards, stats computes the statistics of a shard
+            and merge combines the prepared shards, otherwise all is used.'''
+
+    if stage == 'merge':
+        merge(expdir)
+        return
 
     #read the data conf file
     parsed_cfg = configparser.ConfigParser()
@@ -28,54 +54,196 @@ def main(expdir):
     else:
         segment_lengths = ['full']
 
-    if not os.path.exists(conf['store_dir']):
-        os.makedirs(conf['store_dir'])
+    #the number of processes that will process the data in parallel
+    if 'num_processes' in conf:
+        num_processes = int(conf['num_processes'])
     else:
-        print '%s already exists, skipping this section' % conf['store_dir']
-        return
+        num_processes = 1
+
+    #the number of utterances that are processed between two checkpoints
+    if 'checkpoint_interval' in conf:
+        checkpoint_interval = int(conf['checkpoint_interval'])
+    else:
+        checkpoint_interval = 1000
+
+    #the number of commands (e.g. sph2pipe or sox) that decode audio in the
+    #background while the data is processed, per process
+    if 'decode_processes' in conf:
+        decode_processes = int(conf['decode_processes'])
+    else:
+        decode_processes = 0
 
     #read the processor config
     parsed_proc_cfg = configparser.ConfigParser()
     parsed_proc_cfg.read(os.path.join(expdir, 'processor.cfg'))
     proc_cfg = dict(parsed_proc_cfg.items('processor'))
 
-    #create a processor
-    processor = processor_factory.factory(proc_cfg['processor'])(proc_cfg, segment_lengths)
+    #check if the processor supports parallel processing before any data
+    #is processed
+    if (num_processes > 1 and
+            not processor_factory.factory(proc_cfg['processor']).parallel):
+        raise Exception('the %s can not be used with multiple processes'
+                        % proc_cfg['processor'])
+
+    if stage == 'stats':
+        _shard_stats(expdir, conf, proc_cfg, segment_lengths)
+        return
+
+    #the manifest contains the utterances that have already been processed,
+    #the complete file is written when all the data and metadata is written
+    manifest_file = os.path.join(conf['store_dir'], 'manifest')
+    hash_file = os.path.join(conf['store_dir'], 'config_hash')
+    complete_file = os.path.join(conf['store_dir'], 'complete')
+    config_hash = _config_hash(conf, proc_cfg, segment_lengths)
+
+    if not os.path.exists(conf['store_dir']):
+        os.makedirs(conf['store_dir'])
+        resume = False
+    elif not os.path.exists(hash_file) and os.listdir(conf['store_dir']):
+        #the data was prepared before the data preparation could be resumed
+        print '%s already exists, skipping this section' % conf['store_dir']
+        return
+    elif not os.path.exists(hash_file):
+        #a previous run stopped right after creating the directory
+        resume = False
+    else:
+        with open(hash_file) as fid:
+            if fid.read() != config_hash:
+                raise Exception(
+                    'the configuration of %s has changed, remove the directory '
+                    'to prepare the data again' % conf['store_dir'])
+        resume = True
+
+    if not resume:
+        _write_manifest(manifest_file, dict())
+        with open(hash_file + '.tmp', 'w') as fid:
+            fid.write(config_hash)
+        os.rename(hash_file + '.tmp', hash_file)
+
+    lines = [(utt_name, dataline, _signature(dataline))
+             for utt_name, dataline in datalines(conf)]
+    processed_utts = _read_manifest(manifest_file)
+
+    #if the data preparation is resumed the processor state (e.g. the global
+    #mean and variance) is restored
+    processor_file = os.path.join(conf['store_dir'], 'processor.pkl')
+    stats_file = os.path.join(conf['store_dir'], 'stats_signature')
+    processor = None
+    if resume and os.path.exists(processor_file):
+        with open(processor_file, 'rb') as fid:
+            processor = pickle.load(fid)
+
+        #the data is normalized with the global mean and variance, if the
+        #data they are computed on has changed all the data is invalid
+        if processor.global_stats:
+            stats_signature = None
+            if os.path.exists(stats_file):
+                with open(stats_file) as fid:
+                    stats_signature = fid.read()
+            if stats_signature != _stats_signature(conf, lines):
+                print ('%s: the global mean and variance have changed, '
+                       'processing all utterances again' % conf['store_dir'])
+                processor = None
+                processed_utts = dict()
+
+    #find the utterances that are new or have changed since they were
+    #processed
+    todo = []
+    done = dict()
+    for utt_name, dataline, signature in lines:
+        if processed_utts.get(utt_name, (None,))[0] == signature:
+            done[utt_name] = processed_utts[utt_name]
+        else:
+            todo.append((utt_name, dataline, signature))
+
+    if resume:
+        if (not todo and len(done) == len(processed_utts)
+                and os.path.exists(complete_file)):
+            print '%s is up to date, skipping this section' % conf['store_dir']
+            return
+
+        if os.path.exists(complete_file):
+            os.remove(complete_file)
 
-    #create the writers
+        print ('%s: %d utterances already processed, processing %d '
+               'utterances' % (conf['store_dir'], len(done), len(todo)))
+
+        #only keep the data of the utterances that are still valid
+        for seg_length in segment_lengths:
+            _filter_pointers(os.path.join(conf['store_dir'], seg_length), done)
+        _write_manifest(manifest_file, done)
+
+    if processor is None:
+        processor = processor_factory.factory(proc_cfg['processor'])(
+            proc_cfg, segment_lengths)
+        pre_loop = True
+    else:
+        #the metadata that depends on the sequence lengths (e.g. max_length)
+        #is computed again for the utterances that are kept
+        processor.reset_length_metadata([
+            sum([lengths.get(seg_length, [])
+                 for _, lengths in done.values()], [])
+            for seg_length in segment_lengths])
+        pre_loop = False
+
+    #let the processor consult the feature cache, the cache can be shared
+    #with the other sections of the database
+    if 'feature_cache_dir' in conf:
+        processor.feature_cache = feature_cache.FeatureCache(
+            conf['feature_cache_dir'], conf.get('feature_cache_size', 0))
+    else:
+        processor.feature_cache = None
+    audio_reader.set_cache(processor.feature_cache)
+
+    #create the writers, possibly packing the examples in shards
     writers = dict()
     for seg_length in segment_lengths:
         writer_store_dir = os.path.join(conf['store_dir'],seg_length)
-        writers[seg_length] = tfwriter_factory.factory(conf['writer_style'])(writer_store_dir)
+        writers[seg_length] = tfwriter_factory.factory(conf['writer_style'])(
+            writer_store_dir,
+            examples_per_shard=conf.get('examples_per_shard', 0),
+            megabytes_per_shard=conf.get('megabytes_per_shard', 0))
 
-    #before looping over the data, allow the processor to access the data (e.g. 
+    #before looping over the data, allow the processor to access the data (e.g.
     #for global mean and variance calculation) (or should this be done in init?)
-    processor.pre_loop(conf)
+    #if a feature cache is used, the features computed here are reused when
+    #the data is written
+    if pre_loop:
+        processor.pre_loop(conf)
+        if processor.global_stats:
+            with open(stats_file, 'w') as fid:
+                fid.write(_stats_signature(conf, lines))
+
+    #loop over the data and write the processed data to disk. After every
+    #checkpoint_interval utterances the written data is added to the manifest
+    for start in range(0, len(todo), checkpoint_interval):
+        chunk = todo[start:start+checkpoint_interval]
 
-    #loop over the data files
-    for datafile in conf['datafiles'].split(' '):
-        if datafile[-3:] == '.gz':
-            open_fn = gzip.open
+        if num_processes > 1:
+            lengths = _parallel_loop(processor, chunk, writers, num_processes,
+                                     decode_processes)
         else:
-            open_fn = open
+            lengths = dict()
+            audio_reader.set_decode_processes(decode_processes)
+            for utt_name, dataline, _ in _prefetched(chunk, decode_processes,
+                                                      1):
 
-        #loop over the lines in the datafile
-        for line in open_fn(datafile):
-            #split the name and the data line
-            splitline = line.strip().split(' ')
-            utt_name = splitline[0]
-            dataline = ' '.join(splitline[1:])
+                #process the dataline
+                processed, _ = processor(dataline)
 
-            #process the dataline
-            processed, _ = processor(dataline)
+                #write the processed data to disk
+                lengths[utt_name] = _write(writers, utt_name, processed)
+            audio_reader.set_decode_processes(0)
 
-            #write the processed data to disk
-            for seg_length in segment_lengths:
+        _checkpoint(processor, processor_file, writers, manifest_file, chunk,
+                    lengths)
 
-                for i,proc_seg in enumerate(processed[seg_length]):
+    for seg_length in segment_lengths:
+        writers[seg_length].close()
 
-                    seg_utt_name = utt_name + '_part %d' %i
-                    writers[seg_length].write(proc_seg, seg_utt_name)
+        #index the pointers, so they can be joined quickly in the input
+        #pipeline
+        pointer_index.write(writers[seg_length].datadir)
 
     #after looping over the data, allow the processor to access the data
     processor.post_loop(conf)
@@ -83,9 +251,482 @@ def main(expdir):
     #write the metadata to file
     processor.write_metadata(conf['store_dir'])
 
+    #mark the section as complete, a run that stops before this point is
+    #resumed
+    with open(complete_file, 'w') as fid:
+        fid.write('')
+
+def _shard_stats(expdir, conf, proc_cfg, segment_lengths):
+    '''compute the statistics for the global mean and variance normalization
+    of a shard of a section, they are merged with the statistics of the other
+    shards before the data is processed
+
+    Args:
+        expdir: the directory of the shard, the statistics are stored here
+        conf: the database section of the shard as a dictionary of strings
+        proc_cfg: the processor configuration as a dictionary of strings
+        segment_lengths: the segment lengths'''
+
+    stats_file = os.path.join(expdir, 'stats.pkl')
+    if os.path.exists(stats_file):
+        print '%s already exists, skipping the statistics' % stats_file
+        return
+
+    processor = processor_factory.factory(proc_cfg['processor'])(
+        proc_cfg, segment_lengths)
+
+    #the features are reused when the data of the shard is processed
+    if 'feature_cache_dir' in conf:
+        processor.feature_cache = feature_cache.FeatureCache(
+            conf['feature_cache_dir'], conf.get('feature_cache_size', 0))
+        audio_reader.set_cache(processor.feature_cache)
+
+    stats = processor.accumulate_stats(conf)
+
+    with open(stats_file + '.tmp', 'wb') as fid:
+        pickle.dump(stats, fid, pickle.HIGHEST_PROTOCOL)
+    os.rename(stats_file + '.tmp', stats_file)
+
+def merge(expdir):
+    '''combine the data of a section that was prepared in shards. The pointers
+    of all shards are put in a single pointers.scp file and the metadata of
+    the processors of the shards is merged. The data itself stays in the store
+    directories of the shards.
+
+    Args:
+        expdir: the directory of the section, containing the shards file
+            with the directories of the shards'''
+
+    parsed_cfg = configparser.ConfigParser()
+    parsed_cfg.read(os.path.join(expdir, 'database.cfg'))
+    conf = dict(parsed_cfg.items(parsed_cfg.sections()[0]))
+
+    if 'segment_lengths' in conf:
+        segment_lengths = conf['segment_lengths'].split(' ')
+    else:
+        segment_lengths = ['full']
+
+    with open(os.path.join(expdir, 'shards')) as fid:
+        shard_dirs = fid.read().split()
+
+    #read the store directories of the shards
+    shard_stores = []
+    for shard_dir in shard_dirs:
+        shard_cfg = configparser.ConfigParser()
+        shard_cfg.read(os.path.join(shard_dir, 'database.cfg'))
+        shard_stores.append(
+            shard_cfg.get(shard_cfg.sections()[0], 'store_dir'))
+
+    #merge the metadata of the processors of the shards
+    processor = None
+    for shard_store in shard_stores:
+        with open(os.path.join(shard_store, 'processor.pkl'), 'rb') as fid:
+            shard_processor = pickle.load(fid)
+        if processor is None:
+            processor = shard_processor
+        else:
+            processor.merge_metadata(shard_processor)
+
+    for seg_length in segment_lengths:
+        seg_dir = os.path.join(conf['store_dir'], seg_length)
+        if not os.path.isdir(seg_dir):
+            os.makedirs(seg_dir)
+
+        #the pointers of the shards in the order of the datafiles
+        num_tfrecord_shards = 0
+        with open(os.path.join(seg_dir, 'pointers.scp'), 'w') as fid:
+            for shard_store in shard_stores:
+                shard_seg_dir = os.path.join(shard_store, seg_length)
+                with open(os.path.join(shard_seg_dir, 'pointers.scp')) as shard_fid:
+                    fid.write(shard_fid.read())
+
+                #the examples of the shard were packed in TFRecord shards
+                if os.path.exists(os.path.join(shard_seg_dir, 'shards')):
+                    with open(os.path.join(shard_seg_dir, 'shards')) as shard_fid:
+                        num_tfrecord_shards += int(shard_fid.read())
+
+        if num_tfrecord_shards:
+            with open(os.path.join(seg_dir, 'shards'), 'w') as fid:
+                fid.write(str(num_tfrecord_shards))
+
+        pointer_index.write(seg_dir)
+
+    #write the metadata to file
+    processor.write_metadata(conf['store_dir'])
+
+def _checkpoint(processor, processor_file, writers, manifest_file, lines,
+                lengths):
+    '''make sure all the processed data is written and add the utterances to
+    the manifest, so the data preparation can be resumed from here
+
+    Args:
+        processor: the processor
+        processor_file: the file where the processor state is stored
+        writers: a dictionary containing a writer per segment length
+        manifest_file: the manifest file
+        lines: the utterance names, data lines and signatures of the
+            processed utterances
+        lengths: the lengths of the written segments of the utterances as
+            returned by _write, per utterance name'''
+
+    for writer in writers.values():
+        writer.flush()
+
+    #the feature cache is set again when the processor is restored
+    cache = processor.feature_cache
+    processor.feature_cache = None
+    with open(processor_file + '.tmp', 'wb') as fid:
+        pickle.dump(processor, fid, pickle.HIGHEST_PROTOCOL)
+    os.rename(processor_file + '.tmp', processor_file)
+    processor.feature_cache = cache
+
+    with open(manifest_file, 'a') as fid:
+        for utt_name, _, signature in lines:
+            fid.write(_manifest_line(utt_name, signature, lengths[utt_name]))
+
+def _config_hash(conf, proc_cfg, segment_lengths):
+    '''compute a hash of the configuration that determines the processed data
+
+    Args:
+        conf: the database section as a dictionary of strings
+        proc_cfg: the processor configuration as a dictionary of strings
+        segment_lengths: the segment lengths
+
+    Returns:
+        the hash as a string'''
+
+    config = sorted(proc_cfg.items()) + [
+        ('writer_style', conf['writer_style']),
+        ('segment_lengths', ' '.join(segment_lengths)),
+        ('meanandvar_dir', conf.get('meanandvar_dir', ''))]
+
+    #the packing in shards is only added if it is set, so the hash of data
+    #that is not packed in shards stays the same
+    config += [(option, conf[option])
+               for option in ['examples_per_shard', 'megabytes_per_shard']
+               if option in conf]
+
+    return hashlib.sha1(repr(config)).hexdigest()
+
+def _signature(dataline):
+    '''compute the signature of a data line, the signature changes if the
+    data line or one of the files it refers to changes
+
+    Args:
+        dataline: the data line
+
+    Returns:
+        the signature as a string'''
+
+    signature = hashlib.sha1(dataline)
+    for part in dataline.split(' '):
+        if os.path.isfile(part):
+            stat = os.stat(part)
+            signature.update('%s %d %d' % (part, stat.st_size, stat.st_mtime))
+
+    return signature.hexdigest()
+
+def _stats_signature(conf, lines):
+    '''compute a signature of the data the global mean and variance of a
+    section are computed on. If the signature changes, the data that was
+    normalized with the previous global mean and variance is invalid
+
+    Args:
+        conf: the database section as a dictionary of strings
+        lines: the utterance names, data lines and signatures of all the
+            utterances of the section
+
+    Returns:
+        the signature as a string'''
+
+    if 'stats_shards' in conf:
+        stats_files = conf['stats_shards'].split(' ')
+    elif conf['meanandvar_dir'] != conf['store_dir']:
+        stats_files = [
+            os.path.join(conf['meanandvar_dir'], 'glob_mean.npy'),
+            os.path.join(conf['meanandvar_dir'], 'glob_std.npy')]
+    else:
+        #the statistics are computed on all the utterances of the section
+        return hashlib.sha1(
+            repr(sorted((utt_name, signature)
+                        for utt_name, _, signature in lines))).hexdigest()
+
+    signature = hashlib.sha1()
+    for stats_file in stats_files:
+        with open(stats_file, 'rb') as fid:
+            signature.update(fid.read())
+
+    return signature.hexdigest()
+
+def _manifest_line(utt_name, signature, lengths):
+    '''create the line of an utterance in the manifest
+
+    Args:
+        utt_name: the name of the utterance
+        signature: the signature of the data line of the utterance
+        lengths: the lengths of the written segments of the utterance as
+            returned by _write
+
+    Returns:
+        the line as a string'''
+
+    lengths = ' '.join('%s:%s' % (seg_length, ','.join(str(length)
+                                                        for length in seg))
+                       for seg_length, seg in sorted(lengths.items()))
+
+    return '%s\t%s\t%s\n' % (utt_name, signature, lengths)
+
+def _read_manifest(manifest_file):
+    '''read the manifest of the processed utterances
+
+    Args:
+        manifest_file: the manifest file
+
+    Returns:
+        a dictionary containing the signature and the lengths of the written
+        segments of every processed utterance'''
+
+    processed_utts = dict()
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as fid:
+            for line in fid:
+                utt_name, signature, lengths_str = line.rstrip('\n').split('\t')
+                lengths = dict()
+                for seg in lengths_str.split():
+                    seg_length, seg_lengths = seg.split(':')
+                    lengths[seg_length] = [int(length) for length in
+                                           seg_lengths.split(',') if length]
+                processed_utts[utt_name] = (signature, lengths)
+
+    return processed_utts
+
+def _write_manifest(manifest_file, processed_utts):
+    '''write the manifest of the processed utterances
+
+    Args:
+        manifest_file: the manifest file
+        processed_utts: a dictionary containing the signature and the lengths
+            of the written segments of every processed utterance'''
+
+    with open(manifest_file + '.tmp', 'w') as fid:
+        for utt_name, (signature, lengths) in processed_utts.items():
+            fid.write(_manifest_line(utt_name, signature, lengths))
+    os.rename(manifest_file + '.tmp', manifest_file)
+
+def _filter_pointers(datadir, utt_names):
+    '''remove the pointers to the data of utterances that are not in
+    utt_names, e.g. because they were only partly written before a crash or
+    because they have changed
+
+    Args:
+        datadir: the directory containing the pointers.scp file
+        utt_names: the names of the utterances that should be kept'''
+
+    scp_file = os.path.join(datadir, 'pointers.scp')
+    if not os.path.exists(scp_file):
+        return
+
+    with open(scp_file) as fid:
+        lines = fid.readlines()
+
+    with open(scp_file + '.tmp', 'w') as fid:
+        for line in lines:
+            seg_utt_name = line.split('\t')[0]
+            if seg_utt_name.rsplit('_part ', 1)[0] in utt_names:
+                fid.write(line)
+    os.rename(scp_file + '.tmp', scp_file)
+
+def _write(writers, utt_name, processed):
+    '''write the processed data of an utterance for all segment lengths
+
+    Args:
+        writers: a dictionary containing a writer per segment length
+        utt_name: the name of the utterance
+        processed: the segmented data as a list of numpy arrays per segment
+            length
+
+    Returns:
+        the lengths of the written segments as a list per segment length'''
+
+    lengths = dict()
+    for seg_length in writers:
+
+        lengths[seg_length] = []
+        for i,proc_seg in enumerate(processed[seg_length]):
+
+            seg_utt_name = utt_name + '_part %d' %i
+            writers[seg_length].write(proc_seg, seg_utt_name)
+            lengths[seg_length].append(np.shape(proc_seg)[0])
+
+    return lengths
+
+def _prefetched(items, depth, dataline_index):
+    '''iterate over items that contain a data line and start decoding the audio
+    of the next items in the background
+
+    Args:
+        items: an iterable of tuples that contain a data line
+        depth: the number of items that are prefetched
+        dataline_index: the index of the data line in the tuples
+
+    Yields:
+        the items'''
+
+    window = collections.deque()
+    for item in items:
+        audio_reader.prefetch(item[dataline_index])
+        window.append(item)
+        if len(window) > depth:
+            yield window.popleft()
+
+    while window:
+        yield window.popleft()
+
+def _parallel_loop(processor, lines, writers, num_processes,
+                   decode_processes=0):
+    '''process the data with a pool of worker processes. The workers read and
+    process the data, the calling process writes the processed data to disk in
+    the order of the datafiles and merges the processor metadata of the workers
+    afterwards.
+
+    Args:
+        processor: the processor, pre_loop should already have been called
+        lines: the utterance names, data lines and signatures of the
+            utterances
+        writers: a dictionary containing a writer per segment length
+        num_processes: the number of worker processes
+        decode_processes: the number of commands that decode audio in the
+            background per worker
+
+    Returns:
+        the lengths of the written segments as returned by _write, per
+        utterance name'''
+
+    #limit the number of processed utterances that can wait to be written
+    in_queue = multiprocessing.Queue(4*num_processes)
+    out_queue = multiprocessing.Queue(4*num_processes)
+
+    workers = [multiprocessing.Process(target=_worker,
+                                       args=(processor, in_queue, out_queue,
+                                             decode_processes))
+               for _ in range(num_processes)]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+
+    #put the datalines in the queue from a seperate thread so the writing can
+    #start while the datafiles are being read
+    feeder = threading.Thread(target=_feed,
+                              args=(lines, in_queue, num_processes))
+    feeder.daemon = True
+    feeder.start()
+
+    #write the processed utterances in the order of the datafiles
+    pending = dict()
+    lengths = dict()
+    next_index = 0
+    finished = 0
+    while finished < num_processes:
+        try:
+            index, utt_name, result = out_queue.get(
+                timeout=_WORKER_CHECK_INTERVAL)
+        except queue.Empty:
+            #a worker that is killed (e.g. when it runs out of memory) can not
+            #report its failure, the data preparation would wait forever
+            for worker in workers:
+                if worker.exitcode not in (None, 0):
+                    for other in workers:
+                        other.terminate()
+                    raise Exception(
+                        'a data preparation worker stopped with exit code %d'
+                        % worker.exitcode)
+            if not any(worker.is_alive() for worker in workers):
+                raise Exception('the data preparation workers stopped '
+                                'without returning their results')
+            continue
+
+        if index is None:
+            if utt_name is not None:
+                raise Exception('a data preparation worker failed:\n%s'
+                                % utt_name)
+            #the worker is done and returned its processor, merge the metadata
+            processor.merge_metadata(result)
+            finished += 1
+            continue
+
+        pending[index] = (utt_name, result)
+        while next_index in pending:
+            utt_name, processed = pending.pop(next_index)
+            lengths[utt_name] = _write(writers, utt_name, processed)
+            next_index += 1
+
+    feeder.join()
+    for worker in workers:
+        worker.join()
+
+    return lengths
+
+def _feed(lines, in_queue, num_processes):
+    '''put all the datalines in the queue, followed by a stop signal for every
+    worker
+
+    Args:
+        lines: the utterance names, data lines and signatures of the
+            utterances
+        in_queue: the queue the workers read from
+        num_processes: the number of worker processes'''
+
+    for index, (utt_name, dataline, _) in enumerate(lines):
+        in_queue.put((index, utt_name, dataline))
+
+    for _ in range(num_processes):
+        in_queue.put(None)
+
+def _worker(processor, in_queue, out_queue, decode_processes):
+    '''process datalines untill a stop signal is received and return the
+    processor so its metadata can be merged
+
+    Args:
+        processor: the processor for this worker
+        in_queue: the queue containing the datalines
+        out_queue: the queue where the processed data is put
+        decode_processes: the number of commands that decode audio in the
+            background'''
+
+    #make sure the workers do not share the random state of the parent
+    np.random.seed()
+
+    try:
+        #the copy of the processor holds the length metadata of the parent
+        #process, only the lengths of the utterances of this worker are
+        #merged
+        processor.reset_length_metadata(
+            [[] for _ in processor.segment_lengths])
+
+        audio_reader.set_decode_processes(decode_processes)
+
+        #the worker takes the next datalines from the queue in advance, so
+        #their audio can be decoded in the background
+        items = iter(in_queue.get, None)
+        for index, utt_name, dataline in _prefetched(items, decode_processes,
+                                                     2):
+
+            #process the dataline
+            processed, _ = processor(dataline)
+
+            out_queue.put((index, utt_name, processed))
+
+        out_queue.put((None, None, processor))
+
+    except Exception:
+        out_queue.put((None, traceback.format_exc(), None))
+
 
 if __name__ == '__main__':
     tf.app.flags.DEFINE_string('expdir', 'expdir', 'The experiments directory')
+    tf.app.flags.DEFINE_string('stage', 'all',
+                               'the part of the data preparation, one of all,'
+                               ' stats or merge')
     FLAGS = tf.app.flags.FLAGS
 
-    main(FLAGS.expdir)
+    main(FLAGS.expdir, FLAGS.stage)
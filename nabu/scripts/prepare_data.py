@@ -9,6 +9,8 @@ import shutil
 from six.moves import configparser
 import tensorflow as tf
 import data
+from nabu.processing.processors import processor_factory
+from nabu.processing.processors.processor import datalines
 import pdb
 
 def main(expdir, recipe, computing):
@@ -32,6 +34,7 @@ def main(expdir, recipe, computing):
     cfg_sections = parsed_cfg.sections()
 
     #check which parameters are defined globaly for database
+    globaldataconf = dict()
     if 'globalvars' in cfg_sections:
 
         globaldataconf = dict(parsed_cfg.items('globalvars'))
@@ -60,6 +63,11 @@ def main(expdir, recipe, computing):
                 else:
                     dataconf.set(name, item, conf[item])
 
+            #all sections share the feature cache defined in the globalvars
+            for item in ['feature_cache_dir', 'feature_cache_size']:
+                if item in globaldataconf and item not in conf:
+                    dataconf.set(name, item, globaldataconf[item])
+
             with open(os.path.join(expdir, name, 'database.cfg'), 'w') as fid:
                 dataconf.write(fid)
 
@@ -68,11 +76,35 @@ def main(expdir, recipe, computing):
                 conf['processor_config'],
                 os.path.join(expdir, name, 'processor.cfg'))
 
-            if computing == 'condor':
+            num_jobs = int(dict(dataconf.items(name)).get('num_jobs', 1))
+
+            if num_jobs > 1:
+                #the metadata of the shards is merged, so the processor has
+                #to support parallel processing
+                parsed_proc_cfg = configparser.ConfigParser()
+                parsed_proc_cfg.read(conf['processor_config'])
+                processor_type = parsed_proc_cfg.get('processor', 'processor')
+                if not processor_factory.factory(processor_type).parallel:
+                    raise Exception('the %s can not be used with num_jobs'
+                                    % processor_type)
+
+                #split the section in shards that are prepared by seperate
+                #jobs
+                shard_dirs, stats = _create_shards(
+                    os.path.join(expdir, name), num_jobs)
+
+                if computing == 'condor':
+                    _submit_shards(os.path.join(expdir, name), shard_dirs,
+                                   stats)
+                else:
+                    _run_shards(os.path.join(expdir, name), shard_dirs, stats)
+
+            elif computing == 'condor':
                 if not os.path.isdir(os.path.join(expdir, name, 'outputs')):
                     os.makedirs(os.path.join(expdir, name, 'outputs'))
                 subprocess.call(['condor_submit',
                                  'expdir=%s' % os.path.join(expdir, name),
+                                 'stage=all',
                                  'nabu/computing/condor/dataprep.job'])
             else:
                 data.main(os.path.join(expdir, name))
@@ -80,6 +112,135 @@ def main(expdir, recipe, computing):
         else:
             print 'Did not require storage.'
 
+def _create_shards(expdir, num_jobs):
+    '''split the datafiles of a section in shards and create a directory with
+    the configuration for every shard
+
+    Args:
+        expdir: the directory of the section
+        num_jobs: the number of shards
+
+    Returns:
+        - the directories of the shards
+        - whether the statistics for the global mean and variance
+            normalization have to be computed on the shards'''
+
+    parsed_cfg = configparser.ConfigParser()
+    parsed_cfg.read(os.path.join(expdir, 'database.cfg'))
+    name = parsed_cfg.sections()[0]
+    conf = dict(parsed_cfg.items(name))
+
+    parsed_proc_cfg = configparser.ConfigParser()
+    parsed_proc_cfg.read(os.path.join(expdir, 'processor.cfg'))
+    proc_cfg = dict(parsed_proc_cfg.items('processor'))
+
+    lines = list(datalines(conf))
+    num_jobs = max(min(num_jobs, len(lines)), 1)
+
+    #the statistics are computed on the data of this section
+    stats = (proc_cfg.get('mvn_type') == 'global' and
+             conf.get('meanandvar_dir') == conf['store_dir'])
+
+    shard_dirs = [os.path.join(expdir, 'shard%d' % shard)
+                  for shard in range(num_jobs)]
+
+    for shard, shard_dir in enumerate(shard_dirs):
+        if not os.path.isdir(os.path.join(shard_dir, 'outputs')):
+            os.makedirs(os.path.join(shard_dir, 'outputs'))
+
+        #every shard contains a contiguous part of the datafiles, so the
+        #order of the datafiles is kept when the shards are merged
+        start = shard*len(lines)//num_jobs
+        end = (shard + 1)*len(lines)//num_jobs
+        with open(os.path.join(shard_dir, 'datafile'), 'w') as fid:
+            for utt_name, dataline in lines[start:end]:
+                fid.write('%s %s\n' % (utt_name, dataline))
+
+        shard_cfg = configparser.ConfigParser()
+        shard_cfg.add_section(name)
+        for item in conf:
+            if item != 'num_jobs':
+                shard_cfg.set(name, item, conf[item])
+        shard_cfg.set(name, 'datafiles', os.path.join(shard_dir, 'datafile'))
+        shard_cfg.set(name, 'store_dir', os.path.join(
+            conf['store_dir'], 'shards', 'shard%d' % shard))
+        if stats:
+            shard_cfg.set(name, 'stats_shards', ' '.join(
+                [os.path.join(d, 'stats.pkl') for d in shard_dirs]))
+        with open(os.path.join(shard_dir, 'database.cfg'), 'w') as fid:
+            shard_cfg.write(fid)
+
+        shutil.copyfile(os.path.join(expdir, 'processor.cfg'),
+                        os.path.join(shard_dir, 'processor.cfg'))
+
+    #the merge job reads the directories of the shards
+    with open(os.path.join(expdir, 'shards'), 'w') as fid:
+        fid.write('\n'.join(shard_dirs))
+
+    return shard_dirs, stats
+
+def _submit_shards(expdir, shard_dirs, stats):
+    '''submit the jobs that prepare the shards of a section and the job that
+    merges them to condor as a DAG
+
+    Args:
+        expdir: the directory of the section
+        shard_dirs: the directories of the shards
+        stats: whether the statistics are computed on the shards first'''
+
+    if not os.path.isdir(os.path.join(expdir, 'outputs')):
+        os.makedirs(os.path.join(expdir, 'outputs'))
+
+    job_file = os.path.abspath('nabu/computing/condor/dataprep.job')
+    dag_file = os.path.join(expdir, 'dataprep.dag')
+
+    with open(dag_file, 'w') as fid:
+        for shard, shard_dir in enumerate(shard_dirs):
+            if stats:
+                fid.write('JOB stats%d %s\n' % (shard, job_file))
+                fid.write('VARS stats%d expdir="%s" stage="stats"\n'
+                          % (shard, shard_dir))
+            fid.write('JOB data%d %s\n' % (shard, job_file))
+            fid.write('VARS data%d expdir="%s" stage="all"\n'
+                      % (shard, shard_dir))
+        fid.write('JOB merge %s\n' % job_file)
+        fid.write('VARS merge expdir="%s" stage="merge"\n' % expdir)
+
+        data_jobs = ' '.join(['data%d' % shard
+                              for shard in range(len(shard_dirs))])
+        if stats:
+            stats_jobs = ' '.join(['stats%d' % shard
+                                   for shard in range(len(shard_dirs))])
+            fid.write('PARENT %s CHILD %s\n' % (stats_jobs, data_jobs))
+        fid.write('PARENT %s CHILD merge\n' % data_jobs)
+
+    subprocess.call(['condor_submit_dag', '-force', dag_file])
+
+def _run_shards(expdir, shard_dirs, stats):
+    '''prepare the shards of a section with a local process per shard and
+    merge them
+
+    Args:
+        expdir: the directory of the section
+        shard_dirs: the directories of the shards
+        stats: whether the statistics are computed on the shards first'''
+
+    stages = ['stats', 'all'] if stats else ['all']
+
+    for stage in stages:
+        processes = [
+            subprocess.Popen(['python', '-um', 'nabu.scripts.data',
+                              '--expdir=%s' % shard_dir,
+                              '--stage=%s' % stage])
+            for shard_dir in shard_dirs]
+
+        for shard_dir, process in zip(shard_dirs, processes):
+            if process.wait() != 0:
+                raise Exception('the data preparation of %s failed'
+                                % shard_dir)
+
+    data.merge(expdir)
+
 if __name__ == '__main__':
 
     tf.app.flags.DEFINE_string('expdir', None,
@@ -129,11 +129,22 @@ def main(expdir, recipe, computing, resume, duplicates, sweep_flag):
 					segment_parsed_database_cfg = configparser.ConfigParser()
 					segment_parsed_database_cfg.read(database_cfg_file)
 
+					#if the segments are cropped in the input pipeline, all
+					#stages read the data of the full utterances
+					crop_segments = trainer_cfg.get('crop_segments', 'False') == 'True'
+
 					for section in segment_parsed_database_cfg.sections():
 						if 'store_dir' in dict(segment_parsed_database_cfg.items(section)).keys():
-							segment_parsed_database_cfg.set(section,'store_dir',
-															os.path.join(segment_parsed_database_cfg.get(section,'store_dir'),
-																		 seg_length) )
+							if crop_segments:
+								segment_parsed_database_cfg.set(section,'store_dir',
+																os.path.join(segment_parsed_database_cfg.get(section,'store_dir'),
+																			 'full') )
+								if seg_length != 'full':
+									segment_parsed_database_cfg.set(section,'crop_length',seg_length)
+							else:
+								segment_parsed_database_cfg.set(section,'store_dir',
+																os.path.join(segment_parsed_database_cfg.get(section,'store_dir'),
+																			 seg_length) )
 					with open(os.path.join(seg_expdir_run, 'database.cfg'), 'w') as fid:
 						segment_parsed_database_cfg.write(fid)
 